@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import savegame
+
+# Fichero de la partida automática (se carga con Mayús + F9)
+AUTOSAVE_PATH = "autosave.sav"
+
+# Nivel de compresión zlib: rápido y suficiente para arrays de estadísticas
+COMPRESSION_LEVEL = 6
+
+
+class AutosaveService:
+    """Guarda la partida en segundo plano sin detener el dibujo
+
+    request() solo toma una instantánea en el hilo principal (copias de
+    arrays, con el historial convertido de forma incremental o, con un
+    TrajectoryHistory, vistas de sus filas). Serializar, convertir el
+    historial, comprimir y escribir el fichero ocurre en un hilo de
+    escritura propio.
+    Si llegan peticiones mientras se escribe, solo se conserva la más
+    reciente: las intermedias ya estarían obsoletas al terminar.
+    """
+
+    def __init__(self, path=AUTOSAVE_PATH, compression_level=COMPRESSION_LEVEL):
+        self.path = path
+        self.compression_level = compression_level
+        self.history_buffer = savegame.HistoryBuffer()
+        self.saves_written = 0
+        self.saves_coalesced = 0
+        self.last_error = None
+        self._executor = None
+        self._future = None
+        self._pending = None
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self):
+        """Indica si hay una escritura en curso"""
+        return self._future is not None
+
+    def request(self, game):
+        """Toma una instantánea de la partida y la encola para escribirla"""
+        save = savegame.snapshot(game, self.history_buffer)
+        with self._lock:
+            if self._future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+                self._future = self._executor.submit(self._run, save)
+            else:
+                if self._pending is not None:
+                    self.saves_coalesced += 1
+                self._pending = save
+
+    def _run(self, save):
+        """Hilo de escritura: guarda la instantánea y después la última pendiente"""
+        while save is not None:
+            try:
+                savegame.write_atomic(self.path, savegame.encode_compressed(save, self.compression_level))
+                self.saves_written += 1
+                self.last_error = None
+            except OSError as e:
+                self.last_error = e
+            with self._lock:
+                save, self._pending = self._pending, None
+                if save is None:
+                    self._future = None
+
+    def flush(self, timeout=None):
+        """Espera a que terminen las escrituras pendientes"""
+        future = self._future
+        if future is not None:
+            future.result(timeout)
+
+    def close(self):
+        """Termina las escrituras pendientes y detiene el hilo"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
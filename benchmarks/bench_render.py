@@ -0,0 +1,217 @@
+"""Benchmark de renderizado sin pantalla (driver de vídeo "dummy" de SDL)
+
+Construye cada pantalla del juego (menú, historia, partida a mitad con las
+estadísticas abiertas y pantalla final), ejecuta N fotogramas de update +
+draw + flip y muestra fotogramas por segundo, los fotogramas más lentos y
+las asignaciones de memoria medidas con tracemalloc.
+
+Uso:
+    python benchmarks/bench_render.py [--frames N] [--scene NOMBRE] [--json]
+                                      [--min-fps FPS]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+
+SCREEN_SIZE = (1200, 800)
+FRAME_DT = 1.0 / 60.0
+
+
+class Scene:
+    """Adaptador común: update() y draw() para cada pantalla"""
+
+    def __init__(self, name, target, update):
+        self.name = name
+        self.target = target
+        self._update = update
+
+    def update(self):
+        self._update()
+
+    def draw(self):
+        # Las pantallas que usan el compositor devuelven las áreas cambiadas
+        return self.target.draw()
+
+
+def build_menu(screen):
+    from ui import MainMenu
+    menu = MainMenu(screen)
+    return Scene("menu", menu, menu.update)
+
+
+def build_story(screen):
+    from story_screen import StoryScreen
+    story = StoryScreen(screen, "normal")
+    story.current_page = 1
+    return Scene("story", story, story.update)
+
+
+def build_game_stats(screen, days=120):
+    """Partida a mitad (días simulados) con el panel de estadísticas abierto"""
+    from game_loop import GameLoop
+    random.seed(1234)
+    game = GameLoop(screen, "easy")
+    game.max_days = days * 10
+    for _ in range(days):
+        if game.game_state != "playing":
+            break
+        game.advance_day()
+    # Medir siempre la vista de juego aunque la simulación haya terminado la partida
+    game.game_state = "playing"
+    game.game_over_screen = None
+    game.ui.stats_panel_visible = True
+    game.ui.set_buttons_enabled(False)
+    return Scene("game_stats", game, lambda: game.update(FRAME_DT))
+
+
+def build_game(screen, days=120):
+    """Partida a mitad con la vista principal (mapa, paneles y decisiones)"""
+    scene = build_game_stats(screen, days)
+    scene.target.ui.stats_panel_visible = False
+    scene.target.ui.set_buttons_enabled(True)
+    scene.name = "game"
+    return scene
+
+
+def build_game_full(screen, days=120):
+    """Vista principal forzando el redibujado completo en cada fotograma"""
+    scene = build_game(screen, days)
+    game = scene.target
+
+    def update():
+        game.update(FRAME_DT)
+        game.compositor.invalidate()
+
+    return Scene("game_full", game, update)
+
+
+def build_game_over(screen):
+    from game_loop import GameOverScreen
+    stats = {
+        'total_population': 5800000, 'susceptible': 0, 'exposed': 0, 'infected': 120,
+        'recovered': 2500000, 'deaths': 40000, 'economy': 82.0, 'morale': 74.0
+    }
+    screen_over = GameOverScreen(screen, "victory", stats, 140)
+    return Scene("game_over", screen_over, lambda: screen_over.update(FRAME_DT))
+
+
+SCENES = {
+    "menu": build_menu,
+    "story": build_story,
+    "game": build_game,
+    "game_full": build_game_full,
+    "game_stats": build_game_stats,
+    "game_over": build_game_over,
+}
+
+
+def run_frames(scene, frames):
+    """Ejecuta fotogramas y devuelve la duración de cada uno en segundos"""
+    durations = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        pygame.event.pump()
+        scene.update()
+        dirty_rects = scene.draw()
+        if dirty_rects is None:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def measure_allocations(scene, frames):
+    """Bloques y memoria asignados durante frames fotogramas (tracemalloc)"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    run_frames(scene, frames)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    diff = after.compare_to(before, "filename")
+    new_blocks = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+    new_bytes = sum(stat.size_diff for stat in diff if stat.size_diff > 0)
+    return {
+        'retained_blocks': new_blocks,
+        'retained_bytes': new_bytes,
+        'peak_traced_bytes': peak,
+    }
+
+
+def bench_scene(screen, name, frames, warmup, alloc_frames):
+    scene = SCENES[name](screen)
+    run_frames(scene, warmup)
+    durations = run_frames(scene, frames)
+    allocations = measure_allocations(scene, alloc_frames) if alloc_frames else {}
+
+    total = sum(durations)
+    slowest = sorted(enumerate(durations), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'scene': name,
+        'frames': frames,
+        'fps': frames / total if total > 0 else float("inf"),
+        'mean_ms': statistics.mean(durations) * 1000,
+        'median_ms': statistics.median(durations) * 1000,
+        'p95_ms': sorted(durations)[int(0.95 * (len(durations) - 1))] * 1000,
+        'slowest_frames': [{'frame': index, 'ms': duration * 1000} for index, duration in slowest],
+        **allocations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de renderizado sin pantalla")
+    parser.add_argument("--frames", type=int, default=300, help="fotogramas medidos por escena")
+    parser.add_argument("--warmup", type=int, default=30, help="fotogramas de calentamiento")
+    parser.add_argument("--alloc-frames", type=int, default=60,
+                        help="fotogramas medidos con tracemalloc (0 para omitir)")
+    parser.add_argument("--scene", action="append", choices=sorted(SCENES),
+                        help="escena a medir (se puede repetir; por defecto todas)")
+    parser.add_argument("--json", action="store_true", help="imprime los resultados en JSON")
+    parser.add_argument("--min-fps", type=float, default=None,
+                        help="falla si alguna escena queda por debajo de estos FPS")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+
+    results = [bench_scene(screen, name, args.frames, args.warmup, args.alloc_frames)
+               for name in (args.scene or list(SCENES))]
+    pygame.quit()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'escena':<12} {'FPS':>9} {'media':>8} {'p95':>8} {'máx':>8} {'bloques':>9} {'pico KB':>9}")
+        for result in results:
+            worst = result['slowest_frames'][0]['ms'] if result['slowest_frames'] else 0.0
+            print(f"{result['scene']:<12} {result['fps']:9.1f} {result['mean_ms']:7.2f}ms "
+                  f"{result['p95_ms']:7.2f}ms {worst:7.2f}ms "
+                  f"{result.get('retained_blocks', 0):9d} {result.get('peak_traced_bytes', 0) / 1024:9.1f}")
+
+    if args.min_fps is not None:
+        slow = [r['scene'] for r in results if r['fps'] < args.min_fps]
+        if slow:
+            print(f"ERROR: por debajo de {args.min_fps} FPS: {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
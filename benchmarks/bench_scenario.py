@@ -0,0 +1,132 @@
+"""Benchmark de escenarios: carga y paso de la historia a la partida
+
+Genera un escenario sintético a nivel de países (una cuadrícula de regiones
+con polígonos de muchos puntos y rutas entre vecinas y al azar) y mide, en un
+proceso nuevo cada vez:
+
+    - validar el JSON y compilarlo (primera carga, sin binario en caché)
+    - cargar el binario compilado (cargas siguientes)
+    - crear el GameLoop y dibujar su primer fotograma (historia -> partida)
+
+Uso:
+    python benchmarks/bench_scenario.py [--regions 250] [--points 32] [--runs 3]
+                                        [--budget SEGUNDOS]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código del proceso hijo: carga el escenario y crea la partida como main()
+CHILD_CODE = r"""
+import json, sys, time
+import pygame
+import scenarios
+path = sys.argv[1]
+pygame.init()
+screen = pygame.display.set_mode((1200, 800))
+from game_loop import GameLoop
+started = time.perf_counter()
+scenario = scenarios.load_scenario(path)
+loaded = time.perf_counter()
+game = GameLoop(screen, "normal", seed=1, scenario=scenario)
+game.draw()
+pygame.display.flip()
+drawn = time.perf_counter()
+print(json.dumps({"load": loaded - started, "game": drawn - loaded, "transition": drawn - started}))
+"""
+
+
+def make_scenario(regions, points, seed=0):
+    """Escenario sintético: cuadrícula de regiones con rutas entre vecinas y algunas al azar"""
+    rng = random.Random(seed)
+    columns = math.ceil(math.sqrt(regions * 2))
+    rows = math.ceil(regions / columns)
+    names = [f"País {i:04d}" for i in range(regions)]
+    data = {"name": f"Sintético ({regions} países)", "regions": [], "routes": []}
+    for i, name in enumerate(names):
+        cx, cy = (i % columns + 0.5) / columns, (i // columns + 0.5) / rows
+        polygon = [[round(cx + 0.45 / columns * math.cos(2 * math.pi * k / points), 5),
+                    round(cy + 0.45 / rows * math.sin(2 * math.pi * k / points), 5)]
+                   for k in range(points)]
+        data["regions"].append({
+            "name": name,
+            "population": rng.randrange(100000, 100000000),
+            "initial_infected": rng.randrange(10, 500) if rng.random() < 0.05 else 0,
+            "polygon": polygon,
+            "parameters": {"beta": round(rng.uniform(0.3, 0.7), 3)},
+        })
+        if i % columns + 1 < columns and i + 1 < regions:
+            data["routes"].append([name, names[i + 1]])
+        if i + columns < regions:
+            data["routes"].append([name, names[i + columns]])
+    for _ in range(regions):
+        data["routes"].append(rng.sample(names, 2))
+    return data
+
+
+def run_once(path):
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    env["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+    result = subprocess.run([sys.executable, "-c", CHILD_CODE, path], cwd=ROOT, env=env,
+                            stdout=subprocess.PIPE, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide la carga de un escenario grande y el inicio de la partida")
+    parser.add_argument("--regions", type=int, default=250)
+    parser.add_argument("--points", type=int, default=32, help="puntos de cada polígono")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="tiempo máximo aceptable del paso a la partida (con el binario en caché)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import scenarios
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "sintetico.json")
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(make_scenario(args.regions, args.points), f, ensure_ascii=False)
+        size_kb = os.path.getsize(path) / 1024
+
+        cold = []
+        for _ in range(args.runs):
+            cache = scenarios.cache_path(path)
+            if os.path.exists(cache):
+                os.remove(cache)
+            cold.append(run_once(path))
+        warm = [run_once(path) for _ in range(args.runs)]
+    finally:
+        cache = scenarios.cache_path(path)
+        if os.path.exists(cache):
+            os.remove(cache)
+        shutil.rmtree(directory)
+
+    print(f"Escenario: {args.regions} regiones, {args.points} puntos por polígono, JSON de {size_kb:.0f} KB")
+    for label, runs in (("sin caché", cold), ("compilado", warm)):
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"  {label:<10} carga {median['load'] * 1000:7.1f} ms   partida {median['game'] * 1000:7.1f} ms"
+              f"   total {median['transition'] * 1000:7.1f} ms (mediana)")
+
+    transition = statistics.median(run["transition"] for run in warm)
+    if transition > args.budget:
+        print(f"ERROR: el paso a la partida supera el presupuesto de {args.budget:.2f} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
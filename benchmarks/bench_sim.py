@@ -0,0 +1,287 @@
+"""Benchmark de rendimiento de la simulación (días simulados por segundo)
+
+Mide Continent.step, SEIRSimulator.step, simulate_international_spread,
+EventManager.check_events, DecisionManager.get_available_decisions y un
+GameLoop.advance_day completo sin pantalla, escalando el número de regiones
+(3 → 10.000) y de miembros del ensemble (1 → 10.000 mundos independientes).
+
+Los casos cuyo coste estimado (extrapolado del tamaño anterior) supera
+--max-case-seconds se marcan como omitidos en lugar de ejecutarse.
+
+Uso:
+    python benchmarks/bench_sim.py [--output resultados.json]
+                                   [--compare base.json] [--tolerance 0.10]
+                                   [--bench NOMBRE] [--quick]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from seir import Continent, SEIRSimulator
+from events import EventManager
+from decisions import DecisionManager
+
+REGION_SIZES = [3, 30, 300, 3000, 10000]
+MEMBER_SIZES = [1, 10, 100, 1000, 10000]
+QUICK_REGION_SIZES = [3, 30, 300]
+QUICK_MEMBER_SIZES = [1, 10, 100]
+DIFFICULTY = "normal"
+
+
+def make_regions(count, rng):
+    """Crea count regiones con poblaciones e infecciones iniciales variadas"""
+    regions = []
+    for i in range(count):
+        population = rng.randint(100_000, 10_000_000)
+        regions.append(Continent(f"Región {i}", population,
+                                 initial_infected=rng.randint(10, 500),
+                                 difficulty=DIFFICULTY))
+    return regions
+
+
+def make_worlds(regions, members, seed=0):
+    rng = random.Random(seed)
+    return [make_regions(regions, rng) for _ in range(members)]
+
+
+# Cada benchmark recibe (regiones, miembros) y devuelve una función que
+# simula un día para todos los miembros. "order" es el exponente de coste
+# respecto al número de regiones, usado para extrapolar.
+
+def setup_continent_step(regions, members):
+    worlds = make_worlds(regions, members)
+
+    def day(_):
+        for continents in worlds:
+            for continent in continents:
+                continent.step()
+    return day
+
+
+def setup_simulator_step(regions, members):
+    simulators = [SEIRSimulator(continents, DIFFICULTY) for continents in make_worlds(regions, members)]
+
+    def day(_):
+        for simulator in simulators:
+            simulator.step()
+    return day
+
+
+def setup_international_spread(regions, members):
+    simulators = [SEIRSimulator(continents, DIFFICULTY) for continents in make_worlds(regions, members)]
+
+    def day(_):
+        for simulator in simulators:
+            simulator.simulate_international_spread()
+    return day
+
+
+def setup_check_events(regions, members):
+    worlds = []
+    for continents in make_worlds(regions, members):
+        stats = SEIRSimulator(continents, DIFFICULTY).get_global_stats()
+        worlds.append((EventManager(DIFFICULTY), continents, stats))
+
+    def day(number):
+        for manager, continents, stats in worlds:
+            manager.check_events(number, continents, stats)
+    return day
+
+
+def setup_available_decisions(regions, members):
+    worlds = []
+    for continents in make_worlds(regions, members):
+        stats = SEIRSimulator(continents, DIFFICULTY).get_global_stats()
+        worlds.append((DecisionManager(DIFFICULTY), continents, stats))
+
+    def day(number):
+        for manager, continents, stats in worlds:
+            manager.get_available_decisions(number, continents, stats)
+    return day
+
+
+_screen = None
+
+
+def setup_advance_day(regions, members):
+    """GameLoop completo (con su interfaz) sobre el driver de vídeo dummy"""
+    global _screen
+    import pygame
+    from game_loop import GameLoop
+
+    if _screen is None:
+        pygame.init()
+        _screen = pygame.display.set_mode((1200, 800))
+
+    games = []
+    for continents in make_worlds(regions, members):
+        game = GameLoop(_screen, DIFFICULTY)
+        game.continents = continents
+        game.simulator = SEIRSimulator(continents, DIFFICULTY)
+        game.max_days = 10 ** 9
+        games.append(game)
+
+    def day(_):
+        for game in games:
+            # Mantener la partida activa aunque se alcance una condición de fin
+            game.game_state = "playing"
+            game.advance_day()
+    return day
+
+
+BENCHMARKS = {
+    "continent_step": (setup_continent_step, 1),
+    "simulator_step": (setup_simulator_step, 2),
+    "international_spread": (setup_international_spread, 2),
+    "check_events": (setup_check_events, 1),
+    "available_decisions": (setup_available_decisions, 1),
+    "advance_day": (setup_advance_day, 2),
+}
+
+
+def run_case(name, regions, members, min_seconds, min_days):
+    """Ejecuta un caso y devuelve días simulados por segundo"""
+    setup, _ = BENCHMARKS[name]
+    random.seed(0)
+    started = time.perf_counter()
+    day = setup(regions, members)
+    setup_seconds = time.perf_counter() - started
+
+    days = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while days < min_days or elapsed < min_seconds:
+        day(days + 1)
+        days += 1
+        elapsed = time.perf_counter() - started
+
+    days_per_second = days / elapsed if elapsed > 0 else float("inf")
+    return {
+        'benchmark': name,
+        'regions': regions,
+        'members': members,
+        'days': days,
+        'seconds': elapsed,
+        'setup_seconds': setup_seconds,
+        'days_per_second': days_per_second,
+        'region_days_per_second': days_per_second * regions * members,
+    }
+
+
+def estimate_seconds(previous, regions, members, order):
+    """Extrapola el coste de un caso (preparación + un día) desde el anterior"""
+    scale = (regions / previous['regions']) ** order * (members / previous['members'])
+    per_day = 1.0 / previous['days_per_second'] if previous['days_per_second'] else 0.0
+    return (previous['setup_seconds'] + per_day) * scale
+
+
+def sweep(name, region_sizes, member_sizes, args):
+    """Recorre regiones (con 1 miembro) y miembros (con 3 regiones)"""
+    _, order = BENCHMARKS[name]
+    results = []
+    base = None
+    for cases in ([(r, 1) for r in region_sizes], [(3, m) for m in member_sizes]):
+        # Cada barrido extrapola desde su caso anterior; el de miembros parte del caso base
+        previous = base
+        for regions, members in cases:
+            if base is not None and (regions, members) == (base['regions'], base['members']):
+                continue
+            if previous is not None:
+                estimate = estimate_seconds(previous, regions, members, order)
+                if estimate > args.max_case_seconds:
+                    results.append({
+                        'benchmark': name, 'regions': regions, 'members': members,
+                        'skipped': True, 'estimated_seconds': estimate,
+                    })
+                    print(f"  {name:<22} regiones={regions:<6} miembros={members:<6} "
+                          f"omitido (estimado {estimate:.1f} s)")
+                    continue
+            result = run_case(name, regions, members, args.min_seconds, args.min_days)
+            results.append(result)
+            previous = result
+            if base is None:
+                base = result
+            print(f"  {name:<22} regiones={regions:<6} miembros={members:<6} "
+                  f"{result['days_per_second']:12.1f} días/s "
+                  f"{result['region_days_per_second']:14.0f} región-días/s")
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    """Compara con unos resultados guardados; devuelve el número de regresiones"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    reference = {(r['benchmark'], r['regions'], r['members']): r
+                 for r in baseline['results'] if not r.get('skipped')}
+
+    regressions = 0
+    print(f"\nComparación con {baseline_path} (tolerancia {tolerance:.0%}):")
+    for result in results:
+        if result.get('skipped'):
+            continue
+        key = (result['benchmark'], result['regions'], result['members'])
+        base = reference.get(key)
+        if base is None:
+            continue
+        ratio = result['days_per_second'] / base['days_per_second']
+        status = "OK"
+        if ratio < 1 - tolerance:
+            status = "REGRESIÓN"
+            regressions += 1
+        elif ratio > 1 + tolerance:
+            status = "mejora"
+        print(f"  {key[0]:<22} regiones={key[1]:<6} miembros={key[2]:<6} x{ratio:6.2f}  {status}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la simulación SEIR y del avance diario")
+    parser.add_argument("--bench", action="append", choices=sorted(BENCHMARKS),
+                        help="benchmark a ejecutar (se puede repetir; por defecto todos)")
+    parser.add_argument("--quick", action="store_true", help="tamaños reducidos (hasta 300)")
+    parser.add_argument("--min-seconds", type=float, default=0.3, help="tiempo mínimo medido por caso")
+    parser.add_argument("--min-days", type=int, default=3, help="días mínimos simulados por caso")
+    parser.add_argument("--max-case-seconds", type=float, default=10.0,
+                        help="omite casos cuyo coste estimado supere este valor")
+    parser.add_argument("--output", help="guarda los resultados en este fichero JSON")
+    parser.add_argument("--compare", help="compara con un fichero de resultados anterior")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="pérdida relativa de rendimiento tolerada al comparar")
+    args = parser.parse_args()
+
+    region_sizes = QUICK_REGION_SIZES if args.quick else REGION_SIZES
+    member_sizes = QUICK_MEMBER_SIZES if args.quick else MEMBER_SIZES
+
+    results = []
+    for name in args.bench or list(BENCHMARKS):
+        results.extend(sweep(name, region_sizes, member_sizes, args))
+
+    if args.output:
+        payload = {
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.tolerance) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
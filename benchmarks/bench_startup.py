@@ -0,0 +1,114 @@
+"""Benchmark de arranque: tiempo hasta el primer fotograma del menú principal
+
+Lanza el juego en un proceso nuevo (como en un quiosco que reinicia), con el
+driver de vídeo "dummy" de SDL, y mide cuánto tarda en dibujarse el primer
+fotograma de MainMenu. También informa de qué módulos pesados se cargaron.
+
+Uso:
+    python benchmarks/bench_startup.py [--runs N] [--budget SEGUNDOS]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código que se ejecuta en el proceso hijo: reproduce el arranque de main()
+CHILD_CODE = r"""
+import time
+t_start = time.perf_counter()
+import sys
+import pygame
+t_pygame = time.perf_counter()
+before_game = set(sys.modules)
+import main as game_main
+from ui import MainMenu
+game_main.check_dependencies()
+t_imports = time.perf_counter()
+pygame.init()
+screen = pygame.display.set_mode((1200, 800))
+t_display = time.perf_counter()
+menu = MainMenu(screen)
+menu.update()
+menu.draw()
+pygame.display.flip()
+t_frame = time.perf_counter()
+print("FIRST_FRAME", flush=True)
+# Solo cuentan los módulos que carga el propio juego (pygame ya importa NumPy por su cuenta)
+heavy = [name for name in ("numpy", "matplotlib", "scipy", "charts")
+         if name in sys.modules and name not in before_game]
+print(json.dumps({
+    "pygame_import": t_pygame - t_start,
+    "game_imports": t_imports - t_pygame,
+    "display_init": t_display - t_imports,
+    "first_frame": t_frame - t_display,
+    "in_process_total": t_frame - t_start,
+    "heavy_modules": heavy,
+}))
+pygame.quit()
+"""
+
+
+def run_once():
+    """Ejecuta un arranque completo y devuelve sus tiempos"""
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    env["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", "import json\n" + CHILD_CODE],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True
+    )
+    first_frame = None
+    details = None
+    for line in process.stdout:
+        if line.startswith("FIRST_FRAME"):
+            first_frame = time.perf_counter() - started
+        elif line.startswith("{"):
+            details = json.loads(line)
+    process.wait()
+    if process.returncode != 0 or first_frame is None:
+        raise RuntimeError(f"El proceso de arranque falló (código {process.returncode})")
+
+    details["time_to_first_frame"] = first_frame
+    return details
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el tiempo hasta el primer fotograma del menú")
+    parser.add_argument("--runs", type=int, default=5, help="número de arranques a medir")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="tiempo máximo aceptable en segundos (falla si la mediana lo supera)")
+    parser.add_argument("--json", action="store_true", help="imprime los resultados en JSON")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    keys = ["time_to_first_frame", "pygame_import", "game_imports", "display_init", "first_frame"]
+    summary = {key: statistics.median(run[key] for run in runs) for key in keys}
+    summary["heavy_modules"] = sorted({name for run in runs for name in run["heavy_modules"]})
+    summary["runs"] = args.runs
+    summary["budget"] = args.budget
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"Arranques medidos: {args.runs}")
+        for key in keys:
+            print(f"  {key:<22} {summary[key] * 1000:8.1f} ms (mediana)")
+        heavy = ", ".join(summary["heavy_modules"]) or "ninguno"
+        print(f"  módulos pesados cargados por el juego: {heavy}")
+
+    if summary["time_to_first_frame"] > args.budget:
+        print(f"ERROR: el primer fotograma supera el presupuesto de {args.budget:.2f} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+"""Calibración: ajusta beta, sigma, gamma y mu de cada región a curvas observadas
+
+Lee un CSV con una fila por región y día:
+
+    region,day,cases,deaths[,population]
+
+con los casos y las muertes acumulados (o diarios, con --daily). Los días
+pueden tener huecos; el primero de cada región es el día 0 de la simulación,
+que empieza con tantos infectados como casos haya ese día. La población y la
+capacidad hospitalaria salen del escenario (o de la columna population).
+
+El modelo es el de Continent.step (Euler de un día, mortalidad que crece al
+saturarse los hospitales) reescrito con NumPy en simulate_batch, que simula
+de una vez un lote de juegos de parámetros. Cada región se ajusta así:
+
+    1. cribado: SCREEN_SIZE candidatos al azar evaluados en una sola llamada
+    2. los mejores --starts se refinan con scipy.optimize.least_squares sobre
+       los residuos logarítmicos de casos y muertes; el jacobiano por
+       diferencias finitas también se evalúa como un único lote
+    3. los arranques de todas las regiones se reparten en un ProcessPoolExecutor
+
+Los parámetros ajustados se escriben en formato de escenario (un mismo valor
+para las tres dificultades), listos para cargar con --scenario.
+
+Uso:
+    python calibration.py datos.csv [--scenario mundo] [--difficulty normal]
+                          [--starts 8] [--workers N] [--output escenario.json]
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.optimize import least_squares
+
+import scenarios
+from seir import Continent
+
+PARAMETERS = scenarios.PARAMETERS
+
+# Límites de búsqueda (beta, sigma, gamma, mu); el ajuste trabaja con sus logaritmos
+LOWER = np.array([0.01, 1 / 21, 1 / 42, 1e-5])
+UPPER = np.array([3.0, 1.0, 1.0, 0.5])
+
+SCREEN_SIZE = 512
+DEFAULT_STARTS = 8
+DEATH_WEIGHT = 1.0
+JACOBIAN_STEP = 1e-4
+
+
+class CalibrationError(ValueError):
+    """Los datos observados no sirven para calibrar"""
+
+
+class Observations:
+    """Curvas observadas de una región, con el día relativo al primero"""
+
+    def __init__(self, region, days, cases, deaths, population=None):
+        self.region = region
+        self.days = days
+        self.cases = cases
+        self.deaths = deaths
+        self.population = population
+
+    @property
+    def length(self):
+        """Días que hay que simular para cubrir todas las observaciones"""
+        return int(self.days[-1])
+
+
+class CalibrationResult:
+    """Mejor ajuste de una región"""
+
+    def __init__(self, region, parameters, cost, rmse, evaluations, starts):
+        self.region = region
+        self.parameters = parameters
+        self.cost = cost
+        self.rmse = rmse
+        self.evaluations = evaluations
+        self.starts = starts
+
+    @property
+    def r0(self):
+        """Número reproductivo básico de los parámetros ajustados"""
+        return self.parameters['beta'] / (self.parameters['gamma'] + self.parameters['mu'])
+
+
+# --- Motor por lotes ---
+
+def simulate_batch(params, population, hospital_capacity, initial_infected, days):
+    """Simula a la vez K juegos de parámetros con las ecuaciones de Continent.step
+
+    params es (K, 4) en el orden de PARAMETERS (sin modificadores ni
+    vacunación). Devuelve los casos acumulados (infectados iniciales más los
+    que pasan de E a I) y las muertes acumuladas, ambos (K, days + 1), con el
+    estado inicial en la columna 0.
+    """
+    params = np.atleast_2d(np.asarray(params, dtype='<f8'))
+    beta, sigma, gamma, mu = params.T
+    count = len(params)
+
+    S = np.full(count, float(population - initial_infected))
+    E = np.zeros(count)
+    I = np.full(count, float(initial_infected))
+    R = np.zeros(count)
+    D = np.zeros(count)
+    cases = np.empty((count, days + 1))
+    deaths = np.empty((count, days + 1))
+    cases[:, 0] = initial_infected
+    deaths[:, 0] = 0.0
+
+    for day in range(1, days + 1):
+        # Mortalidad efectiva: crece con la saturación hospitalaria
+        mu_eff = np.where(I > hospital_capacity,
+                          mu * (1 + (I - hospital_capacity) / hospital_capacity), mu)
+
+        N = S + E + I + R
+        N[N <= 0] = 1
+
+        infection = beta * S * I / N
+        incubation = sigma * E
+        dI = incubation - gamma * I - mu_eff * I
+        dR = gamma * I
+        dD = mu_eff * I
+
+        S = np.maximum(S - infection, 0)
+        E = np.maximum(E + (infection - incubation), 0)
+        I = np.maximum(I + dI, 0)
+        R = np.maximum(R + dR, 0)
+        D = D + dD
+
+        cases[:, day] = cases[:, day - 1] + incubation
+        deaths[:, day] = D
+    return cases, deaths
+
+
+class _Problem:
+    """Residuos de una región para lotes de parámetros (en escala logarítmica)"""
+
+    def __init__(self, observations, population, hospital_capacity, death_weight=DEATH_WEIGHT):
+        self.observations = observations
+        self.population = population
+        self.hospital_capacity = hospital_capacity
+        self.death_weight = death_weight
+        self.initial_infected = max(1.0, float(observations.cases[0]))
+        self.log_cases = np.log1p(observations.cases)
+        self.log_deaths = np.log1p(observations.deaths)
+        self.evaluations = 0
+
+    def residuals(self, log_params):
+        """Residuos (K, 2 x observaciones) de K juegos de parámetros en logaritmos"""
+        log_params = np.atleast_2d(log_params)
+        self.evaluations += len(log_params)
+        cases, deaths = simulate_batch(np.exp(log_params), self.population, self.hospital_capacity,
+                                       self.initial_infected, self.observations.length)
+        days = self.observations.days
+        return np.concatenate([
+            np.log1p(cases[:, days]) - self.log_cases,
+            self.death_weight * (np.log1p(deaths[:, days]) - self.log_deaths),
+        ], axis=1)
+
+    def cost(self, log_params):
+        return 0.5 * np.sum(self.residuals(log_params) ** 2, axis=1)
+
+    def fun(self, x):
+        return self.residuals(x)[0]
+
+    def jac(self, x):
+        """Jacobiano por diferencias hacia delante: el punto y sus 4 desplazamientos en un lote"""
+        batch = np.vstack([x, x + np.eye(len(x)) * JACOBIAN_STEP])
+        residuals = self.residuals(batch)
+        return ((residuals[1:] - residuals[0]) / JACOBIAN_STEP).T
+
+
+# --- Ajuste ---
+
+def _fit_start(task):
+    """Proceso del pool: refina un punto de partida con least_squares"""
+    observations, population, hospital_capacity, start = task
+    problem = _Problem(observations, population, hospital_capacity)
+    bounds = (np.log(LOWER), np.log(UPPER))
+    result = least_squares(problem.fun, start, jac=problem.jac, bounds=bounds,
+                           method="trf", x_scale="jac")
+    return observations.region, result.x, float(result.cost), problem.evaluations
+
+
+def screen_starts(problem, starts, rng, size=SCREEN_SIZE):
+    """Evalúa size candidatos log-uniformes en un solo lote y devuelve los mejores"""
+    low, high = np.log(LOWER), np.log(UPPER)
+    candidates = low + (high - low) * rng.random((size, len(PARAMETERS)))
+    cost = problem.cost(candidates)
+    return candidates[np.argsort(cost)[:starts]]
+
+
+def calibrate(observations, populations, hospital_capacities, starts=DEFAULT_STARTS,
+              workers=None, seed=0):
+    """Ajusta cada región; devuelve {región: CalibrationResult}
+
+    observations es {región: Observations}; populations y
+    hospital_capacities, {región: valor}. Con workers=1 no se abre ningún
+    proceso.
+    """
+    rng = np.random.default_rng(seed)
+    tasks = []
+    screened = {}
+    for region, observed in observations.items():
+        problem = _Problem(observed, populations[region], hospital_capacities[region])
+        for start in screen_starts(problem, starts, rng):
+            tasks.append((observed, populations[region], hospital_capacities[region], start))
+        screened[region] = problem.evaluations
+
+    if workers == 1:
+        fits = [_fit_start(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fits = list(pool.map(_fit_start, tasks))
+
+    results = {}
+    for region, observed in observations.items():
+        region_fits = [fit for fit in fits if fit[0] == region]
+        _, x, cost, _ = min(region_fits, key=lambda fit: fit[2])
+        results[region] = CalibrationResult(
+            region, dict(zip(PARAMETERS, np.exp(x).tolist())), cost,
+            math.sqrt(cost / len(observed.days)),
+            screened[region] + sum(fit[3] for fit in region_fits), len(region_fits),
+        )
+    return results
+
+
+# --- Datos ---
+
+def read_observations(path, daily=False):
+    """Lee el CSV de casos y muertes; devuelve {región: Observations}"""
+    rows = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = {'region', 'day', 'cases', 'deaths'} - set(reader.fieldnames or ())
+        if missing:
+            raise CalibrationError(f"{path}: faltan las columnas {', '.join(sorted(missing))}")
+        for line, row in enumerate(reader, start=2):
+            try:
+                values = (int(row['day']), float(row['cases']), float(row['deaths']),
+                          int(float(row['population'])) if row.get('population') else None)
+            except ValueError:
+                raise CalibrationError(f"{path}, línea {line}: valor no numérico") from None
+            rows.setdefault(row['region'], []).append(values)
+
+    observations = {}
+    for region, values in rows.items():
+        values.sort()
+        days = np.array([value[0] for value in values])
+        if len(days) < 3:
+            raise CalibrationError(f"{path}: la región {region!r} necesita al menos tres días")
+        if np.any(np.diff(days) == 0):
+            raise CalibrationError(f"{path}: la región {region!r} tiene días repetidos")
+        cases = np.array([value[1] for value in values])
+        deaths = np.array([value[2] for value in values])
+        if daily:
+            cases, deaths = np.cumsum(cases), np.cumsum(deaths)
+        if np.any(cases < 0) or np.any(deaths < 0):
+            raise CalibrationError(f"{path}: la región {region!r} tiene valores negativos")
+        populations = {value[3] for value in values} - {None}
+        observations[region] = Observations(region, days - days[0], cases, deaths,
+                                            populations.pop() if populations else None)
+    return observations
+
+
+def region_sizes(observations, scenario, difficulty, require_known=False):
+    """Población y capacidad hospitalaria de cada región (del CSV o del escenario)
+
+    Con require_known todas las regiones deben estar en el escenario, aunque
+    el CSV traiga su población (para escribir después el escenario ajustado).
+    """
+    configs = {config['name']: config for config in scenario.region_configs(difficulty)}
+    if require_known:
+        _check_known(observations, configs, scenario)
+    populations = {}
+    capacities = {}
+    for region, observed in observations.items():
+        population = observed.population
+        if population is None:
+            if region not in configs:
+                raise CalibrationError(f"La región {region!r} no está en el escenario "
+                                       f"{scenario.name!r} y el CSV no trae su población")
+            population = configs[region]['population']
+        populations[region] = population
+        # La capacidad depende de la dificultad igual que en el juego
+        capacities[region] = Continent(region, population, 0, difficulty).hospital_capacity
+    return populations, capacities
+
+
+def _check_known(regions, names, scenario):
+    """Error si alguna región no está en el escenario"""
+    missing = [region for region in regions if region not in names]
+    if missing:
+        raise CalibrationError(f"Regiones que no están en el escenario {scenario.name!r}: "
+                               f"{', '.join(missing)}")
+
+
+def write_scenario(scenario, results, output):
+    """Copia el JSON del escenario con los parámetros ajustados y lo valida"""
+    with open(scenarios.scenario_path(scenario.source or scenarios.DEFAULT_SCENARIO),
+              encoding="utf-8") as f:
+        data = json.load(f)
+    # Una región ajustada que no está en el escenario se perdería sin avisar
+    _check_known(results, {region['name'] for region in data['regions']}, scenario)
+    for region in data['regions']:
+        result = results.get(region['name'])
+        if result is not None:
+            region['parameters'] = {field: round(value, 6) for field, value in result.parameters.items()}
+    scenarios.parse_scenario(data, output)
+
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ajusta los parámetros SEIR de cada región a casos y muertes observados")
+    parser.add_argument("data", help="CSV con region,day,cases,deaths[,population]")
+    parser.add_argument("--daily", action="store_true", help="casos y muertes diarios en lugar de acumulados")
+    parser.add_argument("--scenario", default=None, help="escenario con las poblaciones (por defecto, mundo)")
+    parser.add_argument("--difficulty", default="normal", choices=["easy", "normal", "expert"])
+    parser.add_argument("--starts", type=int, default=DEFAULT_STARTS, help="arranques por región")
+    parser.add_argument("--workers", type=int, default=None, help="procesos para los arranques")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="escenario JSON de salida con los parámetros ajustados")
+    args = parser.parse_args()
+
+    try:
+        scenario = scenarios.load_scenario(args.scenario)
+        observations = read_observations(args.data, args.daily)
+        populations, capacities = region_sizes(observations, scenario, args.difficulty,
+                                               require_known=bool(args.output))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    started = time.perf_counter()
+    results = calibrate(observations, populations, capacities, args.starts, args.workers, args.seed)
+    elapsed = time.perf_counter() - started
+
+    for region, result in results.items():
+        values = ", ".join(f"{field}={value:.4g}" for field, value in result.parameters.items())
+        print(f"{region}: {values} (R0 {result.r0:.2f}, error log {result.rmse:.3f}, "
+              f"{result.evaluations} simulaciones)")
+    print(f"{len(results)} regiones ajustadas en {elapsed:.2f} s")
+
+    if args.output:
+        try:
+            write_scenario(scenario, results, args.output)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {e}")
+            return 1
+        print(f"Escenario escrito en {args.output}")
+    else:
+        fragment = [{'name': region, 'parameters': {field: round(value, 6)
+                                                    for field, value in result.parameters.items()}}
+                    for region, result in results.items()]
+        print(json.dumps({'regions': fragment}, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
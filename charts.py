@@ -0,0 +1,431 @@
+import pygame
+import numpy as np
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# Paleta usada por los gráficos (la misma que tenía la versión con matplotlib)
+FIGURE_BG = (26, 26, 46)
+AXES_BG = (22, 33, 62)
+AXES_BORDER = (130, 130, 150)
+GRID_COLOR = (55, 65, 95)
+TEXT_COLOR = (255, 255, 255)
+
+INFECTED_COLOR = (255, 107, 107)
+RECOVERED_COLOR = (78, 205, 196)
+DEATHS_COLOR = (255, 71, 87)
+ECONOMY_COLOR = (55, 66, 250)
+MORALE_COLOR = (38, 208, 206)
+GOOD_COLOR = (46, 213, 115)
+BAD_COLOR = (255, 71, 87)
+
+
+def format_value(value):
+    """Formatea un número de forma compacta para las etiquetas de los ejes"""
+    value = float(value)
+    if abs(value) >= 1_000_000:
+        return f"{value / 1_000_000:.1f}M"
+    if abs(value) >= 1_000:
+        return f"{value / 1_000:.0f}k"
+    if value == int(value):
+        return f"{int(value)}"
+    return f"{value:.1f}"
+
+
+class SeriesBuffer:
+    """Serie numérica que crece de forma incremental sobre un array de NumPy"""
+
+    def __init__(self, capacity=64):
+        self._data = np.zeros(capacity, dtype=np.float64)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        if self._size == len(self._data):
+            grown = np.zeros(len(self._data) * 2, dtype=np.float64)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        """Añade varios valores de una vez (un array o cualquier secuencia)"""
+        end = self._size + len(values)
+        if end > len(self._data):
+            grown = np.zeros(max(end, len(self._data) * 2), dtype=np.float64)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:end] = values
+        self._size = end
+
+    def clear(self):
+        self._size = 0
+
+    @property
+    def values(self):
+        """Vista (sin copia) de los valores almacenados"""
+        return self._data[:self._size]
+
+
+class ChartPanel:
+    """Un subgráfico: ejes, rejilla, etiquetas y series dibujadas con pygame"""
+
+    def __init__(self, title, ylabel, ylim=None, legend=None, reference_lines=None):
+        self.title = title
+        self.ylabel = ylabel
+        self.ylim = ylim
+        self.legend = legend or []  # [(texto, color)]
+        self.reference_lines = reference_lines or []  # [(valor, color, texto)]
+        self.series = []  # [(tipo, valores, color, alpha)]
+
+    def clear_series(self):
+        self.series = []
+
+    def add_line(self, values, color, width=3, alpha=255):
+        self.series.append(("line", values, color, alpha, width))
+
+    def add_area(self, values, color, alpha=180):
+        self.series.append(("area", values, color, alpha, 0))
+
+    def add_bars(self, values, color, alpha=205):
+        self.series.append(("bar", values, color, alpha, 0))
+
+    def _value_range(self):
+        """Calcula el rango vertical a partir de las series"""
+        if self.ylim is not None:
+            return self.ylim
+        high = 0.0
+        for _, values, _, _, _ in self.series:
+            if len(values):
+                high = max(high, float(values.max()))
+        if high <= 0:
+            high = 1.0
+        return (0.0, high * 1.05)
+
+    def draw(self, surface, rect, fonts):
+        """Dibuja el subgráfico completo dentro de rect"""
+        font_title, font_label, font_tick = fonts
+
+        # Título
+        title_surface = font_title.render(self.title, True, TEXT_COLOR)
+        surface.blit(title_surface, title_surface.get_rect(midtop=(rect.centerx, rect.y + 4)))
+
+        # Área de trazado (deja espacio para etiquetas)
+        plot_rect = pygame.Rect(rect.x + 62, rect.y + 34, rect.width - 76, rect.height - 70)
+        if plot_rect.width <= 2 or plot_rect.height <= 2:
+            return
+        pygame.draw.rect(surface, AXES_BG, plot_rect)
+
+        lo, hi = self._value_range()
+        count = max((len(s[1]) for s in self.series), default=0)
+
+        self._draw_grid(surface, plot_rect, lo, hi, count, font_tick)
+
+        clip = surface.get_clip()
+        surface.set_clip(plot_rect)
+        for kind, values, color, alpha, width in self.series:
+            if len(values) == 0:
+                continue
+            if kind == "bar":
+                draw_bar_series(surface, plot_rect, values, color, (lo, hi), alpha)
+            elif kind == "area":
+                draw_area_series(surface, plot_rect, values, color, (lo, hi), alpha)
+            else:
+                draw_line_series(surface, plot_rect, values, color, (lo, hi), width)
+
+        for value, color, _ in self.reference_lines:
+            y = _scale_y(np.array([value], dtype=np.float64), plot_rect, lo, hi)[0]
+            _draw_dashed_hline(surface, color, plot_rect.x, plot_rect.right, int(y))
+        surface.set_clip(clip)
+
+        pygame.draw.rect(surface, AXES_BORDER, plot_rect, 1)
+
+        # Etiqueta del eje Y (rotada) y del eje X
+        ylabel_surface = pygame.transform.rotate(font_label.render(self.ylabel, True, TEXT_COLOR), 90)
+        surface.blit(ylabel_surface, ylabel_surface.get_rect(midleft=(rect.x + 2, plot_rect.centery)))
+        xlabel_surface = font_label.render("Días", True, TEXT_COLOR)
+        surface.blit(xlabel_surface, xlabel_surface.get_rect(midtop=(plot_rect.centerx, plot_rect.bottom + 18)))
+
+        self._draw_legend(surface, plot_rect, font_tick)
+
+    def _draw_grid(self, surface, plot_rect, lo, hi, count, font_tick):
+        """Dibuja la rejilla y las marcas de los ejes"""
+        for i in range(5):
+            value = lo + (hi - lo) * i / 4
+            y = plot_rect.bottom - int(plot_rect.height * i / 4)
+            pygame.draw.line(surface, GRID_COLOR, (plot_rect.x, y), (plot_rect.right - 1, y))
+            tick = font_tick.render(format_value(value), True, TEXT_COLOR)
+            surface.blit(tick, tick.get_rect(midright=(plot_rect.x - 4, y)))
+
+        last_day = max(count - 1, 1)
+        step = max(1, int(np.ceil(last_day / 6)))
+        for day in range(0, last_day + 1, step):
+            x = plot_rect.x + int(plot_rect.width * day / last_day)
+            pygame.draw.line(surface, GRID_COLOR, (x, plot_rect.y), (x, plot_rect.bottom - 1))
+            tick = font_tick.render(str(day), True, TEXT_COLOR)
+            surface.blit(tick, tick.get_rect(midtop=(x, plot_rect.bottom + 3)))
+
+    def _draw_legend(self, surface, plot_rect, font_tick):
+        """Dibuja la leyenda en la esquina superior derecha"""
+        if not self.legend:
+            return
+        width = max(font_tick.size(text)[0] for text, _ in self.legend) + 26
+        height = len(self.legend) * 16 + 6
+        legend_rect = pygame.Rect(plot_rect.right - width - 6, plot_rect.y + 6, width, height)
+        pygame.draw.rect(surface, FIGURE_BG, legend_rect)
+        pygame.draw.rect(surface, AXES_BORDER, legend_rect, 1)
+        y = legend_rect.y + 4
+        for text, color in self.legend:
+            pygame.draw.rect(surface, color, (legend_rect.x + 5, y + 2, 12, 8))
+            surface.blit(font_tick.render(text, True, TEXT_COLOR), (legend_rect.x + 21, y))
+            y += 16
+
+
+def _scale_x(count, plot_rect):
+    """Posiciones horizontales en píxeles para count puntos"""
+    if count <= 1:
+        return np.full(count, float(plot_rect.x))
+    return plot_rect.x + np.arange(count, dtype=np.float64) * ((plot_rect.width - 1) / (count - 1))
+
+
+def _scale_y(values, plot_rect, lo, hi):
+    """Convierte valores a posiciones verticales en píxeles"""
+    span = hi - lo if hi > lo else 1.0
+    return plot_rect.bottom - 1 - (values - lo) / span * (plot_rect.height - 1)
+
+
+def _decimate(values, max_points):
+    """Reduce el número de puntos cuando hay más que píxeles disponibles"""
+    if len(values) <= max_points:
+        return np.arange(len(values)), values
+    indices = np.linspace(0, len(values) - 1, max_points).astype(np.int64)
+    return indices, values[indices]
+
+
+def draw_line_series(surface, plot_rect, values, color, y_range, width=2):
+    """Dibuja una serie como línea poligonal"""
+    if len(values) < 2:
+        return
+    indices, sampled = _decimate(values, plot_rect.width)
+    xs = _scale_x(len(values), plot_rect)[indices]
+    ys = _scale_y(sampled, plot_rect, *y_range)
+    points = np.column_stack((xs, ys)).tolist()
+    pygame.draw.lines(surface, color, False, points, width)
+
+
+def draw_area_series(surface, plot_rect, values, color, y_range, alpha=180):
+    """Dibuja una serie como área rellena semitransparente"""
+    if len(values) < 2:
+        return
+    indices, sampled = _decimate(values, plot_rect.width)
+    xs = _scale_x(len(values), plot_rect)[indices] - plot_rect.x
+    ys = _scale_y(sampled, plot_rect, *y_range) - plot_rect.y
+    baseline = plot_rect.height - 1
+    points = np.column_stack((xs, ys)).tolist()
+    points.append((xs[-1], baseline))
+    points.append((xs[0], baseline))
+
+    layer = pygame.Surface(plot_rect.size, pygame.SRCALPHA)
+    pygame.draw.polygon(layer, (*color, alpha), points)
+    pygame.draw.lines(layer, (*color, 255), False, points[:-2], 2)
+    surface.blit(layer, plot_rect.topleft)
+
+
+def draw_bar_series(surface, plot_rect, values, color, y_range, alpha=205):
+    """Dibuja una serie como barras verticales"""
+    count = len(values)
+    if count == 0:
+        return
+    lo, _ = y_range
+    xs = _scale_x(count, plot_rect)
+    tops = _scale_y(values, plot_rect, *y_range)
+    base = _scale_y(np.array([max(lo, 0.0)]), plot_rect, *y_range)[0]
+    bar_width = max(1, int(plot_rect.width / max(count, 1) * 0.8))
+
+    layer = pygame.Surface(plot_rect.size, pygame.SRCALPHA)
+    fill = (*color, alpha)
+    for x, top in zip((xs - plot_rect.x - bar_width / 2).astype(np.int64).tolist(),
+                      (tops - plot_rect.y).astype(np.int64).tolist()):
+        height = int(base - plot_rect.y) - top
+        if height > 0:
+            layer.fill(fill, (x, top, bar_width, height))
+    surface.blit(layer, plot_rect.topleft)
+
+
+def _draw_dashed_hline(surface, color, x_start, x_end, y, dash=8, gap=5):
+    """Dibuja una línea horizontal discontinua"""
+    for x in range(x_start, x_end, dash + gap):
+        pygame.draw.line(surface, color, (x, y), (min(x + dash, x_end - 1), y), 2)
+
+
+# Copia inmutable de las series que se entrega al hilo de dibujo
+ChartSnapshot = namedtuple(
+    "ChartSnapshot",
+    ["infected", "recovered", "daily_deaths", "economy", "morale"]
+)
+
+
+class StatsChart:
+    """Gráficos de estadísticas de la partida dibujados directamente con pygame"""
+
+    def __init__(self):
+        # Fuentes propias (no las del registro compartido): se usan desde el hilo de dibujo
+        self.font_title = pygame.font.Font(None, 26)
+        self.font_label = pygame.font.Font(None, 20)
+        self.font_tick = pygame.font.Font(None, 17)
+
+        # Series acumuladas día a día
+        self.infected = SeriesBuffer()
+        self.recovered = SeriesBuffer()
+        self.deaths = SeriesBuffer()
+        self.daily_deaths = SeriesBuffer()
+        self.economy = SeriesBuffer()
+        self.morale = SeriesBuffer()
+
+        self.panels = [
+            ChartPanel("Evolución de Casos", "Número de Personas",
+                       legend=[("Casos Activos", INFECTED_COLOR), ("Recuperados", RECOVERED_COLOR)]),
+            ChartPanel("Muertes por Día", "Muertes Diarias"),
+            ChartPanel("Estado de la Economía Global", "Economía (%)", ylim=(0, 100),
+                       legend=[("Buena", GOOD_COLOR), ("Crisis", BAD_COLOR)],
+                       reference_lines=[(70, GOOD_COLOR, "Buena"), (30, BAD_COLOR, "Crisis")]),
+            ChartPanel("Moral de la Población", "Moral (%)", ylim=(0, 100),
+                       legend=[("Alta", GOOD_COLOR), ("Baja", BAD_COLOR)],
+                       reference_lines=[(70, GOOD_COLOR, "Alta"), (30, BAD_COLOR, "Baja")]),
+        ]
+
+    def __len__(self):
+        return len(self.infected)
+
+    def append_day(self, global_stats):
+        """Añade las estadísticas globales de un día"""
+        previous_deaths = self.deaths.values[-1] if len(self.deaths) else 0
+        self.infected.append(global_stats['infected'])
+        self.recovered.append(global_stats['recovered'])
+        self.deaths.append(global_stats['deaths'])
+        self.daily_deaths.append(global_stats['deaths'] - previous_deaths)
+        self.economy.append(global_stats['economy'])
+        self.morale.append(global_stats['morale'])
+
+    def clear(self):
+        """Vacía todas las series"""
+        for buffer in (self.infected, self.recovered, self.deaths,
+                       self.daily_deaths, self.economy, self.morale):
+            buffer.clear()
+
+    def sync(self, history):
+        """Incorpora solo los días del historial que aún no se han añadido"""
+        if len(history) < len(self):
+            # El historial se reinició (nueva partida o carga): reconstruir
+            self.clear()
+
+        series = getattr(history, 'global_series', None)
+        if series is not None:
+            # TrajectoryHistory: copiar los días nuevos directamente de las vistas
+            start = len(self)
+            previous_deaths = self.deaths.values[-1] if start else 0
+            deaths = series('deaths')[start:]
+            self.infected.extend(series('infected')[start:])
+            self.recovered.extend(series('recovered')[start:])
+            self.deaths.extend(deaths)
+            self.daily_deaths.extend(np.diff(deaths, prepend=previous_deaths))
+            self.economy.extend(series('economy')[start:])
+            self.morale.extend(series('morale')[start:])
+            return
+
+        for day_data in history[len(self):]:
+            self.append_day(day_data['global'])
+
+    def snapshot(self):
+        """Copia de solo lectura de las series actuales"""
+        arrays = []
+        for buffer in (self.infected, self.recovered, self.daily_deaths, self.economy, self.morale):
+            values = buffer.values.copy()
+            values.flags.writeable = False
+            arrays.append(values)
+        return ChartSnapshot(*arrays)
+
+    def render(self, size, snapshot=None):
+        """Dibuja los cuatro gráficos en una superficie del tamaño indicado"""
+        if snapshot is None:
+            snapshot = self.snapshot()
+
+        surface = pygame.Surface(size)
+        surface.fill(FIGURE_BG)
+
+        cases, deaths, economy, morale = self.panels
+        for panel in self.panels:
+            panel.clear_series()
+        cases.add_area(snapshot.infected, INFECTED_COLOR)
+        cases.add_area(snapshot.recovered, RECOVERED_COLOR)
+        deaths.add_bars(snapshot.daily_deaths, DEATHS_COLOR)
+        economy.add_area(snapshot.economy, ECONOMY_COLOR, alpha=75)
+        economy.add_line(snapshot.economy, ECONOMY_COLOR)
+        morale.add_area(snapshot.morale, MORALE_COLOR, alpha=75)
+        morale.add_line(snapshot.morale, MORALE_COLOR)
+
+        width, height = size
+        cell_w, cell_h = width // 2, height // 2
+        fonts = (self.font_title, self.font_label, self.font_tick)
+        for i, panel in enumerate(self.panels):
+            cell = pygame.Rect((i % 2) * cell_w + 6, (i // 2) * cell_h + 6, cell_w - 12, cell_h - 12)
+            panel.draw(surface, cell, fonts)
+
+        return surface
+
+
+_render_executor = None
+
+
+def _get_render_executor():
+    """Hilo único compartido para dibujar gráficos fuera del bucle principal"""
+    global _render_executor
+    if _render_executor is None:
+        _render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="charts")
+    return _render_executor
+
+
+class ChartService:
+    """Dibuja los gráficos en segundo plano con doble búfer de superficies
+
+    El hilo principal toma una instantánea inmutable de las series y sigue
+    mostrando la última superficie completa (front) mientras el hilo de dibujo
+    prepara la siguiente. Si llegan varias peticiones durante un dibujo solo
+    se conserva la más reciente.
+    """
+
+    def __init__(self, chart):
+        self.chart = chart
+        self.front = None
+        self._future = None
+        self._pending = None
+
+    @property
+    def busy(self):
+        """Indica si hay un dibujo en curso"""
+        return self._future is not None
+
+    def request(self, history, size):
+        """Solicita un nuevo dibujo con el estado actual del historial"""
+        self.chart.sync(history)
+        job = (tuple(size), self.chart.snapshot())
+        if self._future is None:
+            self._submit(job)
+        else:
+            self._pending = job
+
+    def _submit(self, job):
+        size, snapshot = job
+        self._future = _get_render_executor().submit(self.chart.render, size, snapshot)
+
+    def poll(self):
+        """Recoge el dibujo terminado (si lo hay) y devuelve la superficie visible"""
+        if self._future is not None and self._future.done():
+            future, self._future = self._future, None
+            # La superficie terminada pasa a ser la visible sin copias
+            self.front = future.result()
+            if self._pending is not None:
+                job, self._pending = self._pending, None
+                self._submit(job)
+        return self.front
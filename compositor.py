@@ -0,0 +1,111 @@
+import pygame
+
+# Valor inicial de la clave de estado: distinto de cualquier clave real
+_UNSET = object()
+
+
+class Widget:
+    """Elemento de pantalla con su área, su clave de estado y su función de dibujo
+
+    rect puede ser un Rect fijo o una función que lo devuelva (o None si el
+    elemento no se muestra). state_key devuelve un valor comparable que solo
+    cambia cuando el aspecto del elemento cambia.
+    """
+
+    def __init__(self, name, rect, state_key, draw):
+        self.name = name
+        self.rect = rect
+        self.state_key = state_key
+        self.draw = draw
+        self.last_key = _UNSET
+        self.last_rect = None
+
+    def current_rect(self):
+        """Área que ocupa el elemento en este fotograma"""
+        rect = self.rect() if callable(self.rect) else self.rect
+        return pygame.Rect(rect) if rect else None
+
+
+class Compositor:
+    """Redibuja solo las zonas de pantalla cuyos elementos han cambiado
+
+    Los elementos se registran en orden de dibujo (de abajo a arriba). En cada
+    fotograma se comparan sus claves de estado con las del anterior; las áreas
+    de los que han cambiado se rellenan con el fondo y se vuelven a dibujar
+    todos los elementos que las tocan, recortando al área sucia. compose()
+    devuelve los rectángulos que hay que pasar a pygame.display.update().
+    """
+
+    def __init__(self, screen, background=(10, 10, 30)):
+        self.screen = screen
+        self.background = background
+        self.widgets = []
+        self.full_redraw = True
+
+    def add(self, name, rect, state_key, draw):
+        """Registra un elemento encima de los ya registrados"""
+        widget = Widget(name, rect, state_key, draw)
+        self.widgets.append(widget)
+        return widget
+
+    def invalidate(self):
+        """Fuerza un redibujado completo en el siguiente fotograma"""
+        self.full_redraw = True
+
+    def compose(self):
+        """Dibuja lo que ha cambiado y devuelve la lista de áreas actualizadas"""
+        if self.full_redraw:
+            return self._compose_full()
+
+        dirty = []
+        for widget in self.widgets:
+            rect = widget.current_rect()
+            key = widget.state_key()
+            if key != widget.last_key or rect != widget.last_rect:
+                # Hay que borrar la posición anterior y dibujar la nueva
+                if widget.last_rect:
+                    dirty.append(widget.last_rect)
+                if rect:
+                    dirty.append(rect)
+                widget.last_key = key
+                widget.last_rect = rect
+
+        dirty = merge_rects(dirty)
+        for area in dirty:
+            self.screen.set_clip(area)
+            self.screen.fill(self.background, area)
+            for widget in self.widgets:
+                if widget.last_rect and widget.last_rect.colliderect(area):
+                    widget.draw()
+        self.screen.set_clip(None)
+
+        return dirty
+
+    def _compose_full(self):
+        """Redibuja toda la pantalla y memoriza el estado de cada elemento"""
+        self.screen.fill(self.background)
+        for widget in self.widgets:
+            widget.last_key = widget.state_key()
+            widget.last_rect = widget.current_rect()
+            if widget.last_rect:
+                widget.draw()
+        self.full_redraw = False
+        return [self.screen.get_rect()]
+
+
+def merge_rects(rects):
+    """Une los rectángulos que se solapan para no redibujar dos veces la misma zona"""
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        changed = True
+        while changed:
+            changed = False
+            for other in merged:
+                if rect.colliderect(other):
+                    merged.remove(other)
+                    rect.union_ip(other)
+                    changed = True
+                    break
+        merged.append(rect)
+    return merged
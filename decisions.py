@@ -1,5 +1,9 @@
 import random
 import pygame
+from render_cache import get_font, render_text
+
+# Decisiones que se aplican a una sola región (la interfaz pide elegirla)
+REGIONAL_DECISIONS = ("invest_hospitals", "medicine_distribution", "economic_stimulus")
 
 class Decision:
     def __init__(self, id, name, description, cost_economy=0, cost_morale=0, 
@@ -16,8 +20,9 @@ class Decision:
         self.last_used = -999
 
 class DecisionManager:
-    def __init__(self, difficulty="normal"):
+    def __init__(self, difficulty="normal", rng=None):
         self.difficulty = difficulty
+        self.rng = rng or random  # generador aleatorio (por defecto el global)
         self.decisions_available = []
         self.decisions_history = []
         self.decisions_used_today = 0
@@ -156,7 +161,7 @@ class DecisionManager:
                 break
             
             # Selección ponderada
-            rand_val = random.random() * total_weight
+            rand_val = self.rng.random() * total_weight
             cumulative = 0
             
             for i, weight in enumerate(temp_weights):
@@ -254,30 +259,50 @@ class DecisionManager:
                 continent.morale = min(100, continent.morale + 12)
 
 class DecisionUI:
-    def __init__(self, screen):
+    def __init__(self, screen, continent_names=None):
         self.screen = screen
-        self.font = pygame.font.Font(None, 22)
-        self.font_small = pygame.font.Font(None, 18)
-        self.font_title = pygame.font.Font(None, 26)
+        
+        # Regiones del escenario que se ofrecen en las decisiones regionales
+        self.continent_names = list(continent_names or ["América", "Europa-África", "Asia-Oceanía"])
+        self.font = get_font(22)
+        self.font_small = get_font(18)
+        self.font_title = get_font(26)
         
         self.decision_buttons = []
         self.continent_buttons = []
         self.current_decisions = []
         self.selected_decision = None
         self.show_continent_selection = False
+        self.selection_rect = None
         
         # Área de decisiones
         self.decisions_rect = pygame.Rect(520, 200, 400, 450)
+        self.panel_surface = None
+        self.version = 0
     
     def update_decisions(self, decisions, decisions_used_today, max_decisions):
-        """Actualiza las decisiones disponibles"""
-        self.current_decisions = decisions
-        self.decision_buttons = []
+        """Actualiza las decisiones disponibles
+        
+        Solo se colocan los botones: sus superficies se renderizan al dibujarlos,
+        y si ni las decisiones ni el contador cambian se conservan las de antes.
+        """
+        decisions_remaining = max_decisions - decisions_used_today
+        if self.show_continent_selection:
+            self.show_continent_selection = False
+            self.version += 1
         self.selected_decision = None
-        self.show_continent_selection = False
+        if (decisions_remaining == getattr(self, 'decisions_remaining', None) and
+                len(decisions) == len(self.current_decisions) and
+                all(a is b for a, b in zip(decisions, self.current_decisions))):
+            return
+        
+        self.current_decisions = list(decisions)
+        self.decision_buttons = []
         
         # Información de decisiones disponibles
-        self.decisions_remaining = max_decisions - decisions_used_today
+        self.decisions_remaining = decisions_remaining
+        self.panel_surface = None
+        self.version += 1
         
         # Crear botones para cada decisión
         button_height = 90
@@ -291,10 +316,13 @@ class DecisionUI:
             button = pygame.Rect(self.decisions_rect.x + 10, button_y, 
                                self.decisions_rect.width - 20, button_height)
             
+            # Superficies normal y con el cursor encima: se renderizan al dibujar
             self.decision_buttons.append({
                 'rect': button,
                 'decision': decision,
-                'hovered': False
+                'hovered': False,
+                'surface': None,
+                'hover_surface': None
             })
     
     def handle_event(self, event):
@@ -339,23 +367,37 @@ class DecisionUI:
         
         return None
     
+    def state_key(self):
+        """Clave que cambia cuando el panel de decisiones debe redibujarse"""
+        return self.version, tuple(button_info['hovered'] for button_info in self.decision_buttons)
+    
     def _requires_continent_selection(self, decision):
         """Determina si una decisión requiere seleccionar continente"""
-        regional_decisions = ["invest_hospitals", "medicine_distribution", "economic_stimulus"]
-        return decision.id in regional_decisions
+        return decision.id in REGIONAL_DECISIONS
     
     def _create_continent_buttons(self):
-        """Crea botones para seleccionar continente"""
+        """Crea botones para seleccionar continente (en varias filas si hay muchas regiones)"""
         self.continent_buttons = []
-        continent_names = ["América", "Europa-África", "Asia-Oceanía"]
+        continent_names = self.continent_names
+        screen_width, screen_height = self.screen.get_size()
+        
+        button_width, button_height, columns = self._continent_grid(len(continent_names))
+        rows = -(-len(continent_names) // columns)
+        
+        # Panel de 600 x 200 con una fila; con más filas crece hasta que caben todas
+        panel_width = max(600, columns * (button_width + 10) + 30)
+        panel_height = 200 if rows == 1 else 100 + rows * (button_height + 10)
+        self.selection_rect = pygame.Rect((screen_width - panel_width) // 2,
+                                          (screen_height - panel_height) // 2,
+                                          panel_width, panel_height)
         
-        button_width = 180
-        start_x = (self.screen.get_width() - len(continent_names) * button_width - 20) // 2
+        start_x = (screen_width - columns * (button_width + 10) + 10) // 2
+        start_y = 350 if rows == 1 else self.selection_rect.y + 90
         
         for i, name in enumerate(continent_names):
-            button_x = start_x + i * (button_width + 10)
-            button_y = 350
-            button = pygame.Rect(button_x, button_y, button_width, 60)
+            button_x = start_x + (i % columns) * (button_width + 10)
+            button_y = start_y + (i // columns) * (button_height + 10)
+            button = pygame.Rect(button_x, button_y, button_width, button_height)
             
             self.continent_buttons.append({
                 'rect': button,
@@ -364,6 +406,20 @@ class DecisionUI:
                 'hovered': False
             })
     
+    def _continent_grid(self, count):
+        """Ancho, alto y columnas de los botones de región para que quepan en pantalla"""
+        if count <= 3:
+            return 180, 60, max(1, count)
+        
+        available_height = self.screen.get_height() - 220
+        for button_width in (180, 140, 110):
+            columns = min(count, max(1, (self.screen.get_width() - 60) // (button_width + 10)))
+            rows = -(-count // columns)
+            button_height = min(60, available_height // rows - 10)
+            if button_height >= 24:
+                break
+        return button_width, max(16, button_height), columns
+    
     def draw(self):
         """Dibuja la interfaz de decisiones"""
         if self.show_continent_selection:
@@ -373,15 +429,28 @@ class DecisionUI:
     
     def _draw_decision_panel(self):
         """Dibuja el panel principal de decisiones"""
+        # Fondo, título y contador: se renderizan la primera vez tras update_decisions
+        if self.panel_surface is None:
+            self.panel_surface = self._render_decision_panel()
+        self.screen.blit(self.panel_surface, self.decisions_rect)
+        
+        for button_info in self.decision_buttons:
+            self._draw_decision_button(button_info)
+    
+    def _render_decision_panel(self):
+        """Renderiza el fondo del panel de decisiones en su propia superficie"""
+        surface = pygame.Surface(self.decisions_rect.size)
+        panel_rect = surface.get_rect()
+        
         # Fondo del panel
-        pygame.draw.rect(self.screen, (25, 25, 45), self.decisions_rect)
-        pygame.draw.rect(self.screen, (100, 100, 150), self.decisions_rect, 2)
+        pygame.draw.rect(surface, (25, 25, 45), panel_rect)
+        pygame.draw.rect(surface, (100, 100, 150), panel_rect, 2)
         
         # Título
-        title_text = self.font_title.render("Decisiones Políticas", True, (255, 255, 255))
-        title_x = self.decisions_rect.x + 10
-        title_y = self.decisions_rect.y + 10
-        self.screen.blit(title_text, (title_x, title_y))
+        title_text = render_text(self.font_title, "Decisiones Políticas", (255, 255, 255))
+        title_x = 10
+        title_y = 10
+        surface.blit(title_text, (title_x, title_y))
         
         # Contador de decisiones restantes
         if hasattr(self, 'decisions_remaining'):
@@ -392,26 +461,30 @@ class DecisionUI:
                 remaining_text = "Sin decisiones disponibles hoy"
                 color = (255, 150, 150)
             
-            remaining_surface = self.font_small.render(remaining_text, True, color)
-            self.screen.blit(remaining_surface, (title_x, title_y + 30))
+            remaining_surface = render_text(self.font_small, remaining_text, color)
+            surface.blit(remaining_surface, (title_x, title_y + 30))
         
-        # Botones de decisiones
+        # Mensaje si no hay decisiones
         if not self.current_decisions:
             no_decisions_text = "No hay decisiones disponibles"
-            text_surface = self.font.render(no_decisions_text, True, (150, 150, 150))
-            text_rect = text_surface.get_rect(center=(self.decisions_rect.centerx, 
-                                                    self.decisions_rect.centery))
-            self.screen.blit(text_surface, text_rect)
-            return
+            text_surface = render_text(self.font, no_decisions_text, (150, 150, 150))
+            text_rect = text_surface.get_rect(center=panel_rect.center)
+            surface.blit(text_surface, text_rect)
         
-        for button_info in self.decision_buttons:
-            self._draw_decision_button(button_info)
+        return surface
     
     def _draw_decision_button(self, button_info):
         """Dibuja un botón de decisión individual"""
-        decision = button_info['decision']
-        rect = button_info['rect']
-        hovered = button_info['hovered']
+        key = 'hover_surface' if button_info['hovered'] else 'surface'
+        if button_info[key] is None:
+            button_info[key] = self._render_decision_button(
+                button_info['decision'], button_info['rect'].size, button_info['hovered'])
+        self.screen.blit(button_info[key], button_info['rect'])
+    
+    def _render_decision_button(self, decision, size, hovered):
+        """Renderiza un botón de decisión en su propia superficie"""
+        surface = pygame.Surface(size)
+        rect = surface.get_rect()
         
         # Color basado en prioridad
         priority_colors = {
@@ -432,25 +505,25 @@ class DecisionUI:
             border_width = 2
         
         # Dibujar botón
-        pygame.draw.rect(self.screen, color, rect)
-        pygame.draw.rect(self.screen, border_color, rect, border_width)
+        pygame.draw.rect(surface, color, rect)
+        pygame.draw.rect(surface, border_color, rect, border_width)
         
         # Indicador de prioridad
         priority_colors_bright = {1: (100, 150, 255), 2: (255, 255, 100), 3: (255, 100, 100)}
         priority_color = priority_colors_bright.get(decision.priority, (255, 255, 255))
         priority_rect = pygame.Rect(rect.right - 15, rect.y + 5, 10, 20)
-        pygame.draw.rect(self.screen, priority_color, priority_rect)
+        pygame.draw.rect(surface, priority_color, priority_rect)
         
         # Texto de la decisión
         y_offset = rect.y + 8
         
         # Nombre
-        name_surface = self.font.render(decision.name, True, (255, 255, 255))
+        name_surface = render_text(self.font, decision.name, (255, 255, 255))
         if name_surface.get_width() > rect.width - 30:
             # Truncar nombre si es muy largo
             truncated_name = decision.name[:25] + "..."
-            name_surface = self.font.render(truncated_name, True, (255, 255, 255))
-        self.screen.blit(name_surface, (rect.x + 8, y_offset))
+            name_surface = render_text(self.font, truncated_name, (255, 255, 255))
+        surface.blit(name_surface, (rect.x + 8, y_offset))
         y_offset += 22
         
         # Descripción (primera línea)
@@ -459,8 +532,8 @@ class DecisionUI:
         if len(first_line) > 45:
             first_line = first_line[:42] + "..."
         
-        desc_surface = self.font_small.render(first_line, True, (200, 200, 200))
-        self.screen.blit(desc_surface, (rect.x + 8, y_offset))
+        desc_surface = render_text(self.font_small, first_line, (200, 200, 200))
+        surface.blit(desc_surface, (rect.x + 8, y_offset))
         y_offset += 18
         
         # Segunda línea de descripción si existe
@@ -468,8 +541,8 @@ class DecisionUI:
             second_line = desc_lines[1]
             if len(second_line) > 45:
                 second_line = second_line[:42] + "..."
-            desc2_surface = self.font_small.render(second_line, True, (180, 180, 180))
-            self.screen.blit(desc2_surface, (rect.x + 8, y_offset))
+            desc2_surface = render_text(self.font_small, second_line, (180, 180, 180))
+            surface.blit(desc2_surface, (rect.x + 8, y_offset))
             y_offset += 18
         
         # Costos
@@ -481,16 +554,18 @@ class DecisionUI:
         
         if costs:
             cost_text = "Costo: " + ", ".join(costs)
-            cost_surface = self.font_small.render(cost_text, True, (255, 180, 180))
-            self.screen.blit(cost_surface, (rect.x + 8, rect.bottom - 16))
+            cost_surface = render_text(self.font_small, cost_text, (255, 180, 180))
+            surface.blit(cost_surface, (rect.x + 8, rect.bottom - 16))
         
         # Indicador de cooldown si corresponde
         if decision.cooldown > 0:
             cooldown_text = f"Espera: {decision.cooldown}d"
-            cooldown_surface = self.font_small.render(cooldown_text, True, (150, 150, 255))
+            cooldown_surface = render_text(self.font_small, cooldown_text, (150, 150, 255))
             cooldown_rect = cooldown_surface.get_rect()
             cooldown_rect.topright = (rect.right - 8, rect.y + 8)
-            self.screen.blit(cooldown_surface, cooldown_rect.topleft)
+            surface.blit(cooldown_surface, cooldown_rect.topleft)
+        
+        return surface
     
     def _draw_continent_selection(self):
         """Dibuja la interfaz de selección de continentes"""
@@ -500,25 +575,22 @@ class DecisionUI:
         overlay.fill((0, 0, 0))
         self.screen.blit(overlay, (0, 0))
         
-        # Panel de selección
-        panel_width = 600
-        panel_height = 200
-        panel_x = (self.screen.get_width() - panel_width) // 2
-        panel_y = (self.screen.get_height() - panel_height) // 2
-        panel_rect = pygame.Rect(panel_x, panel_y, panel_width, panel_height)
+        # Panel de selección (calculado junto con los botones)
+        panel_rect = self.selection_rect
+        panel_y = panel_rect.y
         
         pygame.draw.rect(self.screen, (40, 40, 70), panel_rect)
         pygame.draw.rect(self.screen, (150, 150, 200), panel_rect, 3)
         
         # Título
-        title_text = self.font_title.render("Seleccionar Región de Aplicación", True, (255, 255, 255))
+        title_text = render_text(self.font_title, "Seleccionar Región de Aplicación", (255, 255, 255))
         title_rect = title_text.get_rect(center=(panel_rect.centerx, panel_y + 30))
         self.screen.blit(title_text, title_rect)
         
         # Subtítulo con nombre de decisión
         if self.selected_decision:
             subtitle_text = f"Decisión: {self.selected_decision.name}"
-            subtitle_surface = self.font.render(subtitle_text, True, (200, 200, 255))
+            subtitle_surface = render_text(self.font, subtitle_text, (200, 200, 255))
             subtitle_rect = subtitle_surface.get_rect(center=(panel_rect.centerx, panel_y + 60))
             self.screen.blit(subtitle_surface, subtitle_rect)
         
@@ -534,8 +606,13 @@ class DecisionUI:
             pygame.draw.rect(self.screen, color, rect)
             pygame.draw.rect(self.screen, border_color, rect, 2)
             
-            # Texto del continente
-            text_surface = self.font.render(name, True, (255, 255, 255))
+            # Texto del continente (más pequeño y recortado si el botón es estrecho)
+            font = self.font if rect.height >= 40 else self.font_small
+            text_surface = render_text(font, name, (255, 255, 255))
+            if text_surface.get_width() > rect.width - 8:
+                while len(name) > 1 and font.size(name + "...")[0] > rect.width - 8:
+                    name = name[:-1]
+                text_surface = render_text(font, name + "...", (255, 255, 255))
             text_rect = text_surface.get_rect(center=rect.center)
             self.screen.blit(text_surface, text_rect)
         
@@ -547,7 +624,7 @@ class DecisionUI:
         
         y_offset = panel_rect.bottom + 20
         for instruction in instructions:
-            inst_text = self.font_small.render(instruction, True, (200, 200, 200))
+            inst_text = render_text(self.font_small, instruction, (200, 200, 200))
             inst_rect = inst_text.get_rect(center=(self.screen.get_width() // 2, y_offset))
             self.screen.blit(inst_text, inst_rect)
             y_offset += 20
@@ -1,5 +1,6 @@
 import random
 import pygame
+from render_cache import get_font, render_text
 
 class Event:
     def __init__(self, id, name, description, probability, effects, requirements=None):
@@ -11,8 +12,9 @@ class Event:
         self.requirements = requirements or []
 
 class EventManager:
-    def __init__(self, difficulty="normal"):
+    def __init__(self, difficulty="normal", rng=None):
         self.difficulty = difficulty
+        self.rng = rng or random  # generador aleatorio (por defecto el global)
         self.events_history = []
         
         # Ajustar probabilidades según dificultad
@@ -111,7 +113,7 @@ class EventManager:
                 continue
             
             # Verificar probabilidad
-            if random.random() < event.probability:
+            if self.rng.random() < event.probability:
                 events_triggered.append(event)
                 self._apply_event(event, continents)
                 self.events_history.append({
@@ -169,7 +171,7 @@ class EventManager:
         # Determinar continente(s) afectado(s)
         if effect_type in ["local_outbreak", "mass_flight", "hospital_overflow"]:
             # Eventos que afectan a un continente específico
-            target_continent = random.choice(continents)
+            target_continent = self.rng.choice(continents)
             self._apply_event_to_continent(effect_type, intensity, target_continent)
         else:
             # Eventos globales
@@ -242,40 +244,53 @@ class EventManager:
 class EventUI:
     def __init__(self, screen):
         self.screen = screen
-        self.font = pygame.font.Font(None, 24)
-        self.font_small = pygame.font.Font(None, 20)
+        self.font = get_font(24)
+        self.font_small = get_font(20)
         self.active_notifications = []
+        self.max_notifications = 5
     
-    def add_event_notification(self, event, duration=180):  # 3 segundos a 60 FPS
+    def add_event_notification(self, event, duration=3.0):  # segundos
         """Añade una notificación de evento"""
         self.active_notifications.append({
             'event': event,
             'duration': duration,
             'max_duration': duration
         })
+        
+        # Con el avance automático pueden llegar muchas: solo caben las más recientes
+        del self.active_notifications[:-self.max_notifications]
     
-    def update(self):
-        """Actualiza las notificaciones activas"""
+    def update(self, dt):
+        """Actualiza las notificaciones activas (dt en segundos)"""
         self.active_notifications = [
             notif for notif in self.active_notifications 
             if notif['duration'] > 0
         ]
         
         for notif in self.active_notifications:
-            notif['duration'] -= 1
+            notif['duration'] = max(0.0, notif['duration'] - dt)
+    
+    def notification_rect(self, index):
+        """Posición en pantalla de la notificación número index"""
+        return pygame.Rect(self.screen.get_width() - 420, 50 + index * 80, 400, 70)
+    
+    def notifications_area(self):
+        """Área que ocupan todas las notificaciones activas, o None si no hay"""
+        if not self.active_notifications:
+            return None
+        return self.notification_rect(0).union(self.notification_rect(len(self.active_notifications) - 1))
+    
+    def notifications_key(self):
+        """Clave que cambia con cada paso del desvanecimiento de las notificaciones"""
+        return tuple((id(notif['event']), notif['duration']) for notif in self.active_notifications)
     
     def draw_event_notifications(self):
         """Dibuja las notificaciones de eventos activos"""
-        screen_width = self.screen.get_width()
-        
         for i, notif in enumerate(self.active_notifications):
             event = notif['event']
             duration = notif['duration']
             max_duration = notif['max_duration']
             
-            # Posición de la notificación
-            y_pos = 50 + i * 80
-            
             # Calcular alpha para efecto de fade
             alpha = min(255, (duration / max_duration) * 255)
             
@@ -295,7 +310,7 @@ class EventUI:
             pygame.draw.rect(notif_surface, (200, 200, 200), notif_surface.get_rect(), 2)
             
             # Texto del evento
-            title_text = self.font.render(event.name, True, (255, 255, 255))
+            title_text = render_text(self.font, event.name, (255, 255, 255))
             notif_surface.blit(title_text, (10, 8))
             
             # Descripción (truncada si es necesaria)
@@ -303,11 +318,11 @@ class EventUI:
             if len(desc) > 50:
                 desc = desc[:47] + "..."
             
-            desc_text = self.font_small.render(desc, True, (220, 220, 220))
+            desc_text = render_text(self.font_small, desc, (220, 220, 220))
             notif_surface.blit(desc_text, (10, 32))
             
             # Dibujar la notificación en pantalla
-            self.screen.blit(notif_surface, (screen_width - 420, y_pos))
+            self.screen.blit(notif_surface, self.notification_rect(i))
     
     def draw_events_history(self, events_history, x, y, width, height):
         """Dibuja el historial de eventos en un panel"""
@@ -316,7 +331,7 @@ class EventUI:
         pygame.draw.rect(self.screen, (100, 100, 100), panel_rect, 2)
         
         # Título
-        title_text = self.font.render("Eventos Recientes", True, (255, 255, 255))
+        title_text = render_text(self.font, "Eventos Recientes", (255, 255, 255))
         self.screen.blit(title_text, (x + 10, y + 10))
         
         # Lista de eventos
@@ -339,6 +354,6 @@ class EventUI:
             else:
                 text_color = (200, 200, 255)  # Azul claro
             
-            text_surface = self.font_small.render(event_text, True, text_color)
+            text_surface = render_text(self.font_small, event_text, text_color)
             self.screen.blit(text_surface, (x + 10, y_offset))
             y_offset += 20
\ No newline at end of file
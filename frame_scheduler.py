@@ -0,0 +1,57 @@
+import time
+
+import pygame
+
+# Ritmo con animaciones en pantalla y ritmo de reposo
+ACTIVE_FPS = 60
+IDLE_FPS = 4
+
+# Paso máximo que se entrega a las animaciones tras un parón (segundos)
+MAX_DT = 0.1
+
+# Tiempo que se mantiene el ritmo activo después de una entrada del jugador
+WAKE_GRACE = 0.5
+
+
+class FrameScheduler:
+    """Marca el ritmo del bucle principal
+
+    Mientras algo se anima el bucle va a ACTIVE_FPS. Si no hay nada que
+    animar, espera bloqueado en pygame.event.wait() hasta la siguiente
+    entrada o, como mucho, 1 / IDLE_FPS segundos, de modo que el proceso
+    apenas consume CPU con una partida en pausa o una página estática.
+    """
+
+    def __init__(self, active_fps=ACTIVE_FPS, idle_fps=IDLE_FPS, max_dt=MAX_DT):
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.max_dt = max_dt
+        self.clock = pygame.time.Clock()
+        self.last_frame = time.perf_counter()
+        self.last_input = self.last_frame
+        self.idle = False
+
+    def next_frame(self, animating=True):
+        """Espera al siguiente fotograma y devuelve (eventos, dt real en segundos)"""
+        awake = time.perf_counter() - self.last_input < WAKE_GRACE
+        self.idle = not (animating or awake)
+
+        if self.idle:
+            # Dormir hasta que llegue una entrada o venza el ritmo de reposo
+            first = pygame.event.wait(int(1000 / self.idle_fps))
+            events = [] if first.type == pygame.NOEVENT else [first]
+            events.extend(pygame.event.get())
+            # Mantener el reloj al día para que el primer fotograma activo no espere de más
+            self.clock.tick()
+        else:
+            self.clock.tick(self.active_fps)
+            events = pygame.event.get()
+
+        now = time.perf_counter()
+        dt = min(now - self.last_frame, self.max_dt)
+        self.last_frame = now
+
+        if any(event.type != pygame.NOEVENT for event in events):
+            self.last_input = now
+
+        return events, dt
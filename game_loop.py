@@ -1,9 +1,34 @@
 import pygame
-from seir import Continent, SEIRSimulator
+import time
+from render_cache import (get_font, render_text, get_gradient_background,
+                          VICTORY_PALETTE, DEFEAT_PALETTE)
 from ui import GameUI, ConfirmDialog
 from map import WorldMap
-from events import EventManager, EventUI
-from decisions import DecisionManager, DecisionUI
+from events import Event, EventUI
+from decisions import DecisionUI
+from session import GameSession
+from scenarios import load_scenario
+from compositor import Compositor
+from lazy_imports import lazy_import
+from profiler import timed
+
+# Las partículas solo se cargan al llegar al final de la partida
+particles = lazy_import("particles")
+
+# Guardado de partidas (F5 / F9), al usarlo por primera vez
+savegame = lazy_import("savegame")
+
+# Número de partículas del fondo de la pantalla final
+GAME_OVER_PARTICLES = 400
+
+# Avance automático: tecla -> días por segundo (None = lo más rápido posible)
+AUTO_SPEEDS = {pygame.K_1: 1, pygame.K_2: 5, pygame.K_3: 50, pygame.K_4: None}
+
+# Tiempo de cada fotograma que puede dedicarse a simular días (segundos)
+AUTO_ADVANCE_BUDGET = 0.012
+
+# Días como máximo por fotograma; el retraso acumulado por encima se descarta
+MAX_DAYS_PER_FRAME = 10
 
 class GameOverScreen:
     def __init__(self, screen, game_state, stats, day, defeat_reason=None):
@@ -13,76 +38,39 @@ class GameOverScreen:
         self.day = day
         self.defeat_reason = defeat_reason
         
-        self.font_huge = pygame.font.Font(None, 96)
-        self.font_large = pygame.font.Font(None, 48)
-        self.font_medium = pygame.font.Font(None, 32)
-        self.font_small = pygame.font.Font(None, 24)
+        self.font_huge = get_font(96)
+        self.font_large = get_font(48)
+        self.font_medium = get_font(32)
+        self.font_small = get_font(24)
         
         # Animación
         self.animation_time = 0
-        self.particles = []
         
         # Generar partículas de celebración o lamentación
-        self.generate_particles()
+        self.particles = self.generate_particles()
     
     def generate_particles(self):
         """Genera partículas para el fondo animado"""
-        import random
-        
         if self.game_state == "victory":
             colors = [(255, 215, 0), (0, 255, 127), (30, 144, 255), (255, 105, 180)]
+            respawn_colors = [(255, 215, 0), (0, 255, 127), (30, 144, 255)]
+            velocity_range = ((-1, 1), (-2, 0))
         else:
             colors = [(139, 69, 19), (105, 105, 105), (128, 128, 128), (169, 169, 169)]
+            respawn_colors = [(139, 69, 19), (105, 105, 105)]
+            velocity_range = ((-1, 1), (-0.5, 0.5))
         
-        for _ in range(50):
-            particle = {
-                'x': random.randint(0, self.screen.get_width()),
-                'y': random.randint(0, self.screen.get_height()),
-                'vx': random.uniform(-1, 1),
-                'vy': random.uniform(-2, 0) if self.game_state == "victory" else random.uniform(-0.5, 0.5),
-                'color': random.choice(colors),
-                'size': random.randint(2, 6),
-                'life': random.uniform(3, 6)
-            }
-            self.particles.append(particle)
+        return particles.ParticleField(
+            GAME_OVER_PARTICLES, self.screen.get_size(), colors, velocity_range,
+            respawn_colors=respawn_colors
+        )
     
     def update(self, dt):
         """Actualiza la animación"""
         self.animation_time += dt
         
-        # Actualizar partículas
-        for particle in self.particles[:]:
-            particle['x'] += particle['vx'] * 60 * dt
-            particle['y'] += particle['vy'] * 60 * dt
-            particle['life'] -= dt
-            
-            # Envolver partículas
-            if particle['x'] < 0:
-                particle['x'] = self.screen.get_width()
-            elif particle['x'] > self.screen.get_width():
-                particle['x'] = 0
-            
-            if particle['y'] < 0:
-                particle['y'] = self.screen.get_height()
-            elif particle['y'] > self.screen.get_height():
-                particle['y'] = 0
-            
-            # Remover partículas muertas
-            if particle['life'] <= 0:
-                self.particles.remove(particle)
-                # Generar nueva partícula
-                import random
-                colors = [(255, 215, 0), (0, 255, 127), (30, 144, 255)] if self.game_state == "victory" else [(139, 69, 19), (105, 105, 105)]
-                new_particle = {
-                    'x': random.randint(0, self.screen.get_width()),
-                    'y': self.screen.get_height(),
-                    'vx': random.uniform(-1, 1),
-                    'vy': random.uniform(-2, 0) if self.game_state == "victory" else random.uniform(-0.5, 0.5),
-                    'color': random.choice(colors),
-                    'size': random.randint(2, 6),
-                    'life': random.uniform(3, 6)
-                }
-                self.particles.append(new_particle)
+        # Actualizar partículas (movimiento, envolvimiento y regeneración vectorizados)
+        self.particles.update(dt)
     
     def draw(self):
         """Dibuja la pantalla de fin de juego"""
@@ -96,36 +84,20 @@ class GameOverScreen:
         
         # Instrucciones
         instruction_text = "Presiona cualquier tecla o click para volver al menú principal"
-        instruction_surface = self.font_small.render(instruction_text, True, (200, 200, 200))
+        instruction_surface = render_text(self.font_small, instruction_text, (200, 200, 200))
         instruction_rect = instruction_surface.get_rect(center=(self.screen.get_width() // 2, 
                                                                self.screen.get_height() - 30))
         self.screen.blit(instruction_surface, instruction_rect)
     
     def draw_animated_background(self):
         """Dibuja fondo animado con partículas"""
-        if self.game_state == "victory":
-            # Fondo de victoria con gradiente dorado
-            for y in range(0, self.screen.get_height(), 4):
-                progress = y / self.screen.get_height()
-                gold_intensity = int(50 + progress * 30)
-                color = (gold_intensity, gold_intensity//2, 20)
-                pygame.draw.line(self.screen, color, (0, y), (self.screen.get_width(), y), 4)
-        else:
-            # Fondo de derrota con gradiente sombrío
-            for y in range(0, self.screen.get_height(), 4):
-                progress = y / self.screen.get_height()
-                dark_intensity = int(20 + progress * 15)
-                color = (dark_intensity, dark_intensity//2, dark_intensity//3)
-                pygame.draw.line(self.screen, color, (0, y), (self.screen.get_width(), y), 4)
+        # Gradiente dorado (victoria) o sombrío (derrota), generado una vez por tamaño
+        palette = VICTORY_PALETTE if self.game_state == "victory" else DEFEAT_PALETTE
+        background = get_gradient_background(self.screen.get_size(), palette, step=4)
+        self.screen.blit(background, (0, 0))
         
         # Dibujar partículas
-        for particle in self.particles:
-            alpha = max(50, min(255, int(particle['life'] * 85)))
-            particle_surface = pygame.Surface((particle['size']*2, particle['size']*2), pygame.SRCALPHA)
-            color_with_alpha = (*particle['color'], alpha)
-            pygame.draw.circle(particle_surface, color_with_alpha, 
-                             (particle['size'], particle['size']), particle['size'])
-            self.screen.blit(particle_surface, (particle['x'] - particle['size'], particle['y'] - particle['size']))
+        self.particles.draw(self.screen)
     
     def draw_victory_screen(self):
         """Dibuja pantalla de victoria"""
@@ -136,7 +108,7 @@ class GameOverScreen:
         title_text = "¡VICTORIA!"
         
         # Crear superficie escalada para el título
-        base_title = self.font_huge.render(title_text, True, (255, 215, 0))
+        base_title = render_text(self.font_huge, title_text, (255, 215, 0))
         scaled_width = int(base_title.get_width() * scale)
         scaled_height = int(base_title.get_height() * scale)
         scaled_title = pygame.transform.scale(base_title, (scaled_width, scaled_height))
@@ -144,7 +116,7 @@ class GameOverScreen:
         title_rect = scaled_title.get_rect(center=(self.screen.get_width() // 2, 150))
         
         # Sombra del título
-        shadow_title = self.font_huge.render(title_text, True, (100, 80, 0))
+        shadow_title = render_text(self.font_huge, title_text, (100, 80, 0))
         shadow_scaled = pygame.transform.scale(shadow_title, (scaled_width, scaled_height))
         shadow_rect = shadow_scaled.get_rect(center=(title_rect.centerx + 4, title_rect.centery + 4))
         self.screen.blit(shadow_scaled, shadow_rect)
@@ -152,7 +124,7 @@ class GameOverScreen:
         
         # Subtítulo
         subtitle_text = "Has controlado exitosamente la pandemia"
-        subtitle_surface = self.font_large.render(subtitle_text, True, (200, 255, 200))
+        subtitle_surface = render_text(self.font_large, subtitle_text, (200, 255, 200))
         subtitle_rect = subtitle_surface.get_rect(center=(self.screen.get_width() // 2, 220))
         self.screen.blit(subtitle_surface, subtitle_rect)
         
@@ -166,11 +138,11 @@ class GameOverScreen:
         """Dibuja pantalla de derrota"""
         # Título
         title_text = "DERROTA"
-        title_surface = self.font_huge.render(title_text, True, (220, 50, 50))
+        title_surface = render_text(self.font_huge, title_text, (220, 50, 50))
         title_rect = title_surface.get_rect(center=(self.screen.get_width() // 2, 150))
         
         # Sombra del título
-        shadow_title = self.font_huge.render(title_text, True, (80, 20, 20))
+        shadow_title = render_text(self.font_huge, title_text, (80, 20, 20))
         shadow_rect = shadow_title.get_rect(center=(title_rect.centerx + 3, title_rect.centery + 3))
         self.screen.blit(shadow_title, shadow_rect)
         self.screen.blit(title_surface, title_rect)
@@ -185,7 +157,7 @@ class GameOverScreen:
         }
         
         reason_text = defeat_messages.get(self.defeat_reason, "La pandemia no pudo ser controlada")
-        reason_surface = self.font_large.render(reason_text, True, (255, 150, 150))
+        reason_surface = render_text(self.font_large, reason_text, (255, 150, 150))
         reason_rect = reason_surface.get_rect(center=(self.screen.get_width() // 2, 220))
         self.screen.blit(reason_surface, reason_rect)
         
@@ -224,7 +196,7 @@ class GameOverScreen:
         # Dibujar logros
         y_offset = 280
         for achievement in achievements:
-            achievement_surface = self.font_medium.render(achievement, True, (255, 215, 0))
+            achievement_surface = render_text(self.font_medium, achievement, (255, 215, 0))
             achievement_rect = achievement_surface.get_rect(center=(self.screen.get_width() // 2, y_offset))
             
             # Fondo para el logro
@@ -254,7 +226,7 @@ class GameOverScreen:
         
         # Título del panel
         panel_title = "Resumen Final"
-        title_surface = self.font_large.render(panel_title, True, (255, 255, 255))
+        title_surface = render_text(self.font_large, panel_title, (255, 255, 255))
         title_rect = title_surface.get_rect(center=(panel_rect.centerx, panel_rect.y + 25))
         self.screen.blit(title_surface, title_rect)
         
@@ -282,7 +254,7 @@ class GameOverScreen:
             else:
                 color = (255, 255, 255)
             
-            stat_surface = self.font_small.render(stat, True, color)
+            stat_surface = render_text(self.font_small, stat, color)
             stat_rect = stat_surface.get_rect(center=(panel_rect.centerx, y_offset))
             self.screen.blit(stat_surface, stat_rect)
             y_offset += 22
@@ -301,7 +273,7 @@ class GameOverScreen:
         pygame.draw.rect(self.screen, (150, 150, 100), panel_rect, 2)
         
         # Título
-        title_surface = self.font_medium.render("Consejos para la próxima partida:", True, (255, 255, 150))
+        title_surface = render_text(self.font_medium, "Consejos para la próxima partida:", (255, 255, 150))
         title_rect = title_surface.get_rect(center=(panel_rect.centerx, panel_rect.y + 25))
         self.screen.blit(title_surface, title_rect)
         
@@ -310,7 +282,7 @@ class GameOverScreen:
         
         y_offset = tips_y + 50
         for tip in tips:
-            tip_surface = self.font_small.render(tip, True, (200, 200, 200))
+            tip_surface = render_text(self.font_small, tip, (200, 200, 200))
             tip_rect = tip_surface.get_rect(center=(panel_rect.centerx, y_offset))
             self.screen.blit(tip_surface, tip_rect)
             y_offset += 25
@@ -352,82 +324,91 @@ class GameOverScreen:
         
         return base_tips[:3] + specific_tips[:2]
 
-class GameLoop:
-    def __init__(self, screen, difficulty="normal"):
+class GameLoop(GameSession):
+    def __init__(self, screen, difficulty="normal", rng=None, autosave=None, seed=None, history=None,
+                 scenario=None):
         self.screen = screen
-        self.difficulty = difficulty
-        self.day = 1
         
-        # Inicializar componentes del juego
-        self.setup_continents()
-        self.simulator = SEIRSimulator(self.continents, difficulty)
-        self.event_manager = EventManager(difficulty)
-        self.decision_manager = DecisionManager(difficulty)
+        # Servicio de guardado automático en segundo plano (opcional)
+        self.autosave = autosave
+        
+        # El mapa y la selección de regiones necesitan el escenario antes que la simulación
+        scenario = load_scenario(scenario)
         
         # Interfaz de usuario mejorada
         self.ui = GameUI(screen)
-        self.map = WorldMap(screen)
+        self.map = WorldMap(screen, scenario)
         self.event_ui = EventUI(screen)
-        self.decision_ui = DecisionUI(screen)
+        self.decision_ui = DecisionUI(screen, scenario.region_names)
+        
+        self.progress_rect = pygame.Rect(520, 680, 400, 20)
+        self.auto_speed_rect = pygame.Rect(520, 705, 400, 22)
+        
+        # Redibujado por zonas: solo se actualiza lo que cambia entre fotogramas
+        self.compositor = Compositor(screen)
+        self.setup_compositor()
         
-        # Estado del juego
-        self.game_state = "playing"  # "playing", "victory", "defeat"
-        self.defeat_reason = None
+        # Estado de la interfaz
         self.selected_continent = None
         self.game_over_screen = None
         
-        # Historial para estadísticas
-        self.history = []
-        self.paused = False
-        
-        # Límites de tiempo para partida
-        self.max_days = 365  # Máximo un año
-        
-        # Guardar estado inicial
-        self.save_daily_stats()
-        
-        # Actualizar decisiones iniciales
-        self.update_available_decisions()
-    
-    def setup_continents(self):
-        """Configura los continentes iniciales"""
-        continent_configs = {
-            "easy": [
-                {"name": "América", "population": 800000, "initial_infected": 100},
-                {"name": "Europa-África", "population": 1500000, "initial_infected": 120},
-                {"name": "Asia-Oceanía", "population": 3500000, "initial_infected": 150}
-            ],
-            "normal": [
-                {"name": "América", "population": 1000000, "initial_infected": 150},
-                {"name": "Europa-África", "population": 1800000, "initial_infected": 200},
-                {"name": "Asia-Oceanía", "population": 4500000, "initial_infected": 300}
-            ],
-            "expert": [
-                {"name": "América", "population": 1200000, "initial_infected": 250},
-                {"name": "Europa-África", "population": 2200000, "initial_infected": 350},
-                {"name": "Asia-Oceanía", "population": 5500000, "initial_infected": 500}
-            ]
-        }
+        # Avance automático (0 = manual); el acumulador guarda fracciones de día
+        self.auto_speed = 0
+        self.day_accumulator = 0.0
         
-        continent_data = continent_configs[self.difficulty]
+        # Dentro de advance_days la interfaz de decisiones se actualiza al final del lote
+        self.advancing = False
         
-        self.continents = []
-        for data in continent_data:
-            continent = Continent(
-                name=data["name"],
-                population=data["population"],
-                initial_infected=data["initial_infected"],
-                difficulty=self.difficulty
-            )
-            self.continents.append(continent)
+        # Simulación, estado de la partida y decisiones iniciales
+        super().__init__(difficulty, rng, seed, history, scenario)
     
-    def update_available_decisions(self):
-        """Actualiza las decisiones disponibles"""
-        available_decisions = self.decision_manager.get_available_decisions(
-            self.day, self.continents, self.simulator.get_global_stats()
-        )
+    def setup_compositor(self):
+        """Registra los elementos de la pantalla de juego en orden de dibujo"""
+        ui = self.ui
+        add = self.compositor.add
+        
+        add("map", self.map.map_rect,
+            lambda: (self.selected_continent, self.map.animation_frame),
+            lambda: self.map.draw(self.continents, self.selected_continent))
+        add("status_panel", ui.status_panel_rect,
+            lambda: ui.panels_version,
+            lambda: ui.draw_status_panel(self.day, self.simulator.get_global_stats()))
+        add("continent_panels", ui.continent_panels_rect,
+            lambda: ui.panels_version,
+            lambda: ui.draw_continent_panels(self.continents))
+        for button in (ui.next_day_button, ui.stats_button, ui.menu_button):
+            add("button", button.rect,
+                lambda button=button: (button.enabled, button.hovered),
+                lambda button=button: button.draw(self.screen))
+        add("decisions", self.decision_ui.decisions_rect,
+            self.decision_ui.state_key,
+            self.decision_ui.draw)
+        add("notifications", self.event_ui.notifications_area,
+            self.event_ui.notifications_key,
+            self.event_ui.draw_event_notifications)
+        add("events_history", lambda: self.ui.events_rect if self.event_manager.get_recent_events() else None,
+            lambda: (self.day, len(self.event_manager.events_history)),
+            self.draw_events_history)
+        add("progress", self.progress_rect,
+            lambda: (self.day, self.max_days),
+            self.draw_progress_indicator)
+        add("auto_speed", lambda: self.auto_speed_rect if self.auto_speed != 0 else None,
+            lambda: (self.auto_speed, self.auto_advance_active()),
+            self.draw_auto_speed_indicator)
+        add("pause", lambda: self.pause_indicator_rect() if self.paused else None,
+            lambda: self.paused,
+            self.draw_pause_indicator)
+    
+    def set_available_decisions(self, decisions):
+        """Fija las decisiones de hoy y reconstruye sus botones (al final del lote si se está avanzando)"""
+        super().set_available_decisions(decisions)
+        if not self.advancing:
+            self.update_decision_ui()
+    
+    def update_decision_ui(self):
+        """Pasa las decisiones de hoy y el contador a la interfaz de decisiones"""
         self.decision_ui.update_decisions(
-            available_decisions, 
+            self.available_decisions, 
             self.decision_manager.decisions_used_today,
             self.decision_manager.max_decisions_per_day
         )
@@ -476,192 +457,206 @@ class GameLoop:
                     self.advance_day()
                 elif event.key == pygame.K_p:
                     self.paused = not self.paused
+                elif event.key in AUTO_SPEEDS:
+                    self.set_auto_speed(AUTO_SPEEDS[event.key])
+                elif event.key == pygame.K_0:
+                    self.set_auto_speed(0)
+                elif event.key == pygame.K_F5:
+                    self.quicksave()
+                elif event.key == pygame.K_F9:
+                    if event.mod & pygame.KMOD_SHIFT and self.autosave is not None:
+                        self.quickload(self.autosave.path)
+                    else:
+                        self.quickload()
         
         return None
     
+    def notify(self, title, message):
+        """Muestra un aviso del sistema con las notificaciones de eventos"""
+        self.event_ui.add_event_notification(Event("system", title, message, 0, {}))
+    
+    def quicksave(self, path=None):
+        """Guarda la partida actual (F5)"""
+        path = path or savegame.QUICKSAVE_PATH
+        try:
+            savegame.save(self, path)
+        except OSError as e:
+            self.notify("Error al guardar", str(e))
+            return False
+        self.notify("Partida guardada", f"Día {self.day} guardado en {path}")
+        return True
+    
+    def quickload(self, path=None):
+        """Carga la última partida guardada (F9)"""
+        path = path or savegame.QUICKSAVE_PATH
+        try:
+            self.load_game(savegame.load(path))
+        except (OSError, ValueError) as e:
+            self.notify("No se pudo cargar la partida", str(e))
+            return False
+        self.notify("Partida cargada", f"Día {self.day} recuperado de {path}")
+        return True
+    
+    def load_game(self, save):
+        """Sustituye el estado actual por el de una partida guardada"""
+        # El guardado pendiente puede estar leyendo las filas del historial
+        # que restore() va a reescribir
+        if self.autosave is not None:
+            self.autosave.flush()
+        savegame.restore(self, save)
+        
+        # La repetición continúa desde el estado cargado
+        if self.recorder is not None:
+            self.recorder.restart_from_save(self)
+        if self.telemetry is not None:
+            self.telemetry.restart_from_save(self)
+        
+        self.set_auto_speed(0)
+        self.event_ui.active_notifications = []
+        self.game_over_screen = None
+        if self.game_state != "playing":
+            self.game_over_screen = GameOverScreen(
+                self.screen, self.game_state, self.simulator.get_global_stats(),
+                self.day, self.defeat_reason
+            )
+        
+        # Todo lo retenido pertenece a la partida anterior
+        self.ui.next_day_button.set_enabled(True)
+        self.ui.invalidate_panels()
+        self.ui.reset_stats_chart()
+        self.compositor.invalidate()
+    
     def handle_game_over_events(self, event):
         """Maneja eventos cuando el juego ha terminado"""
         if event.type in [pygame.KEYDOWN, pygame.MOUSEBUTTONUP]:
             return "menu"
         return None
     
-    def advance_day(self):
-        """Avanza un día en la simulación"""
-        if self.game_state != "playing" or self.paused:
-            return
-        
-        # Ejecutar simulación
-        self.simulator.step()
-        
-        # Verificar y procesar eventos aleatorios
-        events = self.event_manager.check_events(self.day, self.continents, 
-                                                self.simulator.get_global_stats())
-        
-        # Añadir notificaciones de eventos
-        for event in events:
-            self.event_ui.add_event_notification(event)
-        
-        # Avanzar día y reiniciar contador de decisiones
-        self.day += 1
-        self.decision_manager.new_day(self.day)
-        
-        # Actualizar decisiones disponibles
-        self.update_available_decisions()
+    def advance_days(self, days, deadline=None):
+        """Avanza varios días y refresca la interfaz una sola vez al final"""
+        self.advancing = True
+        try:
+            advanced = super().advance_days(days, deadline)
+        finally:
+            self.advancing = False
+        if advanced == 0:
+            return 0
+        
+        # Las decisiones del último día, una vez por lote como paneles y gráficos
+        self.update_decision_ui()
         
         # Habilitar botón de siguiente día si hay decisiones o no se pueden tomar más
         self.ui.next_day_button.set_enabled(True)
         
-        # Guardar estadísticas del día
-        self.save_daily_stats()
+        # Los paneles de estado y los gráficos cambian con los nuevos días
+        self.ui.invalidate_panels()
+        self.ui.invalidate_stats_chart()
         
-        # Verificar condiciones de fin de juego
-        self.check_game_over()
+        # Guardado automático: aquí solo se copia el estado, se escribe en otro hilo
+        if self.autosave is not None:
+            self.autosave.request(self)
+        
+        return advanced
+    
+    def on_events(self, events):
+        """Añade notificaciones de los eventos del día"""
+        for event in events:
+            self.event_ui.add_event_notification(event)
     
     def apply_decision(self, decision_id, continent_idx=None):
         """Aplica una decisión política"""
-        success = self.decision_manager.apply_decision(
-            decision_id, self.continents, continent_idx
-        )
+        success = super().apply_decision(decision_id, continent_idx)
         
         if success:
-            # Actualizar decisiones disponibles
-            self.update_available_decisions()
+            # Los costes de la decisión cambian economía y moral
+            self.ui.invalidate_panels()
         
         return success
     
-    def save_daily_stats(self):
-        """Guarda las estadísticas del día actual"""
-        global_stats = self.simulator.get_global_stats()
-        
-        day_data = {
-            'day': self.day,
-            'global': global_stats,
-            'continents': []
-        }
-        
-        for continent in self.continents:
-            continent_data = {
-                'name': continent.name,
-                'susceptible': int(continent.S),
-                'exposed': int(continent.E),
-                'infected': int(continent.I),
-                'recovered': int(continent.R),
-                'deaths': int(continent.deaths),
-                'economy': continent.economy,
-                'morale': continent.morale
-            }
-            day_data['continents'].append(continent_data)
-        
-        self.history.append(day_data)
-        
-        # Regenerar gráficos si las estadísticas están visibles
-        if self.ui.stats_panel_visible:
-            self.ui.stats_surface = None
-    
-    def check_game_over(self):
-        """Verifica las condiciones de fin de juego"""
-        global_stats = self.simulator.get_global_stats()
-        
-        # Verificar victoria - epidemia controlada
-        if self.check_victory_conditions():
-            self.game_state = "victory"
-            self.game_over_screen = GameOverScreen(
-                self.screen, "victory", global_stats, self.day
-            )
+    def on_game_over(self):
+        """Prepara la pantalla de victoria o derrota"""
+        self.game_over_screen = GameOverScreen(
+            self.screen, self.game_state, self.simulator.get_global_stats(),
+            self.day, self.defeat_reason
+        )
+    
+    def set_auto_speed(self, speed):
+        """Cambia la velocidad del avance automático (0 = manual, None = máxima)"""
+        self.auto_speed = speed
+        self.day_accumulator = 0.0
+    
+    def auto_advance_active(self):
+        """El avance automático se detiene en pausa y con diálogos abiertos"""
+        return (self.auto_speed != 0 and self.game_state == "playing" and not self.paused and
+                self.ui.confirm_dialog is None and not self.decision_ui.show_continent_selection)
+    
+    def update_auto_advance(self, dt):
+        """Simula los días que correspondan al tiempo transcurrido (paso fijo)"""
+        if not self.auto_advance_active():
+            self.day_accumulator = 0.0
             return
         
-        # Verificar derrota
-        defeat_reason = self.check_defeat_conditions()
-        if defeat_reason:
-            self.game_state = "defeat"
-            self.defeat_reason = defeat_reason
-            self.game_over_screen = GameOverScreen(
-                self.screen, "defeat", global_stats, self.day, defeat_reason
-            )
+        deadline = time.perf_counter() + AUTO_ADVANCE_BUDGET
+        if self.auto_speed is None:
+            # Velocidad máxima: tantos días como quepan en el presupuesto del fotograma
+            self.advance_days(self.max_days, deadline)
             return
-    
-    def check_victory_conditions(self):
-        """Verifica las condiciones de victoria"""
-        global_stats = self.simulator.get_global_stats()
-        
-        # Condición 1: Muy pocos infectados activos
-        if global_stats['infected'] < global_stats['total_population'] * 0.0001:  # 0.01%
-            # Condición 2: Economía y moral en niveles aceptables
-            if global_stats['economy'] >= 40 and global_stats['morale'] >= 35:
-                # Condición 3: La situación ha sido estable por varios días
-                if self.day > 30 and len(self.history) >= 7:
-                    recent_infections = [day['global']['infected'] for day in self.history[-7:]]
-                    if all(infections < global_stats['total_population'] * 0.001 for infections in recent_infections):
-                        return True
-        
-        # Victoria alternativa: control prolongado con bajas cifras
-        if self.day > 100:
-            if (global_stats['infected'] < global_stats['total_population'] * 0.002 and
-                global_stats['economy'] >= 30 and global_stats['morale'] >= 25):
-                return True
-        
-        return False
-    
-    def check_defeat_conditions(self):
-        """Verifica las condiciones de derrota"""
-        global_stats = self.simulator.get_global_stats()
         
-        # Derrota 1: Demasiadas muertes
-        death_rate = global_stats['deaths'] / global_stats['total_population']
-        if death_rate > 0.15:  # 15% de la población
-            return "too_many_deaths"
-        
-        # Derrota 2: Colapso económico total
-        if global_stats['economy'] <= 5:
-            return "economic_collapse"
-        
-        # Derrota 3: Colapso de moral total
-        if global_stats['morale'] <= 5:
-            return "morale_collapse"
-        
-        # Derrota 4: Propagación incontrolable
-        infection_rate = global_stats['infected'] / global_stats['total_population']
-        if infection_rate > 0.5:  # 50% de la población infectada simultáneamente
-            return "uncontrolled_spread"
-        
-        # Derrota 5: Límite de tiempo
-        if self.day > self.max_days:
-            return "time_limit"
-        
-        # Derrota 6: Situación crítica sostenida
-        if self.day > 50 and len(self.history) >= 30:
-            recent_stats = self.history[-30:]
-            critical_days = sum(1 for day in recent_stats 
-                              if (day['global']['economy'] < 20 or 
-                                  day['global']['morale'] < 20 or
-                                  day['global']['infected'] / day['global']['total_population'] > 0.2))
-            if critical_days >= 25:  # 25 de los últimos 30 días en situación crítica
-                return "uncontrolled_spread"
-        
-        return None
+        self.day_accumulator += dt * self.auto_speed
+        days = int(self.day_accumulator)
+        if days == 0:
+            return
+        self.day_accumulator -= days
+        if days > MAX_DAYS_PER_FRAME:
+            # Sin recuperar el retraso: la simulación se ralentiza en vez de bloquear el dibujo
+            days = MAX_DAYS_PER_FRAME
+            self.day_accumulator = 0.0
+        self.advance_days(days, deadline)
     
-    def update(self):
-        """Actualiza el estado del juego"""
+    @timed("GameLoop.update")
+    def update(self, dt):
+        """Actualiza el estado del juego (dt: segundos desde el fotograma anterior)"""
         if self.game_state == "playing":
+            # Días del avance automático
+            self.update_auto_advance(dt)
+            
             # Actualizar notificaciones de eventos
-            self.event_ui.update()
+            self.event_ui.update(dt)
             
             # Actualizar mapa (animaciones)
-            dt = 1.0 / 60.0  # Asumir 60 FPS
             self.map.update(dt, self.continents)
         
         elif self.game_over_screen:
-            dt = 1.0 / 60.0
             self.game_over_screen.update(dt)
     
+    def is_animating(self):
+        """Indica si hay algo en movimiento que requiera el ritmo de fotogramas completo"""
+        if self.game_state != "playing":
+            return self.game_over_screen is not None
+        return bool(self.auto_advance_active() or self.event_ui.active_notifications or
+                    self.map.infection_particles or self.ui.is_animating())
+    
+    def needs_full_redraw(self):
+        """Indica si este fotograma debe redibujarse entero"""
+        return (self.game_state != "playing" or self.ui.has_overlay() or
+                self.decision_ui.show_continent_selection)
+    
+    @timed("GameLoop.draw")
     def draw(self):
-        """Dibuja todos los elementos del juego"""
+        """Dibuja el fotograma y devuelve las áreas cambiadas (None = pantalla completa)"""
+        if not self.needs_full_redraw():
+            return self.compositor.compose()
+        
+        # Estadísticas, diálogos y pantallas finales cubren toda la pantalla;
+        # al cerrarlos hay que repintar todo de nuevo
+        self.compositor.invalidate()
         self.screen.fill((10, 10, 30))
         
         if self.game_state == "playing":
             self.draw_playing_state()
         elif self.game_over_screen:
             self.game_over_screen.draw()
+        return None
     
     def draw_playing_state(self):
         """Dibuja el estado de juego normal"""
@@ -679,20 +674,28 @@ class GameLoop:
         self.event_ui.draw_event_notifications()
         
         # Panel de eventos recientes (área definida)
-        recent_events = self.event_manager.get_recent_events()
-        if recent_events:
-            self.event_ui.draw_events_history(recent_events, 930, 200, 260, 450)
+        self.draw_events_history()
         
         # Indicador de progreso de la partida
         self.draw_progress_indicator()
         
+        # Velocidad del avance automático
+        if self.auto_speed != 0:
+            self.draw_auto_speed_indicator()
+        
         # Indicador de pausa
         if self.paused:
             self.draw_pause_indicator()
     
+    def draw_events_history(self):
+        """Dibuja el panel de eventos recientes si hay alguno"""
+        recent_events = self.event_manager.get_recent_events()
+        if recent_events:
+            self.event_ui.draw_events_history(recent_events, *self.ui.events_rect)
+    
     def draw_progress_indicator(self):
         """Dibuja indicador de progreso de la partida"""
-        progress_rect = pygame.Rect(520, 680, 400, 20)
+        progress_rect = self.progress_rect
         
         # Fondo
         pygame.draw.rect(self.screen, (50, 50, 50), progress_rect)
@@ -716,13 +719,30 @@ class GameLoop:
         
         # Texto de progreso
         progress_text = f"Día {self.day} / {self.max_days}"
-        text_surface = pygame.font.Font(None, 18).render(progress_text, True, (255, 255, 255))
+        text_surface = render_text(get_font(18), progress_text, (255, 255, 255))
         text_rect = text_surface.get_rect(center=progress_rect.center)
         self.screen.blit(text_surface, text_rect)
     
+    def draw_auto_speed_indicator(self):
+        """Dibuja la velocidad del avance automático bajo la barra de progreso"""
+        speed = "máxima" if self.auto_speed is None else f"{self.auto_speed} días/s"
+        if self.auto_advance_active():
+            text, color = f"Avance automático: {speed}  (0 para detener)", (150, 220, 255)
+        else:
+            text, color = f"Avance automático en espera: {speed}", (160, 160, 160)
+        text_surface = render_text(get_font(20), text, color)
+        text_rect = text_surface.get_rect(center=self.auto_speed_rect.center)
+        self.screen.blit(text_surface, text_rect)
+    
+    def pause_indicator_rect(self):
+        """Área que ocupa el indicador de pausa con su fondo"""
+        pause_text = render_text(get_font(48), "PAUSADO", (255, 255, 100))
+        pause_rect = pause_text.get_rect(center=(self.screen.get_width() // 2, 100))
+        return pause_rect.inflate(20, 10)
+    
     def draw_pause_indicator(self):
         """Dibuja el indicador de pausa"""
-        pause_text = pygame.font.Font(None, 48).render("PAUSADO", True, (255, 255, 100))
+        pause_text = render_text(get_font(48), "PAUSADO", (255, 255, 100))
         pause_rect = pause_text.get_rect(center=(self.screen.get_width() // 2, 100))
         
         # Fondo semi-transparente
@@ -0,0 +1,41 @@
+import importlib
+import sys
+
+
+class LazyModule:
+    """Módulo que solo se importa la primera vez que se usa uno de sus atributos
+
+    Permite que las dependencias pesadas (gráficos, NumPy) no retrasen el
+    arranque del juego cuando el jugador nunca llega a necesitarlas.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    @property
+    def loaded(self):
+        """Indica si el módulo ya se ha importado"""
+        return self._module is not None or self._name in sys.modules
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "cargado" if self.loaded else "pendiente"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+_lazy_modules = {}
+
+
+def lazy_import(name):
+    """Devuelve un módulo diferido compartido para el nombre indicado"""
+    if name not in _lazy_modules:
+        _lazy_modules[name] = LazyModule(name)
+    return _lazy_modules[name]
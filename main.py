@@ -1,8 +1,39 @@
 import pygame
+import random
+import subprocess
 import sys
+import time
 from game_loop import GameLoop
 from ui import MainMenu
 from story_screen import StoryScreen
+from profiler import profiler
+from frame_scheduler import FrameScheduler
+from lazy_imports import lazy_import
+from scenarios import load_scenario, ScenarioError
+import replay
+
+# El guardado automático se carga al empezar la primera partida
+autosave = lazy_import("autosave")
+telemetry = lazy_import("telemetry")
+trajectory = lazy_import("trajectory")
+spectator = lazy_import("spectator")
+
+# Fichero donde se guardan los tiempos medidos al salir (con --profile)
+PROFILE_OUTPUT = "profile_stats.json"
+
+# Formato de exportación de estadísticas diarias (con --telemetry[=csv|arrow|parquet])
+TELEMETRY_FORMAT = None
+TELEMETRY_DIR = "telemetry"
+
+# Historial en fichero mapeado en memoria (con --trajectory)
+TRAJECTORY = False
+TRAJECTORY_DIR = "trajectory"
+
+# Escenario de las partidas (con --scenario=NOMBRE o --scenario=fichero.json)
+SCENARIO = None
+
+# Espectadores en procesos aparte alimentados por memoria compartida (con --spectator[=N])
+SPECTATORS = 0
 
 def main():
     """Función principal del juego"""
@@ -24,8 +55,11 @@ def main():
     except:
         pass  # Si no se puede crear el icono, continuar sin él
     
-    clock = pygame.time.Clock()
-    FPS = 60
+    # 60 FPS con animaciones; en reposo espera a la siguiente entrada
+    scheduler = FrameScheduler()
+    
+    # El escenario se valida y carga una sola vez, antes del menú
+    scenario = load_scenario(SCENARIO)
     
     # Estados del juego
     game_state = "menu"  # "menu", "story", "playing"
@@ -33,72 +67,175 @@ def main():
     story_screen = None
     game_loop = None
     selected_difficulty = None
+    autosave_service = None
+    
+    # Estado publicado para los espectadores
+    publisher = None
+    spectator_processes = []
+    if SPECTATORS:
+        publisher = spectator.StatePublisher()
+        spectator_processes = [spectator.launch(publisher.name, SCENARIO) for _ in range(SPECTATORS)]
     
     # Variables para controlar transiciones
     fade_surface = None
     fade_alpha = 0
     fade_direction = 0  # 0: no fade, 1: fade out, -1: fade in
     
-    running = True
-    while running:
-        dt = clock.tick(FPS) / 1000.0  # Delta time en segundos
-        
-        # Manejo de eventos
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+    overlay_shown = False
+    
+    # La limpieza se hace también si el bucle termina con una excepción
+    try:
+        running = True
+        frame_start = time.perf_counter_ns()
+        while running:
+            animating = (game_state == "menu" or
+                         (game_state == "story" and story_screen.is_animating()) or
+                         (game_state == "playing" and game_loop.is_animating()))
+            events, dt = scheduler.next_frame(animating)  # dt real en segundos
+            
+            # Tiempo total del fotograma anterior (incluye la espera del planificador)
+            now = time.perf_counter_ns()
+            profiler.record("frame", now - frame_start)
+            frame_start = now
             
-            elif game_state == "menu":
-                result = menu.handle_event(event)
-                if result == "quit":
+            # Manejo de eventos
+            for event in events:
+                if profiler.handle_event(event):
+                    continue
+                
+                if event.type == pygame.QUIT:
                     running = False
-                elif result in ["easy", "normal", "expert"]:
-                    selected_difficulty = result
-                    story_screen = StoryScreen(screen, result)
-                    game_state = "story"
-                    start_fade_transition()
+                
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    # La ventana se ha vuelto a mostrar: repintarla entera
+                    if game_loop:
+                        game_loop.compositor.invalidate()
+                
+                elif game_state == "menu":
+                    result = menu.handle_event(event)
+                    if result == "quit":
+                        running = False
+                    elif result in ["easy", "normal", "expert"]:
+                        selected_difficulty = result
+                        story_screen = StoryScreen(screen, result)
+                        game_state = "story"
+                        start_fade_transition()
+                
+                elif game_state == "story":
+                    result = story_screen.handle_event(event)
+                    if result == "start_game":
+                        if autosave_service is None:
+                            autosave_service = autosave.AutosaveService()
+                        # Semilla propia de la partida: permite grabarla y repetirla
+                        seed = random.randrange(2 ** 32)
+                        history = None
+                        if TRAJECTORY:
+                            history = trajectory.TrajectoryHistory(
+                                f"{TRAJECTORY_DIR}/partida_{seed}.traj",
+                                {'seed': seed, 'difficulty': selected_difficulty,
+                                 'scenario': scenario.source})
+                        game_loop = GameLoop(screen, selected_difficulty, autosave=autosave_service,
+                                             seed=seed, history=history, scenario=scenario)
+                        replay.Recorder(game_loop)
+                        if publisher is not None:
+                            publisher.attach(game_loop)
+                        if TELEMETRY_FORMAT:
+                            sink = telemetry.open_sink(TELEMETRY_FORMAT, f"{TELEMETRY_DIR}/partida_{seed}")
+                            game_loop.attach_telemetry(telemetry.TelemetryWriter(sink, run=seed))
+                        game_state = "playing"
+                        start_fade_transition()
+                
+                elif game_state == "playing":
+                    result = game_loop.handle_event(event)
+                    if result == "menu":
+                        # Limpiar recursos del juego
+                        finish_game(game_loop)
+                        game_loop = None
+                        if publisher is not None:
+                            publisher.attach(None)
+                        game_state = "menu"
+                        start_fade_transition()
+                        overlay_shown = False
             
+            # Actualización de estados
+            if game_state == "menu":
+                menu.update()
             elif game_state == "story":
-                result = story_screen.handle_event(event)
-                if result == "start_game":
-                    game_loop = GameLoop(screen, selected_difficulty)
-                    game_state = "playing"
-                    start_fade_transition()
+                story_screen.update()
+            elif game_state == "playing":
+                game_loop.update(dt)
+                if publisher is not None:
+                    publisher.publish()
             
+            # Renderizado
+            dirty_rects = None  # None = actualizar la pantalla completa
+            if game_state == "menu":
+                menu.draw()
+            elif game_state == "story":
+                story_screen.draw()
             elif game_state == "playing":
-                result = game_loop.handle_event(event)
-                if result == "menu":
-                    # Limpiar recursos del juego
-                    game_loop = None
-                    game_state = "menu"
-                    start_fade_transition()
-        
-        # Actualización de estados
-        if game_state == "menu":
-            menu.update()
-        elif game_state == "story":
-            story_screen.update()
-        elif game_state == "playing":
-            game_loop.update()
+                dirty_rects = game_loop.draw()
+            
+            # Efectos de transición (opcional)
+            draw_fade_effect(screen)
+            
+            # Panel de tiempos (solo con --profile, se alterna con F3)
+            if profiler.enabled and profiler.overlay_visible:
+                profiler.draw_overlay(screen)
+                dirty_rects = None
+                overlay_shown = True
+            elif overlay_shown:
+                # Al ocultar el panel hay que repintar lo que tapaba
+                overlay_shown = False
+                if game_loop:
+                    game_loop.compositor.invalidate()
+            
+            # Actualizar pantalla: solo las zonas que han cambiado durante la partida
+            if dirty_rects is None:
+                pygame.display.flip()
+            elif dirty_rects:
+                pygame.display.update(dirty_rects)
+    finally:
+        if game_loop is not None:
+            finish_game(game_loop)
         
-        # Renderizado
-        if game_state == "menu":
-            menu.draw()
-        elif game_state == "story":
-            story_screen.draw()
-        elif game_state == "playing":
-            game_loop.draw()
+        # Los espectadores se cierran al ver el bloque marcado como cerrado
+        if publisher is not None:
+            publisher.close()
+            for process in spectator_processes:
+                try:
+                    process.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    process.terminate()
         
-        # Efectos de transición (opcional)
-        draw_fade_effect(screen)
+        # Terminar de escribir la partida automática antes de salir
+        if autosave_service is not None:
+            autosave_service.close()
         
-        # Actualizar pantalla
-        pygame.display.flip()
+        # Guardar los tiempos medidos
+        if profiler.enabled:
+            profiler.dump_json(PROFILE_OUTPUT)
+            print(f"Tiempos guardados en {PROFILE_OUTPUT}")
     
     # Limpieza
     pygame.quit()
     sys.exit()
 
+def finish_game(game_loop):
+    """Guarda la repetición y cierra la telemetría y el historial de la partida que termina"""
+    save_replay(game_loop)
+    if game_loop.telemetry is not None:
+        game_loop.telemetry.close()
+    if hasattr(game_loop.history, 'close'):
+        game_loop.history.close()
+
+def save_replay(game_loop):
+    """Guarda la grabación de la partida para poder repetirla con replay.py"""
+    try:
+        game_loop.recorder.save(replay.REPLAY_PATH)
+    except OSError as e:
+        print(f"No se pudo guardar la repetición: {e}")
+
 def start_fade_transition():
     """Inicia un efecto de transición (opcional)"""
     # Esta función podría implementar efectos de transición
@@ -191,17 +328,18 @@ def handle_error(error_message):
 
 def check_dependencies():
     """Verifica que todas las dependencias necesarias estén disponibles"""
-    try:
-        import numpy
-        import matplotlib.pyplot
-        import matplotlib.backends.backend_agg
-        return True
-    except ImportError as e:
-        error_msg = f"Dependencia faltante: {str(e)}\n\n"
+    # Solo se comprueba que estén instaladas: importarlas aquí retrasaría el
+    # arranque, y NumPy no se usa hasta cargar el escenario
+    from importlib.util import find_spec
+    
+    missing = [name for name in ("numpy",) if find_spec(name) is None]
+    if missing:
+        error_msg = f"Dependencia faltante: {', '.join(missing)}\n\n"
         error_msg += "Instala las dependencias necesarias:\n"
-        error_msg += "pip install numpy matplotlib"
+        error_msg += "pip install " + " ".join(missing)
         handle_error(error_msg)
         return False
+    return True
 
 def print_game_info():
     """Imprime información del juego en la consola"""
@@ -213,7 +351,12 @@ def print_game_info():
     print("CONTROLES:")
     print("  ESPACIO/ENTER - Avanzar día")
     print("  P - Pausar/Reanudar")
+    print("  1/2/3/4 - Avance automático (1, 5, 50 días/s o máximo)")
+    print("  0 - Volver al avance manual")
+    print("  F5 / F9 - Guardado rápido / Carga rápida")
+    print("  Mayús + F9 - Cargar la partida automática")
     print("  ESC - Volver al menú (en estadísticas)")
+    print("  F3 - Panel de tiempos (con --profile)")
     print("  Click en mapa - Seleccionar continente")
     print()
     print("OBJETIVO:")
@@ -231,6 +374,48 @@ def print_game_info():
     print()
 
 if __name__ == "__main__":
+    # Instrumentación opcional de tiempos
+    if "--profile" in sys.argv:
+        profiler.enabled = True
+    
+    # Ventanas de espectador (por ejemplo, la pantalla del profesor)
+    for arg in sys.argv[1:]:
+        if arg == "--spectator":
+            SPECTATORS = 1
+        elif arg.startswith("--spectator="):
+            value = arg.split("=", 1)[1]
+            if not value.isdigit():
+                print(f"ERROR: número de espectadores no válido: {value}")
+                sys.exit(1)
+            SPECTATORS = int(value)
+    
+    # Escenario: regiones, poblaciones y rutas de vuelo (ver scenarios/)
+    for arg in sys.argv[1:]:
+        if arg.startswith("--scenario="):
+            SCENARIO = arg.split("=", 1)[1]
+    try:
+        load_scenario(SCENARIO)
+    except ScenarioError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    
+    # Historial en disco para partidas muy largas o con muchas regiones
+    if "--trajectory" in sys.argv:
+        TRAJECTORY = True
+    
+    # Exportación opcional de estadísticas diarias
+    for arg in sys.argv[1:]:
+        if arg == "--telemetry":
+            TELEMETRY_FORMAT = "csv"
+        elif arg.startswith("--telemetry="):
+            TELEMETRY_FORMAT = arg.split("=", 1)[1]
+    if TELEMETRY_FORMAT:
+        try:
+            telemetry.check_format(TELEMETRY_FORMAT)
+        except (ValueError, ImportError) as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+    
     # Verificar dependencias
     if not check_dependencies():
         sys.exit(1)
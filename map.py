@@ -2,6 +2,13 @@ import pygame
 import math
 import time
 import random
+from render_cache import get_font
+from scenarios import load_scenario
+from profiler import timed
+from lazy_imports import lazy_import
+
+# NumPy solo se usa al colocar los polígonos del escenario
+np = lazy_import("numpy")
 
 class InfectionParticle:
     def __init__(self, start_pos, end_pos, infection_level):
@@ -66,90 +73,50 @@ class InfectionParticle:
         screen.blit(particle_surface, (self.current_pos[0] - self.size, self.current_pos[1] - self.size))
 
 class WorldMap:
-    def __init__(self, screen):
+    def __init__(self, screen, scenario=None):
         self.screen = screen  
         self.map_rect = pygame.Rect(10, 200, 500, 400)  
-        self.font = pygame.font.Font(None, 20)
-        self.font_small = pygame.font.Font(None, 16)
-        self.font_title = pygame.font.Font(None, 24)
+        self.font = get_font(20)
+        self.font_small = get_font(16)
+        self.font_title = get_font(24)
         
         # Inicializar listas vacías
         self.infection_particles = []
         self.airports = {}
         self.flight_connections = []
-        self.continent_colors = [None, None, None]
-        self.target_colors = [None, None, None]
         self.warning_continents = set()
         self.pulse_time = 0
+        self.animation_frame = 0  # cambia mientras haya partículas en movimiento
         self.last_particle_time = time.time()
         self.color_transition_speed = 2.0
 
-        # --- INICIALIZACIÓN DE REGIONES, AEROPUERTOS Y CONEXIONES ---
+        # --- REGIONES, AEROPUERTOS Y CONEXIONES DEL ESCENARIO ---
+        self.set_scenario(load_scenario(scenario))
+
+    def set_scenario(self, scenario):
+        """Pasa los polígonos, aeropuertos y rutas del escenario a píxeles del mapa"""
+        self.scenario = scenario
         map_x, map_y = self.map_rect.x, self.map_rect.y
-        map_w, map_h = self.map_rect.width, self.map_rect.height
-
-        self.continent_regions = {
-            0: {  # América
-                'name': 'América',
-                'center': (map_x + int(map_w * 0.25), map_y + int(map_h * 0.5)),
-                'points': [
-                    (map_x + int(map_w * 0.1), map_y + int(map_h * 0.2)),
-                    (map_x + int(map_w * 0.15), map_y + int(map_h * 0.15)),
-                    (map_x + int(map_w * 0.25), map_y + int(map_h * 0.18)),
-                    (map_x + int(map_w * 0.32), map_y + int(map_h * 0.25)),
-                    (map_x + int(map_w * 0.38), map_y + int(map_h * 0.45)),
-                    (map_x + int(map_w * 0.35), map_y + int(map_h * 0.75)),
-                    (map_x + int(map_w * 0.30), map_y + int(map_h * 0.85)),
-                    (map_x + int(map_w * 0.20), map_y + int(map_h * 0.88)),
-                    (map_x + int(map_w * 0.12), map_y + int(map_h * 0.85)),
-                    (map_x + int(map_w * 0.08), map_y + int(map_h * 0.65)),
-                    (map_x + int(map_w * 0.06), map_y + int(map_h * 0.35)),
-                ]
-            },
-            1: {  # Europa-África
-                'name': 'Europa-África',
-                'center': (map_x + int(map_w * 0.55), map_y + int(map_h * 0.5)),
-                'points': [
-                    (map_x + int(map_w * 0.45), map_y + int(map_h * 0.18)),
-                    (map_x + int(map_w * 0.60), map_y + int(map_h * 0.12)),
-                    (map_x + int(map_w * 0.68), map_y + int(map_h * 0.15)),
-                    (map_x + int(map_w * 0.72), map_y + int(map_h * 0.25)),
-                    (map_x + int(map_w * 0.75), map_y + int(map_h * 0.45)),
-                    (map_x + int(map_w * 0.72), map_y + int(map_h * 0.75)),
-                    (map_x + int(map_w * 0.65), map_y + int(map_h * 0.88)),
-                    (map_x + int(map_w * 0.52), map_y + int(map_h * 0.85)),
-                    (map_x + int(map_w * 0.42), map_y + int(map_h * 0.75)),
-                    (map_x + int(map_w * 0.40), map_y + int(map_h * 0.45)),
-                ]
-            },
-            2: {  # Asia-Oceanía
-                'name': 'Asia-Oceanía',
-                'center': (map_x + int(map_w * 0.85), map_y + int(map_h * 0.45)),
-                'points': [
-                    (map_x + int(map_w * 0.78), map_y + int(map_h * 0.12)),
-                    (map_x + int(map_w * 0.92), map_y + int(map_h * 0.10)),
-                    (map_x + int(map_w * 0.98), map_y + int(map_h * 0.18)),
-                    (map_x + int(map_w * 0.96), map_y + int(map_h * 0.35)),
-                    (map_x + int(map_w * 0.98), map_y + int(map_h * 0.55)),
-                    (map_x + int(map_w * 0.94), map_y + int(map_h * 0.75)),
-                    (map_x + int(map_w * 0.88), map_y + int(map_h * 0.82)),
-                    (map_x + int(map_w * 0.82), map_y + int(map_h * 0.78)),
-                    (map_x + int(map_w * 0.78), map_y + int(map_h * 0.55)),
-                    (map_x + int(map_w * 0.76), map_y + int(map_h * 0.28)),
-                ]
+        size = np.array([self.map_rect.width, self.map_rect.height], dtype='<f8')
+        offset = np.array([map_x, map_y], dtype=np.int64)
+
+        # Mismo redondeo que map_x + int(map_w * fracción), de una vez para todos los puntos
+        points = (offset + (scenario.points * size).astype(np.int64)).tolist()
+        centers = (offset + (scenario.centers * size).astype(np.int64)).tolist()
+        airports = (offset + (scenario.airports * size).astype(np.int64)).tolist()
+        bounds = scenario.polygon_offsets.tolist()
+
+        self.continent_regions = {}
+        for idx, name in enumerate(scenario.region_names):
+            self.continent_regions[idx] = {
+                'name': name,
+                'center': tuple(centers[idx]),
+                'points': [tuple(point) for point in points[bounds[idx]:bounds[idx + 1]]]
             }
-        }
-
-        self.airports = {
-            0: (map_x + int(map_w * 0.28), map_y + int(map_h * 0.45)),
-            1: (map_x + int(map_w * 0.58), map_y + int(map_h * 0.42)),
-            2: (map_x + int(map_w * 0.88), map_y + int(map_h * 0.38))
-        }
-
-        self.flight_connections = [(0, 1), (1, 2), (0, 2)]
-        # ----------------------------------------------------------
-
-        # El resto de tu inicialización...
+        self.airports = {idx: tuple(pos) for idx, pos in enumerate(airports)}
+        self.flight_connections = scenario.route_pairs()
+        self.continent_colors = [None] * len(scenario)
+        self.target_colors = [None] * len(scenario)
 
     def draw_selection_info(self, selected_continent):
         # Ya NO inicialices self.continent_regions, self.airports ni self.flight_connections aquí.
@@ -167,7 +134,10 @@ class WorldMap:
             particle.update(dt)
         # Elimina las partículas que ya no están activas
         self.infection_particles = [p for p in self.infection_particles if p.active]
+        if self.infection_particles:
+            self.animation_frame += 1
 
+    @timed("WorldMap.draw")
     def draw(self, continents, selected_continent):
         # Dibuja el mapa base
         pygame.draw.rect(self.screen, (40, 60, 100), self.map_rect, border_radius=20)
@@ -0,0 +1,103 @@
+import pygame
+import numpy as np
+
+# Niveles de transparencia precalculados para cada sprite
+ALPHA_LEVELS = 16
+
+
+class ParticleField:
+    """Campo de partículas almacenado en arrays de NumPy
+
+    Posiciones, velocidades y vida se actualizan con operaciones vectoriales;
+    el envolvimiento en los bordes y la regeneración de partículas muertas se
+    hacen con máscaras en lugar de recorrer la lista. Los sprites se generan
+    una sola vez por (color, tamaño) y nivel de transparencia.
+    """
+
+    def __init__(self, count, bounds, colors, velocity_range, respawn_colors=None,
+                 size_range=(2, 6), life_range=(3, 6), seed=None):
+        self.count = count
+        self.width, self.height = bounds
+        self.velocity_range = velocity_range  # ((vx_min, vx_max), (vy_min, vy_max))
+        self.size_range = size_range
+        self.life_range = life_range
+        self.rng = np.random.default_rng(seed)
+
+        # Paleta única: colores iniciales seguidos de los exclusivos de regeneración
+        respawn_colors = list(respawn_colors or colors)
+        self.colors = list(colors) + [c for c in respawn_colors if c not in colors]
+        self._respawn_idx = np.array([self.colors.index(c) for c in respawn_colors])
+
+        self.x = self.rng.uniform(0, self.width, count)
+        self.y = self.rng.uniform(0, self.height, count)
+        self.vx = np.empty(count)
+        self.vy = np.empty(count)
+        self.size = np.empty(count, dtype=np.int64)
+        self.life = np.empty(count)
+        self.color_idx = self.rng.integers(0, len(colors), count)
+        self._randomize(np.ones(count, dtype=bool))
+
+        self._sprites = {}
+
+    def __len__(self):
+        return self.count
+
+    def _randomize(self, mask):
+        """Asigna velocidad, tamaño y vida aleatorios a las partículas de la máscara"""
+        n = int(mask.sum())
+        if n == 0:
+            return
+        (vx_min, vx_max), (vy_min, vy_max) = self.velocity_range
+        self.vx[mask] = self.rng.uniform(vx_min, vx_max, n)
+        self.vy[mask] = self.rng.uniform(vy_min, vy_max, n)
+        self.size[mask] = self.rng.integers(self.size_range[0], self.size_range[1] + 1, n)
+        self.life[mask] = self.rng.uniform(self.life_range[0], self.life_range[1], n)
+
+    def update(self, dt):
+        """Mueve las partículas, las envuelve en los bordes y regenera las muertas"""
+        self.x += self.vx * 60 * dt
+        self.y += self.vy * 60 * dt
+        self.life -= dt
+
+        # Envolver partículas
+        self.x[self.x < 0] = self.width
+        self.x[self.x > self.width] = 0
+        self.y[self.y < 0] = self.height
+        self.y[self.y > self.height] = 0
+
+        # Regenerar partículas muertas desde el borde inferior
+        dead = self.life <= 0
+        n_dead = int(dead.sum())
+        if n_dead:
+            self.x[dead] = self.rng.uniform(0, self.width, n_dead)
+            self.y[dead] = self.height
+            self.color_idx[dead] = self.rng.choice(self._respawn_idx, n_dead)
+            self._randomize(dead)
+
+    def _get_sprites(self, color_idx, size):
+        """Sprites de un (color, tamaño) para cada nivel de transparencia"""
+        key = (color_idx, size)
+        sprites = self._sprites.get(key)
+        if sprites is None:
+            color = self.colors[color_idx]
+            sprites = []
+            for level in range(ALPHA_LEVELS):
+                alpha = int(255 * (level + 1) / ALPHA_LEVELS)
+                sprite = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, (*color, alpha), (size, size), size)
+                sprites.append(sprite)
+            self._sprites[key] = sprites
+        return sprites
+
+    def draw(self, surface):
+        """Dibuja todas las partículas con una sola llamada a blits"""
+        alpha = np.clip(self.life * 85, 50, 255)
+        levels = (alpha * ALPHA_LEVELS / 256).astype(np.int64)
+        left = (self.x - self.size).astype(np.int64)
+        top = (self.y - self.size).astype(np.int64)
+
+        blit_list = []
+        for color_idx, size, level, px, py in zip(self.color_idx.tolist(), self.size.tolist(),
+                                                  levels.tolist(), left.tolist(), top.tolist()):
+            blit_list.append((self._get_sprites(color_idx, size)[level], (px, py)))
+        surface.blits(blit_list, doreturn=False)
@@ -0,0 +1,181 @@
+import json
+import os
+import time
+from array import array
+from functools import wraps
+
+# Número de muestras que se conservan por ámbito
+RING_SIZE = 600
+
+
+class RingBuffer:
+    """Últimas duraciones (en nanosegundos) de un ámbito de medición"""
+
+    def __init__(self, size=RING_SIZE):
+        self.samples = array('q', bytes(8 * size))
+        self.size = size
+        self.index = 0
+        self.count = 0
+        self.total_calls = 0
+
+    def add(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.total_calls += 1
+
+    def values(self):
+        return self.samples[:self.count] if self.count < self.size else self.samples[:]
+
+    def percentiles(self, *quantiles):
+        """Percentiles en milisegundos de las muestras actuales"""
+        ordered = sorted(self.values())
+        if not ordered:
+            return [0.0 for _ in quantiles]
+        last = len(ordered) - 1
+        return [ordered[min(last, int(round(q / 100 * last)))] / 1e6 for q in quantiles]
+
+
+class _Scope:
+    """Context manager que mide el tiempo de un bloque"""
+    __slots__ = ("buffer", "start")
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.buffer.add(time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NullScope:
+    """Ámbito vacío que se usa cuando el perfilador está desactivado"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class Profiler:
+    """Mide tiempos por subsistema y los muestra en un panel superpuesto
+
+    Desactivado por defecto: se activa con la opción --profile o con la
+    variable de entorno EPIDEMIA_PROFILE=1.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.buffers = {}
+        self.overlay_visible = False
+        self.overlay_surface = None
+        self.overlay_refresh = 0.5  # segundos entre actualizaciones del panel
+        self.last_overlay_update = 0.0
+
+    def _buffer(self, name):
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            buffer = RingBuffer()
+            self.buffers[name] = buffer
+        return buffer
+
+    def scope(self, name):
+        """Devuelve un context manager que mide el bloque con el nombre dado"""
+        if not self.enabled:
+            return _NULL_SCOPE
+        return _Scope(self._buffer(name))
+
+    def record(self, name, duration_ns):
+        """Registra una duración medida externamente"""
+        if self.enabled:
+            self._buffer(name).add(duration_ns)
+
+    def summary(self):
+        """Estadísticas por ámbito: p50, p95, p99 y máximo en milisegundos"""
+        result = {}
+        for name, buffer in self.buffers.items():
+            p50, p95, p99, p100 = buffer.percentiles(50, 95, 99, 100)
+            result[name] = {
+                'calls': buffer.total_calls,
+                'samples': buffer.count,
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+                'max_ms': p100
+            }
+        return result
+
+    def dump_json(self, path):
+        """Guarda el resumen en un fichero JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+
+    def handle_event(self, event):
+        """F3 muestra u oculta el panel de tiempos"""
+        import pygame
+        if self.enabled and event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.overlay_visible = not self.overlay_visible
+            self.overlay_surface = None
+            return True
+        return False
+
+    def draw_overlay(self, screen):
+        """Dibuja el panel de tiempos (se actualiza cada overlay_refresh segundos)"""
+        if not (self.enabled and self.overlay_visible):
+            return
+        now = time.perf_counter()
+        if self.overlay_surface is None or now - self.last_overlay_update >= self.overlay_refresh:
+            self.overlay_surface = self._render_overlay()
+            self.last_overlay_update = now
+        screen.blit(self.overlay_surface, (screen.get_width() - self.overlay_surface.get_width() - 10, 10))
+
+    def _render_overlay(self):
+        # Importaciones locales: session.py usa el perfilador también sin pantalla
+        import pygame
+        from render_cache import get_font
+        font = get_font(18)
+        lines = [("ámbito", "p50", "p95", "p99")]
+        for name, stats in self.summary().items():
+            lines.append((name, f"{stats['p50_ms']:.2f}", f"{stats['p95_ms']:.2f}", f"{stats['p99_ms']:.2f}"))
+
+        columns = [170, 55, 55, 55]
+        surface = pygame.Surface((sum(columns) + 20, len(lines) * 16 + 30), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 190))
+        surface.blit(font.render("Tiempos (ms) - F3 para ocultar", True, (255, 255, 100)), (10, 6))
+        for row, line in enumerate(lines):
+            x = 10
+            color = (180, 180, 180) if row == 0 else (255, 255, 255)
+            for width, text in zip(columns, line):
+                surface.blit(font.render(text, True, color), (x, 24 + row * 16))
+                x += width
+        return surface
+
+
+def _env_enabled():
+    return os.environ.get("EPIDEMIA_PROFILE", "") not in ("", "0")
+
+
+# Perfilador compartido por todo el juego
+profiler = Profiler(enabled=_env_enabled())
+
+
+def timed(name):
+    """Decorador que mide cada llamada al método con el perfilador compartido"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.scope(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,129 @@
+import pygame
+from collections import OrderedDict
+from lazy_imports import lazy_import
+
+# NumPy solo se necesita al generar fondos, no al arrancar
+np = lazy_import("numpy")
+
+# Registro de fuentes compartido por todo el proceso: (nombre, tamaño) -> Font
+_fonts = {}
+
+
+def get_font(size, name=None):
+    """Devuelve una fuente compartida en lugar de crear una nueva cada vez"""
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(name, size)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    """Caché LRU de superficies de texto ya renderizadas
+
+    La clave es (fuente, texto, color, antialias), de modo que las etiquetas
+    fijas se renderizan una sola vez y solo los valores que cambian generan
+    superficies nuevas.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def render(self, font, text, color, antialias=True):
+        """Equivalente a font.render(text, antialias, color) con caché"""
+        key = (font, text, tuple(color), antialias)
+        surface = self._entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self._entries[key] = surface
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return surface
+
+    def get_stats(self):
+        """Contadores de aciertos y fallos de la caché"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+text_cache = TextCache()
+
+
+def render_text(font, text, color, antialias=True):
+    """Renderiza texto usando la caché compartida"""
+    return text_cache.render(font, text, color, antialias)
+
+
+# Fondos ya generados: (tamaño, paleta, paso) -> Surface
+_backgrounds = OrderedDict()
+MAX_BACKGROUNDS = 8
+
+# Paletas de los fondos con gradiente vertical: (color superior, color inferior)
+STORY_PALETTE = ((30, 30, 40), (0, 0, 10))
+VICTORY_PALETTE = ((50, 25, 20), (80, 40, 20))
+DEFEAT_PALETTE = ((20, 10, 20 / 3), (35, 17.5, 35 / 3))
+
+
+def build_gradient(size, palette, step=1):
+    """Genera un gradiente vertical en bandas de step píxeles con NumPy"""
+    width, height = size
+    top, bottom = (np.asarray(color, dtype=np.float64) for color in palette)
+
+    # Cada banda toma el color de su primera fila
+    bands = (np.arange(height) // step) * step
+    progress = (bands / max(height, 1))[:, None]
+    rows = np.floor(top + (bottom - top) * progress).clip(0, 255).astype(np.uint8)
+
+    surface = pygame.Surface(size)
+    pixels = np.ascontiguousarray(np.broadcast_to(rows[None, :, :], (width, height, 3)))
+    pygame.surfarray.blit_array(surface, pixels)
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    return surface
+
+
+def get_gradient_background(size, palette, step=1):
+    """Devuelve un fondo con gradiente, generándolo solo la primera vez
+
+    El tamaño forma parte de la clave, así que un cambio de tamaño de la
+    ventana produce un fondo nuevo automáticamente.
+    """
+    key = (tuple(size), palette, step)
+    surface = _backgrounds.get(key)
+    if surface is None:
+        surface = build_gradient(size, palette, step)
+        _backgrounds[key] = surface
+        if len(_backgrounds) > MAX_BACKGROUNDS:
+            _backgrounds.popitem(last=False)
+    else:
+        _backgrounds.move_to_end(key)
+    return surface
+
+
+def reset():
+    """Vacía fuentes, textos y fondos (necesario si se reinicia pygame)"""
+    _fonts.clear()
+    text_cache.clear()
+    _backgrounds.clear()
@@ -0,0 +1,234 @@
+"""Grabación y repetición determinista de partidas
+
+Una repetición guarda solo la semilla, la dificultad, el escenario y las acciones del
+jugador (avanzar N días, aplicar una decisión), junto con un hash
+acumulado del estado al final de cada día. Al repetirla, una GameSession
+sin pantalla vuelve a ejecutar las acciones y comprueba el hash día a día,
+de modo que cualquier diferencia se detecta en el primer día en que aparece.
+
+Uso:
+    python replay.py [partida.replay ...] [--no-verify]
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+
+from lazy_imports import lazy_import
+
+# Solo hace falta para las repeticiones que empiezan en una partida cargada
+savegame = lazy_import("savegame")
+
+REPLAY_VERSION = 1
+
+# Última partida jugada (se escribe al volver al menú o al salir)
+REPLAY_PATH = "last_game.replay"
+
+# Bytes de cada hash diario
+HASH_SIZE = 8
+
+
+def state_hash(session, previous=b""):
+    """Hash del estado de la sesión encadenado con el del día anterior"""
+    h = hashlib.blake2b(previous, digest_size=HASH_SIZE)
+    h.update(struct.pack("<i", session.day))
+    h.update(session.game_state.encode("ascii"))
+    values = []
+    for continent in session.continents:
+        values.extend((continent.S, continent.E, continent.I, continent.R,
+                       continent.deaths, continent.economy, continent.morale))
+    h.update(struct.pack(f"<{len(values)}d", *values))
+    return h.digest()
+
+
+class ReplayDivergence(Exception):
+    """La repetición se separa de la grabación"""
+
+    def __init__(self, day, message):
+        super().__init__(f"Día {day}: {message}")
+        self.day = day
+
+
+class Recorder:
+    """Graba las acciones de una sesión y el hash de su estado cada día
+
+    Se engancha como session.recorder; GameSession le avisa de cada día
+    simulado, de cada avance y de cada decisión aplicada.
+    """
+
+    def __init__(self, session):
+        if session.seed is None:
+            raise ValueError("La sesión necesita una semilla para poder repetirse")
+        self.seed = session.seed
+        self.restart(session)
+        session.recorder = self
+
+    def restart(self, session, start_save=None):
+        """Empieza una grabación nueva desde el estado actual de la sesión
+
+        Tras cargar una partida se guarda ese estado como punto de partida.
+        """
+        self.difficulty = session.difficulty
+        self.scenario = session.scenario.source
+        self.max_days = session.max_days
+        self.start_save = start_save
+        self.actions = []
+        self.hashes = [state_hash(session)]
+
+    def restart_from_save(self, session):
+        """Reinicia la grabación tomando como inicio una copia de la sesión"""
+        self.restart(session, savegame.encode(savegame.snapshot(session)))
+
+    def record_day(self, session):
+        self.hashes.append(state_hash(session, self.hashes[-1]))
+
+    def record_advance(self, days):
+        self.actions.append(["advance", days])
+
+    def record_decision(self, decision_id, continent_idx):
+        self.actions.append(["decision", decision_id, continent_idx])
+
+    def to_dict(self):
+        return {
+            'version': REPLAY_VERSION,
+            'seed': self.seed,
+            'difficulty': self.difficulty,
+            'scenario': self.scenario,
+            'max_days': self.max_days,
+            'start_save': base64.b64encode(self.start_save).decode("ascii") if self.start_save else None,
+            'actions': self.actions,
+            'hashes': b"".join(self.hashes).hex(),
+        }
+
+    def save(self, path=REPLAY_PATH):
+        """Escribe la grabación como JSON compacto"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+def load(path=REPLAY_PATH):
+    """Lee una grabación"""
+    with open(path, encoding="utf-8") as f:
+        recording = json.load(f)
+    if recording.get('version') != REPLAY_VERSION:
+        raise ValueError(f"Versión de repetición no compatible: {recording.get('version')}")
+    return recording
+
+
+class _Verifier:
+    """Sustituye al grabador durante la repetición y compara los hashes"""
+
+    def __init__(self, hashes, verify):
+        self.expected = [hashes[i:i + HASH_SIZE] for i in range(0, len(hashes), HASH_SIZE)]
+        self.verify = verify
+        self.current = None
+        self.checked = 0
+
+    def start(self, session):
+        self.current = state_hash(session)
+        self._check(session)
+
+    def _check(self, session):
+        if not self.verify:
+            return
+        if self.checked >= len(self.expected):
+            raise ReplayDivergence(session.day, "la repetición simula más días que la grabación")
+        if self.current != self.expected[self.checked]:
+            raise ReplayDivergence(session.day, "el estado no coincide con la grabación")
+        self.checked += 1
+
+    def record_day(self, session):
+        self.current = state_hash(session, self.current)
+        self._check(session)
+
+    def record_advance(self, days):
+        pass
+
+    def record_decision(self, decision_id, continent_idx):
+        pass
+
+
+class ReplayResult:
+    """Resultado de una repetición"""
+
+    def __init__(self, session, days, checked, seconds):
+        self.session = session
+        self.days = days
+        self.checked = checked
+        self.seconds = seconds
+
+    @property
+    def days_per_second(self):
+        return self.days / self.seconds if self.seconds > 0 else float("inf")
+
+
+def replay(recording, verify=True):
+    """Vuelve a ejecutar una grabación sin pantalla
+
+    Lanza ReplayDivergence en el primer día cuyo estado no coincide (si
+    verify) o si una acción grabada ya no puede ejecutarse.
+    """
+    # Importación local: la grabación no necesita cargar la simulación
+    from session import GameSession
+
+    started = time.perf_counter()
+    session = GameSession(recording['difficulty'], seed=recording['seed'],
+                          scenario=recording.get('scenario'))
+    session.max_days = recording['max_days']
+    if recording['start_save']:
+        savegame.restore(session, savegame.decode(base64.b64decode(recording['start_save'])))
+
+    verifier = _Verifier(bytes.fromhex(recording['hashes']), verify)
+    verifier.start(session)
+    session.recorder = verifier
+
+    days = 0
+    for action in recording['actions']:
+        if action[0] == "advance":
+            advanced = session.advance_days(action[1])
+            if advanced != action[1]:
+                raise ReplayDivergence(session.day, f"se avanzaron {advanced} días de {action[1]}")
+            days += advanced
+        elif action[0] == "decision":
+            if not session.apply_decision(action[1], action[2]):
+                raise ReplayDivergence(session.day, f"no se pudo aplicar la decisión {action[1]}")
+        else:
+            raise ValueError(f"Acción desconocida: {action[0]}")
+
+    if verify and verifier.checked != len(verifier.expected):
+        raise ReplayDivergence(session.day, "la repetición termina antes que la grabación")
+
+    return ReplayResult(session, days, verifier.checked, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repite partidas grabadas sin pantalla")
+    parser.add_argument("paths", nargs="*", default=[REPLAY_PATH], help="ficheros .replay")
+    parser.add_argument("--no-verify", action="store_true",
+                        help="no comparar el estado con la grabación (p. ej. tras cambiar el modelo)")
+    args = parser.parse_args()
+
+    failures = 0
+    for path in args.paths:
+        try:
+            result = replay(load(path), verify=not args.no_verify)
+        except ReplayDivergence as e:
+            print(f"{path}: DIVERGENCIA - {e}")
+            failures += 1
+            continue
+        session = result.session
+        stats = session.simulator.get_global_stats()
+        print(f"{path}: {result.days} días en {result.seconds * 1000:.1f} ms "
+              f"({result.days_per_second:.0f} días/s), {result.checked} hashes comprobados, "
+              f"final: {session.game_state} día {session.day}, muertes {stats['deaths']}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,580 @@
+"""Guardado y carga de partidas en un formato binario compacto
+
+Estructura del fichero (little endian):
+
+    cabecera fija (HEADER)
+    nombres de los continentes (UTF-8 separados por "\\n")
+    continentes              CONTINENT_DTYPE   x n_continents
+    last_used de decisiones  int32             x n_decisions (orden del catálogo)
+    decisiones disponibles   int16             x n_available (índices del catálogo)
+    historial de decisiones  DECISION_DTYPE    x n_decision_history
+    historial de eventos     EVENT_DTYPE       x n_event_history
+    estado del generador     uint32            x 625 (si FLAG_RNG)
+    días del historial       int32             x n_history
+    estadísticas globales    float64           x n_history x len(GLOBAL_FIELDS)
+    estadísticas regionales  float64           x n_history x n_continents x len(CONTINENT_FIELDS)
+
+Cada sección empieza en un múltiplo de 8 bytes y su posición se deduce de
+los contadores de la cabecera, así que la carga solo crea vistas con
+numpy.frombuffer sobre el fichero mapeado en memoria. Las partidas
+automáticas se guardan comprimidas (COMPRESSED_MAGIC + zlib) y se
+descomprimen en memoria antes de crear las vistas.
+"""
+import mmap
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from session import GLOBAL_FIELDS, CONTINENT_FIELDS, FLOAT_FIELDS
+
+MAGIC = b"EPIDSAVE"
+VERSION = 1
+
+# Variante comprimida: esta marca seguida del fichero completo comprimido con zlib
+COMPRESSED_MAGIC = b"EPIDSAVZ"
+
+# Partida rápida (F5 guarda, F9 carga)
+QUICKSAVE_PATH = "quicksave.sav"
+
+HEADER = struct.Struct("<8sHBBiiiiHHHHIIIIBBhd")
+
+DIFFICULTIES = ("easy", "normal", "expert")
+GAME_STATES = ("playing", "victory", "defeat")
+DEFEAT_REASONS = (None, "too_many_deaths", "economic_collapse", "morale_collapse",
+                  "uncontrolled_spread", "time_limit")
+
+FLAG_PAUSED = 1
+FLAG_RNG = 2
+FLAG_GAUSS = 4
+
+# Estado del generador de Mersenne Twister: 624 palabras más la posición
+RNG_WORDS = 625
+
+CONTINENT_DTYPE = np.dtype([
+    ('population', '<i8'),
+    ('S', '<f8'), ('E', '<f8'), ('I', '<f8'), ('R', '<f8'), ('deaths', '<f8'),
+    ('beta', '<f8'), ('sigma', '<f8'), ('gamma', '<f8'), ('mu', '<f8'),
+    ('economy', '<f8'), ('morale', '<f8'), ('hospital_capacity', '<f8'),
+    ('vaccination_rate', '<f8'),
+    ('beta_modifier', '<f8'), ('gamma_modifier', '<f8'), ('mu_modifier', '<f8'),
+    ('economy_modifier', '<f8'), ('morale_modifier', '<f8'),
+    ('airports_open', 'u1'), ('schools_open', 'u1'), ('mask_mandate', 'u1'), ('quarantine', 'u1'),
+    ('_pad', 'V4'),
+])
+
+DECISION_DTYPE = np.dtype([('day', '<i4'), ('decision', '<i2'), ('target', '<i2')])
+EVENT_DTYPE = np.dtype([('day', '<i4'), ('event', '<i2'), ('_pad', 'V2')])
+
+_CONTINENT_FLOATS = [name for name in CONTINENT_DTYPE.names
+                     if CONTINENT_DTYPE[name].kind == 'f']
+_CONTINENT_FLAGS = ('airports_open', 'schools_open', 'mask_mandate', 'quarantine')
+
+
+class SaveGame:
+    """Estado completo de una partida en arrays de ancho fijo
+
+    Al crearse con snapshot() los arrays son copias propias, salvo el
+    historial de un TrajectoryHistory o un ArrayHistory, que son vistas de
+    sus filas (encode() las convierte al formato del fichero). Al leerse con
+    load() o decode() son vistas de solo lectura sobre el fichero.
+    """
+
+    def __init__(self, difficulty, game_state, day, max_days, decisions_used_today,
+                 decision_day, paused, defeat_reason, selected_continent, names,
+                 continents, last_used, available, decision_history, event_history,
+                 rng_state, gauss_next, history_days, history_global, history_continents):
+        self.difficulty = difficulty
+        self.game_state = game_state
+        self.day = day
+        self.max_days = max_days
+        self.decisions_used_today = decisions_used_today
+        self.decision_day = decision_day
+        self.paused = paused
+        self.defeat_reason = defeat_reason
+        self.selected_continent = selected_continent
+        self.names = names
+        self.continents = continents
+        self.last_used = last_used
+        self.available = available
+        self.decision_history = decision_history
+        self.event_history = event_history
+        self.rng_state = rng_state
+        self.gauss_next = gauss_next
+        self.history_days = history_days
+        self.history_global = history_global
+        self.history_continents = history_continents
+
+
+class HistoryBuffer:
+    """Conversión incremental del historial de una partida a arrays
+
+    Como el historial solo crece, cada sync() convierte únicamente los días
+    nuevos; si la lista se sustituye (nueva partida o carga) se reconstruye.
+    """
+
+    def __init__(self, capacity=64):
+        self._source = None
+        self._size = 0
+        self._regions = 0
+        self._allocate(capacity, 0)
+
+    def _allocate(self, capacity, regions):
+        self.days = np.zeros(capacity, dtype='<i4')
+        self.global_stats = np.zeros((capacity, len(GLOBAL_FIELDS)), dtype='<f8')
+        self.continent_stats = np.zeros((capacity, regions, len(CONTINENT_FIELDS)), dtype='<f8')
+        self._regions = regions
+
+    def _grow(self):
+        size = self._size
+        days, global_stats, continent_stats = self.days, self.global_stats, self.continent_stats
+        self._allocate(len(days) * 2, self._regions)
+        self.days[:size] = days[:size]
+        self.global_stats[:size] = global_stats[:size]
+        self.continent_stats[:size] = continent_stats[:size]
+
+    def sync(self, history):
+        """Incorpora los días del historial que aún no se han convertido"""
+        regions = len(history[0]['continents']) if history else 0
+        if history is not self._source or len(history) < self._size or regions != self._regions:
+            self._source = history
+            self._size = 0
+            self._allocate(max(64, len(history)), regions)
+
+        for day_data in history[self._size:]:
+            if self._size == len(self.days):
+                self._grow()
+            row = self._size
+            self.days[row] = day_data['day']
+            global_stats = day_data['global']
+            self.global_stats[row] = [global_stats[field] for field in GLOBAL_FIELDS]
+            self.continent_stats[row] = [[region[field] for field in CONTINENT_FIELDS]
+                                         for region in day_data['continents']]
+            self._size += 1
+
+    def arrays(self):
+        """Copias de los días convertidos: (días, globales, regionales)"""
+        size = self._size
+        return (self.days[:size].copy(), self.global_stats[:size].copy(),
+                self.continent_stats[:size].copy())
+
+
+class ArrayHistory:
+    """Historial de una partida cargada, guardado en arrays
+
+    restore() lo crea a partir de los arrays del fichero en lugar de
+    reconstruir un diccionario por día y región. Admite lo mismo que
+    TrajectoryHistory: len(), indexado, cortes, iteración, append() y las
+    vistas sin copia. Al crecer o vaciarse se crean arrays nuevos, así que
+    las vistas que tome snapshot() no cambian después.
+    """
+
+    def __init__(self, names, days, global_stats, continent_stats):
+        self.assign(names, days, global_stats, continent_stats)
+
+    def _allocate(self, capacity, regions):
+        self._days = np.zeros(capacity, dtype='<i4')
+        self._global = np.zeros((capacity, len(GLOBAL_FIELDS)), dtype='<f8')
+        self._continents = np.zeros((capacity, regions, len(CONTINENT_FIELDS)), dtype='<f8')
+
+    def assign(self, names, days, global_stats, continent_stats):
+        """Sustituye el historial por estos arrays"""
+        count = len(days)
+        self.names = list(names)
+        self._allocate(max(64, count), len(self.names))
+        if count:
+            self._days[:count] = days
+            self._global[:count] = global_stats
+            self._continents[:count] = continent_stats
+        self._length = count
+
+    # --- Interfaz de lista ---
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self._day(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._day(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("índice de historial fuera de rango")
+        return self._day(index)
+
+    def _day(self, i):
+        """Diccionario de save_daily_stats de la fila i"""
+        global_stats = {field: value if field in FLOAT_FIELDS else int(value)
+                        for field, value in zip(GLOBAL_FIELDS, self._global[i].tolist())}
+        return {
+            'day': int(self._days[i]),
+            'global': global_stats,
+            'continents': [_continent_stats(name, region)
+                           for name, region in zip(self.names, self._continents[i].tolist())]
+        }
+
+    def append(self, day_data):
+        """Añade un día al final"""
+        names = [region['name'] for region in day_data['continents']]
+        if not self._length and names != self.names:
+            self.assign(names, [], [], [])
+        elif names != self.names:
+            raise ValueError("Las regiones del día no coinciden con las del historial")
+
+        row = self._length
+        if row == len(self._days):
+            days, global_stats, continents = self._days, self._global, self._continents
+            self._allocate(row * 2, len(self.names))
+            self._days[:row] = days
+            self._global[:row] = global_stats
+            self._continents[:row] = continents
+        self._days[row] = day_data['day']
+        global_stats = day_data['global']
+        self._global[row] = [global_stats[field] for field in GLOBAL_FIELDS]
+        self._continents[row] = [[region[field] for field in CONTINENT_FIELDS]
+                                 for region in day_data['continents']]
+        self._length += 1
+
+    def clear(self):
+        """Vacía el historial; las regiones pueden cambiar"""
+        self.assign([], [], [], [])
+
+    # --- Vistas sin copia ---
+
+    def days(self):
+        """Número de día de cada fila"""
+        return self._days[:self._length]
+
+    def global_stats(self):
+        """Estadísticas globales como (día x campo)"""
+        return self._global[:self._length]
+
+    def global_series(self, field):
+        """Serie global de un campo, un valor por día"""
+        return self._global[:self._length, GLOBAL_FIELDS.index(field)]
+
+    def region_tensor(self):
+        """Estadísticas regionales como (día x región x campo)"""
+        return self._continents[:self._length]
+
+    def region_series(self, field):
+        """Serie regional de un campo como (día x región)"""
+        return self._continents[:self._length, :, CONTINENT_FIELDS.index(field)]
+
+    def views(self):
+        """Vistas de (días, globales, regionales) para snapshot()"""
+        return self.days(), self.global_stats(), self.region_tensor()
+
+    def arrays(self):
+        """Copias de (días, globales, regionales), como HistoryBuffer.arrays()"""
+        return self.days().copy(), self.global_stats().copy(), self.region_tensor().copy()
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def snapshot(game, history_buffer=None):
+    """Copia el estado de una GameSession en una SaveGame (barato, en el hilo principal)
+
+    Con un HistoryBuffer reutilizado entre llamadas, el historial se convierte
+    de forma incremental en lugar de entero cada vez.
+    """
+    continents = game.continents
+    n = len(continents)
+
+    records = np.zeros(n, dtype=CONTINENT_DTYPE)
+    records['population'] = [continent.population for continent in continents]
+    for name in _CONTINENT_FLOATS + list(_CONTINENT_FLAGS):
+        records[name] = [getattr(continent, name) for continent in continents]
+
+    decision_manager = game.decision_manager
+    decision_index = {decision.id: i for i, decision in enumerate(decision_manager.all_decisions)}
+    event_index = {event.id: i for i, event in enumerate(game.event_manager.all_events)}
+
+    last_used = np.array([decision.last_used for decision in decision_manager.all_decisions],
+                         dtype='<i4')
+    available = np.array([decision_index[decision.id]
+                          for decision in game.available_decisions], dtype='<i2')
+
+    decision_history = np.array(
+        [(record['day'], decision_index[record['decision_id']],
+          -1 if record['target'] is None else record['target'])
+         for record in decision_manager.decisions_history],
+        dtype=DECISION_DTYPE)
+    event_history = np.zeros(len(game.event_manager.events_history), dtype=EVENT_DTYPE)
+    event_history['day'] = [record['day'] for record in game.event_manager.events_history]
+    event_history['event'] = [event_index[record['event_id']]
+                              for record in game.event_manager.events_history]
+
+    _, internal, gauss_next = game.rng.getstate()
+    rng_state = np.array(internal, dtype='<u4')
+
+    if hasattr(game.history, 'views'):
+        # TrajectoryHistory o ArrayHistory: vistas sin copia de las filas ya escritas; la
+        # conversión a float64 la hace encode() en el hilo de guardado
+        history_days, history_global, history_continents = game.history.views()
+    else:
+        if history_buffer is None:
+            history_buffer = HistoryBuffer(max(1, len(game.history)))
+        history_buffer.sync(game.history)
+        history_days, history_global, history_continents = history_buffer.arrays()
+
+    return SaveGame(
+        difficulty=game.difficulty,
+        game_state=game.game_state,
+        day=game.day,
+        max_days=game.max_days,
+        decisions_used_today=decision_manager.decisions_used_today,
+        decision_day=decision_manager.current_day,
+        paused=game.paused,
+        defeat_reason=game.defeat_reason,
+        selected_continent=getattr(game, 'selected_continent', None),
+        names=[continent.name for continent in continents],
+        continents=records,
+        last_used=last_used,
+        available=available,
+        decision_history=decision_history,
+        event_history=event_history,
+        rng_state=rng_state,
+        gauss_next=gauss_next,
+        history_days=history_days,
+        history_global=history_global,
+        history_continents=history_continents,
+    )
+
+
+def _sections(save):
+    """Secciones variables del fichero en orden"""
+    sections = [
+        "\n".join(save.names).encode("utf-8"),
+        save.continents,
+        save.last_used,
+        save.available,
+        save.decision_history,
+        save.event_history,
+    ]
+    if save.rng_state is not None:
+        sections.append(save.rng_state)
+    sections += [np.asarray(save.history_days, dtype='<i4'),
+                 np.asarray(save.history_global, dtype='<f8'),
+                 np.asarray(save.history_continents, dtype='<f8')]
+    return sections
+
+
+def encode(save):
+    """Serializa una SaveGame a bytes"""
+    sections = _sections(save)
+    names = sections[0]
+    flags = 0
+    if save.paused:
+        flags |= FLAG_PAUSED
+    if save.rng_state is not None:
+        flags |= FLAG_RNG
+    if save.gauss_next is not None:
+        flags |= FLAG_GAUSS
+
+    header = HEADER.pack(
+        MAGIC, VERSION,
+        DIFFICULTIES.index(save.difficulty), GAME_STATES.index(save.game_state),
+        save.day, save.max_days, save.decisions_used_today, save.decision_day,
+        len(save.names), len(save.available), len(save.last_used),
+        0,  # reservado
+        len(save.decision_history), len(save.event_history), len(save.history_days),
+        len(names), flags, DEFEAT_REASONS.index(save.defeat_reason),
+        -1 if save.selected_continent is None else save.selected_continent,
+        save.gauss_next or 0.0,
+    )
+
+    chunks = [header]
+    offset = len(header)
+    for section in sections:
+        padding = _align(offset) - offset
+        if padding:
+            chunks.append(b"\0" * padding)
+            offset += padding
+        data = section if isinstance(section, bytes) else np.ascontiguousarray(section).tobytes()
+        chunks.append(data)
+        offset += len(data)
+    return b"".join(chunks)
+
+
+def encode_compressed(save, level=6):
+    """Serializa y comprime una SaveGame (más lento, para guardar en segundo plano)"""
+    return COMPRESSED_MAGIC + zlib.compress(encode(save), level)
+
+
+def decode(buffer):
+    """Crea una SaveGame con vistas sobre un buffer (bytes, mmap o memoryview)"""
+    if buffer[:len(COMPRESSED_MAGIC)] == COMPRESSED_MAGIC:
+        buffer = zlib.decompress(buffer[len(COMPRESSED_MAGIC):])
+    if len(buffer) < HEADER.size:
+        raise ValueError("Fichero de partida truncado")
+    (magic, version, difficulty, game_state, day, max_days, decisions_used_today,
+     decision_day, n_continents, n_available, n_decisions, _reserved, n_decision_history,
+     n_event_history, n_history, names_size, flags, defeat_reason, selected,
+     gauss_next) = HEADER.unpack_from(buffer, 0)
+
+    if magic != MAGIC:
+        raise ValueError("No es un fichero de partida")
+    if version != VERSION:
+        raise ValueError(f"Versión de partida no compatible: {version}")
+
+    offset = HEADER.size
+
+    def take(dtype, count, shape=None):
+        nonlocal offset
+        offset = _align(offset)
+        dtype = np.dtype(dtype)
+        end = offset + dtype.itemsize * count
+        if end > len(buffer):
+            raise ValueError("Fichero de partida truncado")
+        array = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+        offset = end
+        return array.reshape(shape) if shape is not None else array
+
+    names_bytes = bytes(take('u1', names_size))
+    names = names_bytes.decode("utf-8").split("\n") if n_continents else []
+    continents = take(CONTINENT_DTYPE, n_continents)
+    last_used = take('<i4', n_decisions)
+    available = take('<i2', n_available)
+    decision_history = take(DECISION_DTYPE, n_decision_history)
+    event_history = take(EVENT_DTYPE, n_event_history)
+    rng_state = take('<u4', RNG_WORDS) if flags & FLAG_RNG else None
+    history_days = take('<i4', n_history)
+    history_global = take('<f8', n_history * len(GLOBAL_FIELDS),
+                          (n_history, len(GLOBAL_FIELDS)))
+    history_continents = take('<f8', n_history * n_continents * len(CONTINENT_FIELDS),
+                              (n_history, n_continents, len(CONTINENT_FIELDS)))
+
+    return SaveGame(
+        difficulty=DIFFICULTIES[difficulty],
+        game_state=GAME_STATES[game_state],
+        day=day,
+        max_days=max_days,
+        decisions_used_today=decisions_used_today,
+        decision_day=decision_day,
+        paused=bool(flags & FLAG_PAUSED),
+        defeat_reason=DEFEAT_REASONS[defeat_reason],
+        selected_continent=None if selected < 0 else selected,
+        names=names,
+        continents=continents,
+        last_used=last_used,
+        available=available,
+        decision_history=decision_history,
+        event_history=event_history,
+        rng_state=rng_state,
+        gauss_next=gauss_next if flags & FLAG_GAUSS else None,
+        history_days=history_days,
+        history_global=history_global,
+        history_continents=history_continents,
+    )
+
+
+def write_atomic(path, data):
+    """Escribe en un fichero temporal y lo renombra para no dejar partidas a medias"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save(game, path=QUICKSAVE_PATH):
+    """Guarda una partida (GameSession o GameLoop)"""
+    write_atomic(path, encode(snapshot(game)))
+
+
+def load(path=QUICKSAVE_PATH):
+    """Lee una partida mapeando el fichero en memoria (las comprimidas se descomprimen)"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("Fichero de partida vacío")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return decode(mapped)
+
+
+def _continent_stats(name, row):
+    """Diccionario regional del historial a partir de una fila del array"""
+    stats = {'name': name}
+    for field, value in zip(CONTINENT_FIELDS, row):
+        stats[field] = value if field in FLOAT_FIELDS else int(value)
+    return stats
+
+
+def restore(game, save):
+    """Sustituye el estado de una GameSession (o GameLoop) por el de una SaveGame"""
+    # Importaciones locales: este módulo no depende del juego para serializar
+    from seir import Continent, SEIRSimulator
+    from events import EventManager
+    from decisions import DecisionManager
+
+    difficulty = save.difficulty
+    game.difficulty = difficulty
+
+    continents = []
+    for name, record in zip(save.names, save.continents):
+        continent = Continent(name, int(record['population']), 0, difficulty)
+        for field in _CONTINENT_FLOATS:
+            setattr(continent, field, float(record[field]))
+        for field in _CONTINENT_FLAGS:
+            setattr(continent, field, bool(record[field]))
+        continents.append(continent)
+    game.continents = continents
+
+    # Los gestores dependen de la dificultad: se recrean y se rellenan. El
+    # simulador usa las rutas del escenario si las regiones son las suyas
+    scenario = getattr(game, 'scenario', None)
+    routes = scenario.routes_for(save.names) if scenario is not None else None
+    game.simulator = SEIRSimulator(continents, difficulty, game.rng, routes)
+    game.event_manager = EventManager(difficulty, game.rng)
+    game.decision_manager = DecisionManager(difficulty, game.rng)
+
+    decision_manager = game.decision_manager
+    catalogue = decision_manager.all_decisions
+    for decision, last_used in zip(catalogue, save.last_used.tolist()):
+        decision.last_used = last_used
+    decision_manager.current_day = save.decision_day
+    decision_manager.decisions_used_today = save.decisions_used_today
+    decision_manager.decisions_history = [
+        {'decision_id': catalogue[index].id, 'day': day,
+         'target': None if target < 0 else target, 'name': catalogue[index].name}
+        for day, index, target in save.decision_history.tolist()
+    ]
+
+    events = game.event_manager.all_events
+    game.event_manager.events_history = [
+        {'day': day, 'event_id': events[index].id, 'name': events[index].name,
+         'description': events[index].description}
+        for day, index, _ in save.event_history.tolist()
+    ]
+
+    if save.rng_state is not None:
+        game.rng.setstate((3, tuple(save.rng_state.tolist()), save.gauss_next))
+
+    # El historial se queda en arrays: un TrajectoryHistory reescribe su
+    # fichero y en otro caso se copia a un ArrayHistory
+    history = (save.names, save.history_days, save.history_global, save.history_continents)
+    if hasattr(game.history, 'assign'):
+        game.history.assign(*history)
+    else:
+        game.history = ArrayHistory(*history)
+
+    game.day = save.day
+    game.max_days = save.max_days
+    game.paused = save.paused
+    game.selected_continent = save.selected_continent
+    game.game_state = save.game_state
+    game.defeat_reason = save.defeat_reason
+
+    # Las decisiones que se ofrecían al guardar, sin volver a sortearlas
+    game.set_available_decisions([catalogue[index] for index in save.available.tolist()])
@@ -0,0 +1,443 @@
+"""Escenarios: regiones, poblaciones, mapa y rutas de vuelo de una partida
+
+Un escenario es un fichero JSON en scenarios/ (ver scenarios/mundo.json):
+
+    {
+      "name": "Mundo",
+      "description": "Tres grandes regiones unidas por vuelos directos",
+      "regions": [
+        {"name": "América",
+         "population": {"easy": 800000, "normal": 1000000, "expert": 1200000},
+         "initial_infected": 150,
+         "polygon": [[0.10, 0.20], [0.15, 0.15], ...],
+         "center": [0.25, 0.5],
+         "airport": [0.28, 0.45],
+         "parameters": {"beta": 0.45, "mu": 0.02}},
+        ...
+      ],
+      "routes": [["América", "Europa-África"], ...]
+    }
+
+Las coordenadas son fracciones (0-1) del rectángulo del mapa; center y
+airport son opcionales (por defecto, el centro del polígono). Población,
+infectados iniciales y parámetros admiten un valor único o uno por
+dificultad; los parámetros (beta, sigma, gamma, mu) que no se indiquen son
+los de la dificultad. "routes" es una lista de pares de regiones (vuelos en
+ambos sentidos) o "all" para unir todas con todas.
+
+El JSON se valida una sola vez y se compila a un binario en scenarios/.cache/
+(cabecera y arrays NumPy); mientras el JSON no cambie, las cargas siguientes
+leen el binario. Dentro del proceso cada escenario se carga una vez.
+
+Uso:
+    python scenarios.py [escenario o fichero.json ...]
+"""
+import json
+import math
+import os
+import struct
+import sys
+import time
+import zlib
+
+from lazy_imports import lazy_import
+
+# NumPy se importa al cargar el primer escenario, después de que main.py
+# compruebe que está instalado
+np = lazy_import("numpy")
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+CACHE_DIR = os.path.join(SCENARIO_DIR, ".cache")
+DEFAULT_SCENARIO = "mundo"
+
+DIFFICULTIES = ("easy", "normal", "expert")
+PARAMETERS = ("beta", "sigma", "gamma", "mu")
+
+MAGIC = b"EPIDSCEN"
+VERSION = 1
+
+# marca, versión, reservado, regiones, puntos, rutas, metadatos, mtime y tamaño del JSON
+HEADER = struct.Struct("<8sHHIIIIqQ")
+ALIGN = 8
+
+# Escenarios ya cargados en este proceso: ruta -> (marca del JSON, Scenario)
+_loaded = {}
+
+
+class ScenarioError(ValueError):
+    """El fichero de escenario no existe o no es válido"""
+
+
+class Scenario:
+    """Escenario validado, con las regiones en arrays de NumPy
+
+    Las filas de populations, infected y parameters siguen el orden de
+    DIFFICULTIES; un parámetro NaN significa «el de la dificultad». Los
+    polígonos de todas las regiones van seguidos en points: los de la región i
+    son points[polygon_offsets[i]:polygon_offsets[i + 1]].
+    """
+
+    def __init__(self, name, description, region_names, populations, infected, parameters,
+                 centers, airports, polygon_offsets, points, routes, source=None):
+        self.name = name
+        self.description = description
+        self.region_names = list(region_names)
+        self.populations = populations
+        self.infected = infected
+        self.parameters = parameters
+        self.centers = centers
+        self.airports = airports
+        self.polygon_offsets = polygon_offsets
+        self.points = points
+        self.routes = routes
+        self.source = source
+
+    def __len__(self):
+        return len(self.region_names)
+
+    def __repr__(self):
+        return f"<Scenario {self.name!r}: {len(self)} regiones, {len(self.routes)} rutas>"
+
+    def polygon(self, index):
+        """Puntos (fracciones del mapa) del polígono de una región"""
+        return self.points[self.polygon_offsets[index]:self.polygon_offsets[index + 1]]
+
+    def route_pairs(self):
+        """Rutas de vuelo como pares de índices de región"""
+        return [tuple(route) for route in self.routes.tolist()]
+
+    def routes_for(self, names):
+        """Rutas para estas regiones (las de una partida guardada), o None si no son las del escenario"""
+        return self.route_pairs() if list(names) == self.region_names else None
+
+    def region_configs(self, difficulty):
+        """Nombre, población, infectados y parámetros propios de cada región"""
+        column = DIFFICULTIES.index(difficulty)
+        populations = self.populations[:, column].tolist()
+        infected = self.infected[:, column].tolist()
+        parameters = self.parameters[:, column].tolist()
+        configs = []
+        for i, name in enumerate(self.region_names):
+            configs.append({
+                "name": name,
+                "population": populations[i],
+                "initial_infected": infected[i],
+                "parameters": {field: value for field, value in zip(PARAMETERS, parameters[i])
+                               if not math.isnan(value)},
+            })
+        return configs
+
+
+# --- Validación ---
+
+def _fail(source, message):
+    raise ScenarioError(f"{source}: {message}")
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _per_difficulty(source, where, value, check):
+    """Valor único o uno por dificultad -> tupla en el orden de DIFFICULTIES"""
+    if isinstance(value, dict):
+        unknown = set(value) - set(DIFFICULTIES)
+        if unknown:
+            _fail(source, f"{where}: dificultad desconocida {sorted(unknown)[0]!r}")
+        missing = [difficulty for difficulty in DIFFICULTIES if difficulty not in value]
+        if missing:
+            _fail(source, f"{where}: falta el valor para {missing[0]!r}")
+        values = tuple(value[difficulty] for difficulty in DIFFICULTIES)
+    else:
+        values = (value,) * len(DIFFICULTIES)
+    for item in values:
+        if not check(item):
+            _fail(source, f"{where}: valor no válido {item!r}")
+    return values
+
+
+def _point(source, where, value):
+    if (not isinstance(value, (list, tuple)) or len(value) != 2
+            or not all(_number(v) and 0 <= v <= 1 for v in value)):
+        _fail(source, f"{where}: se esperaba [x, y] con fracciones entre 0 y 1")
+    return float(value[0]), float(value[1])
+
+
+def parse_scenario(data, source="<escenario>"):
+    """Valida el contenido de un JSON de escenario y lo convierte en Scenario"""
+    if not isinstance(data, dict):
+        _fail(source, "el escenario debe ser un objeto JSON")
+    regions = data.get("regions")
+    if not isinstance(regions, list) or not regions:
+        _fail(source, "'regions' debe ser una lista no vacía")
+
+    names = []
+    index = {}
+    populations = []
+    infected = []
+    parameters = []
+    centers = []
+    airports = []
+    offsets = [0]
+    points = []
+    for i, region in enumerate(regions):
+        where = f"región {i}"
+        if not isinstance(region, dict):
+            _fail(source, f"{where}: se esperaba un objeto")
+        name = region.get("name")
+        if not isinstance(name, str) or not name:
+            _fail(source, f"{where}: falta el nombre")
+        if name in index:
+            _fail(source, f"región repetida {name!r}")
+        where = f"región {name!r}"
+        index[name] = i
+        names.append(name)
+
+        population = _per_difficulty(source, f"{where}, population", region.get("population"),
+                                     lambda v: isinstance(v, int) and not isinstance(v, bool) and v > 0)
+        initial = _per_difficulty(source, f"{where}, initial_infected", region.get("initial_infected", 0),
+                                  lambda v: isinstance(v, int) and not isinstance(v, bool) and v >= 0)
+        if any(inf > pop for inf, pop in zip(initial, population)):
+            _fail(source, f"{where}: hay más infectados iniciales que población")
+        populations.append(population)
+        infected.append(initial)
+
+        region_parameters = region.get("parameters", {})
+        if not isinstance(region_parameters, dict):
+            _fail(source, f"{where}: 'parameters' debe ser un objeto")
+        unknown = set(region_parameters) - set(PARAMETERS)
+        if unknown:
+            _fail(source, f"{where}: parámetro desconocido {sorted(unknown)[0]!r}")
+        row = []
+        for field in PARAMETERS:
+            if field in region_parameters:
+                row.append(_per_difficulty(source, f"{where}, {field}", region_parameters[field],
+                                           lambda v: _number(v) and v > 0))
+            else:
+                row.append((math.nan,) * len(DIFFICULTIES))
+        parameters.append(list(zip(*row)))
+
+        polygon = region.get("polygon")
+        if not isinstance(polygon, list) or len(polygon) < 3:
+            _fail(source, f"{where}: el polígono necesita al menos tres puntos")
+        polygon = [_point(source, f"{where}, polygon", p) for p in polygon]
+        points.extend(polygon)
+        offsets.append(len(points))
+
+        if "center" in region:
+            center = _point(source, f"{where}, center", region["center"])
+        else:
+            center = (sum(x for x, _ in polygon) / len(polygon), sum(y for _, y in polygon) / len(polygon))
+        centers.append(center)
+        airports.append(_point(source, f"{where}, airport", region["airport"])
+                        if "airport" in region else center)
+
+    routes = data.get("routes")
+    if routes == "all":
+        pairs = [(a, b) for a in range(len(names)) for b in range(a + 1, len(names))]
+    elif isinstance(routes, list):
+        pairs = set()
+        for route in routes:
+            if not isinstance(route, (list, tuple)) or len(route) != 2:
+                _fail(source, f"ruta no válida {route!r}: se esperaba [origen, destino]")
+            for name in route:
+                if name not in index:
+                    _fail(source, f"la ruta {route!r} usa una región desconocida {name!r}")
+            a, b = index[route[0]], index[route[1]]
+            if a == b:
+                _fail(source, f"la ruta {route!r} une una región consigo misma")
+            pairs.add((min(a, b), max(a, b)))
+        pairs = sorted(pairs)
+    else:
+        _fail(source, "'routes' debe ser una lista de pares de regiones o \"all\"")
+
+    name = data.get("name", os.path.splitext(os.path.basename(str(source)))[0])
+    description = data.get("description", "")
+    if not isinstance(name, str) or not isinstance(description, str):
+        _fail(source, "'name' y 'description' deben ser texto")
+
+    return Scenario(
+        name, description, names,
+        np.array(populations, dtype='<i8'),
+        np.array(infected, dtype='<i8'),
+        np.array(parameters, dtype='<f8').reshape(len(names), len(DIFFICULTIES), len(PARAMETERS)),
+        np.array(centers, dtype='<f8'),
+        np.array(airports, dtype='<f8'),
+        np.array(offsets, dtype='<i8'),
+        np.array(points, dtype='<f8').reshape(-1, 2),
+        np.array(pairs, dtype='<i8').reshape(-1, 2),
+        source,
+    )
+
+
+# --- Binario compilado ---
+
+def _align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _arrays(scenario):
+    return (scenario.populations, scenario.infected, scenario.parameters, scenario.centers,
+            scenario.airports, scenario.polygon_offsets, scenario.points, scenario.routes)
+
+
+def compile_scenario(scenario, stamp=(0, 0)):
+    """Serializa un escenario validado; stamp es (mtime_ns, tamaño) del JSON de origen"""
+    meta = json.dumps({'name': scenario.name, 'description': scenario.description,
+                       'regions': scenario.region_names}, ensure_ascii=False).encode("utf-8")
+    header = HEADER.pack(MAGIC, VERSION, 0, len(scenario), len(scenario.points),
+                         len(scenario.routes), len(meta), stamp[0], stamp[1])
+    chunks = [header, meta.ljust(_align(HEADER.size + len(meta)) - HEADER.size, b"\0")]
+    chunks.extend(np.ascontiguousarray(array).tobytes() for array in _arrays(scenario))
+    return b"".join(chunks)
+
+
+def decode_compiled(buffer, source=None):
+    """Crea un Scenario con vistas sobre un binario de compile_scenario; devuelve (stamp, escenario)"""
+    if len(buffer) < HEADER.size:
+        raise ScenarioError(f"{source}: binario de escenario truncado")
+    magic, version, _reserved, regions, points, routes, meta_size, mtime, size = \
+        HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ScenarioError(f"{source}: binario de escenario no compatible")
+    meta = json.loads(bytes(buffer[HEADER.size:HEADER.size + meta_size]).decode("utf-8"))
+
+    shapes = (
+        (regions, len(DIFFICULTIES)),
+        (regions, len(DIFFICULTIES)),
+        (regions, len(DIFFICULTIES), len(PARAMETERS)),
+        (regions, 2),
+        (regions, 2),
+        (regions + 1,),
+        (points, 2),
+        (routes, 2),
+    )
+    dtypes = ('<i8', '<i8', '<f8', '<f8', '<f8', '<i8', '<f8', '<i8')
+    offset = _align(HEADER.size + meta_size)
+    arrays = []
+    for shape, dtype in zip(shapes, dtypes):
+        count = math.prod(shape)
+        if offset + count * 8 > len(buffer):
+            raise ScenarioError(f"{source}: binario de escenario truncado")
+        arrays.append(np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape(shape))
+        offset += count * 8
+    return (mtime, size), Scenario(meta['name'], meta['description'], meta['regions'],
+                                   *arrays, source=source)
+
+
+# --- Carga ---
+
+def scenario_path(name):
+    """Ruta del JSON de un escenario: un nombre de scenarios/ o una ruta a un .json"""
+    if name.endswith(".json") or os.sep in name or (os.altsep and os.altsep in name):
+        return name
+    return os.path.join(SCENARIO_DIR, f"{name}.json")
+
+
+def cache_path(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if os.path.dirname(os.path.abspath(path)) != SCENARIO_DIR:
+        # Ficheros de fuera de scenarios/: el nombre solo no basta para distinguirlos
+        stem = f"{stem}-{zlib.crc32(os.path.abspath(path).encode()):08x}"
+    return os.path.join(CACHE_DIR, f"{stem}.bin")
+
+
+def list_scenarios():
+    """Nombres de los escenarios incluidos en scenarios/"""
+    if not os.path.isdir(SCENARIO_DIR):
+        return []
+    return sorted(os.path.splitext(entry)[0] for entry in os.listdir(SCENARIO_DIR)
+                  if entry.endswith(".json"))
+
+
+def _read_cache(path, stamp):
+    try:
+        with open(cache_path(path), "rb") as f:
+            data = f.read()
+        cached_stamp, scenario = decode_compiled(data, path)
+    except (OSError, ValueError, KeyError):
+        return None
+    return scenario if cached_stamp == stamp else None
+
+
+def _write_cache(path, scenario, stamp):
+    """Guarda el binario compilado; si no se puede escribir, se compila cada vez"""
+    target = cache_path(path)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compile_scenario(scenario, stamp))
+        os.replace(tmp_path, target)
+    except OSError:
+        pass
+
+
+def load_scenario(scenario=None, use_cache=True):
+    """Devuelve un Scenario a partir de su nombre, de la ruta a su JSON o de otro Scenario
+
+    Sin argumento se carga DEFAULT_SCENARIO. Lanza ScenarioError si el
+    fichero no existe o no es válido.
+    """
+    if isinstance(scenario, Scenario):
+        return scenario
+    source = scenario or DEFAULT_SCENARIO
+    path = scenario_path(source)
+    try:
+        info = os.stat(path)
+    except OSError:
+        raise ScenarioError(f"No existe el escenario {source!r} ({path})") from None
+    stamp = (info.st_mtime_ns, info.st_size)
+
+    key = os.path.abspath(path)
+    loaded = _loaded.get(key)
+    if loaded is not None and loaded[0] == stamp:
+        return loaded[1]
+
+    result = _read_cache(path, stamp) if use_cache else None
+    if result is None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError as e:
+            raise ScenarioError(f"{path}: JSON no válido ({e})") from None
+        result = parse_scenario(data, path)
+        if use_cache:
+            _write_cache(path, result, stamp)
+    result.source = source
+    _loaded[key] = (stamp, result)
+    return result
+
+
+def main():
+    names = sys.argv[1:] or list_scenarios()
+    if not names:
+        print(f"No hay escenarios en {SCENARIO_DIR}")
+        return 1
+    status = 0
+    for name in names:
+        started = time.perf_counter()
+        try:
+            path = scenario_path(name)
+            with open(path, encoding="utf-8") as f:
+                scenario = parse_scenario(json.load(f), path)
+            info = os.stat(path)
+            _write_cache(path, scenario, (info.st_mtime_ns, info.st_size))
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {e}")
+            status = 1
+            continue
+        compiled = time.perf_counter() - started
+
+        _loaded.clear()
+        started = time.perf_counter()
+        load_scenario(name)
+        cached = time.perf_counter() - started
+        print(f"{name}: {len(scenario)} regiones, {len(scenario.points)} puntos, "
+              f"{len(scenario.routes)} rutas; validar y compilar {compiled * 1000:.1f} ms, "
+              f"cargar compilado {cached * 1000:.2f} ms")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,3 @@
-import numpy as np
 import random
 
 class Continent:
@@ -193,9 +192,20 @@ class Continent:
             self.E += num_infections
 
 class SEIRSimulator:
-    def __init__(self, continents, difficulty="normal"):
+    def __init__(self, continents, difficulty="normal", rng=None, routes=None):
         self.continents = continents
         self.difficulty = difficulty
+        self.rng = rng or random  # generador aleatorio (por defecto el global)
+        
+        # Destinos de los vuelos de cada continente; sin rutas, todos con todos
+        self.destinations = [[] for _ in continents]
+        if routes is None:
+            routes = [(i, j) for i in range(len(continents)) for j in range(i + 1, len(continents))]
+        for a, b in routes:
+            self.destinations[a].append(b)
+            self.destinations[b].append(a)
+        for destinations in self.destinations:
+            destinations.sort()
         
         # Parámetros de transmisión entre continentes
         if difficulty == "easy":
@@ -214,14 +224,15 @@ class SEIRSimulator:
             if not source.can_export_infections():
                 continue
                 
-            for j, destination in enumerate(self.continents):
-                if i == j or not destination.airports_open:
+            for j in self.destinations[i]:
+                destination = self.continents[j]
+                if not destination.airports_open:
                     continue
                 
                 # Probabilidad de vuelo
-                if random.random() < self.flight_probability:
+                if self.rng.random() < self.flight_probability:
                     # Número de infecciones exportadas
-                    export_infections = int(source.I * self.infection_export_rate * random.random())
+                    export_infections = int(source.I * self.infection_export_rate * self.rng.random())
                     if export_infections > 0:
                         destination.receive_imported_infections(export_infections)
     
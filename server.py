@@ -0,0 +1,419 @@
+"""Servidor de partidas sin pantalla para muchas sesiones en un solo proceso
+
+Cada sesión es una GameSession independiente. El servidor atiende a los
+clientes en un bucle asyncio con un protocolo de líneas JSON sobre un socket
+local (TCP en 127.0.0.1 o socket Unix). Cada petición es un objeto con "op"
+y, opcionalmente, "id", que se devuelve en la respuesta:
+
+    {"op": "create", "difficulty": "normal", "seed": 7, "scenario": "mundo"}
+    {"op": "advance", "session": 1, "days": 5}
+    {"op": "decide", "session": 1, "decision": "mask_mandate", "continent": 0}
+    {"op": "state", "session": 1}
+    {"op": "sync", "session": 1, "keyframe": false}
+    {"op": "close", "session": 1}
+    {"op": "list"}
+
+Las respuestas llevan "ok" y, si falla, "error". Al avanzar se devuelven
+solo los cambios de cada día ("diffs"). "sync" devuelve en base64 una trama
+binaria de state_diff.py con los cambios desde la anterior que recibió esa
+conexión, para visores ligeros. Los avances largos (más de
+FAST_FORWARD_DAYS) se ejecutan en un ProcessPoolExecutor para no bloquear
+al resto de sesiones: la partida viaja como savegame binario.
+
+Uso:
+    python server.py [--port 8765] [--unix /tmp/epidemia.sock] [--workers 4]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from lazy_imports import lazy_import
+
+savegame = lazy_import("savegame")
+state_diff = lazy_import("state_diff")
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Un aula completa con margen
+MAX_SESSIONS = 64
+
+# A partir de cuántos días el avance se hace en el pool de procesos
+FAST_FORWARD_DAYS = 30
+
+# Límite de días por petición
+MAX_ADVANCE_DAYS = 3650
+
+
+class ServerError(Exception):
+    """Petición incorrecta: se responde con ok = false y el mensaje"""
+    pass
+
+
+class HostedSession:
+    """Una partida alojada en el servidor"""
+
+    def __init__(self, id, session):
+        self.id = id
+        self.session = session
+        # Serializa las peticiones sobre la misma partida
+        self.lock = asyncio.Lock()
+        self.created = time.time()
+        self.last_active = self.created
+
+
+class ClientContext:
+    """Estado de una conexión: los codificadores de diferencias de cada sesión"""
+
+    def __init__(self):
+        self.encoders = {}
+
+
+def region_state(continent):
+    """Estado completo de una región"""
+    return {
+        'name': continent.name,
+        'population': continent.population,
+        'susceptible': int(continent.S),
+        'exposed': int(continent.E),
+        'infected': int(continent.I),
+        'recovered': int(continent.R),
+        'deaths': int(continent.deaths),
+        'economy': continent.economy,
+        'morale': continent.morale,
+        'airports_open': continent.airports_open,
+        'schools_open': continent.schools_open,
+        'mask_mandate': continent.mask_mandate,
+        'quarantine': continent.quarantine,
+        'vaccination_rate': continent.vaccination_rate,
+    }
+
+
+def decision_state(decision):
+    return {
+        'id': decision.id,
+        'name': decision.name,
+        'cost_economy': decision.cost_economy,
+        'cost_morale': decision.cost_morale,
+        'priority': decision.priority,
+    }
+
+
+def session_state(hosted):
+    """Estado completo de una partida (al crearla o cuando el cliente lo pide)"""
+    session = hosted.session
+    return {
+        'session': hosted.id,
+        'difficulty': session.difficulty,
+        'scenario': session.scenario.source,
+        'seed': session.seed,
+        'day': session.day,
+        'max_days': session.max_days,
+        'state': session.game_state,
+        'defeat_reason': session.defeat_reason,
+        'global': session.simulator.get_global_stats(),
+        'regions': [region_state(continent) for continent in session.continents],
+        'available_decisions': [decision_state(d) for d in session.available_decisions],
+        'decisions_remaining': session.decision_manager.get_decisions_remaining(),
+    }
+
+
+def day_diffs(history, start, new_events=()):
+    """Cambios de cada día del historial desde el índice start
+
+    Cada diff lleva el día, los campos globales que han cambiado, las
+    regiones que han cambiado como [índice, {campo: valor}] y los eventos
+    ocurridos ese día.
+    """
+    events_by_day = {}
+    for record in new_events:
+        # Los eventos del día d aparecen en las estadísticas guardadas al pasar al d + 1
+        events_by_day.setdefault(record['day'] + 1, []).append(
+            {'id': record['event_id'], 'name': record['name']})
+
+    diffs = []
+    previous = history[start - 1] if start > 0 else None
+    for current in history[start:]:
+        diff = {'day': current['day']}
+        if previous is None:
+            diff['global'] = dict(current['global'])
+            diff['regions'] = [[i, {k: v for k, v in region.items() if k != 'name'}]
+                               for i, region in enumerate(current['continents'])]
+        else:
+            changed = {k: v for k, v in current['global'].items() if previous['global'][k] != v}
+            if changed:
+                diff['global'] = changed
+            regions = []
+            for i, (before, after) in enumerate(zip(previous['continents'], current['continents'])):
+                changed = {k: v for k, v in after.items() if k != 'name' and before[k] != v}
+                if changed:
+                    regions.append([i, changed])
+            if regions:
+                diff['regions'] = regions
+        if current['day'] in events_by_day:
+            diff['events'] = events_by_day[current['day']]
+        diffs.append(diff)
+        previous = current
+    return diffs
+
+
+def _fast_forward(data, days, scenario=None):
+    """Proceso del pool: carga la partida, avanza y la devuelve guardada"""
+    from session import GameSession
+
+    save = savegame.decode(data)
+    session = GameSession(save.difficulty, seed=0, scenario=scenario)
+    savegame.restore(session, save)
+    session.advance_days(days)
+    return savegame.encode(savegame.snapshot(session))
+
+
+class SessionServer:
+    """Aloja las partidas y atiende las peticiones de los clientes"""
+
+    def __init__(self, max_sessions=MAX_SESSIONS, workers=None, fast_forward_days=FAST_FORWARD_DAYS):
+        self.max_sessions = max_sessions
+        self.workers = workers
+        self.fast_forward_days = fast_forward_days
+        self.sessions = {}
+        self._next_id = 1
+        self._pool = None
+        self.requests_served = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _get(self, request):
+        try:
+            hosted = self.sessions[request['session']]
+        except KeyError:
+            raise ServerError(f"Sesión desconocida: {request.get('session')}")
+        hosted.last_active = time.time()
+        return hosted
+
+    # --- Conexiones ---
+
+    async def handle_client(self, reader, writer):
+        """Atiende las peticiones de un cliente, una por línea"""
+        client = ClientContext()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = await self.handle_line(line, client)
+                writer.write(json.dumps(response, separators=(",", ":")).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line, client=None):
+        if client is None:
+            client = ClientContext()
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ServerError("La petición debe ser un objeto JSON")
+            request_id = request.get('id')
+            handler = getattr(self, f"op_{request.get('op')}", None)
+            if handler is None:
+                raise ServerError(f"Operación desconocida: {request.get('op')}")
+            response = await handler(request, client)
+            response['ok'] = True
+        except (ServerError, ValueError, TypeError) as e:
+            response = {'ok': False, 'error': str(e)}
+        except Exception as e:
+            # Un fallo inesperado no debe cerrar la conexión ni afectar a otras sesiones
+            response = {'ok': False, 'error': f"Error interno: {e!r}"}
+        self.requests_served += 1
+        if request_id is not None:
+            response['id'] = request_id
+        return response
+
+    # --- Operaciones ---
+
+    async def op_create(self, request, client):
+        from session import GameSession
+        from scenarios import load_scenario, ScenarioError
+
+        if len(self.sessions) >= self.max_sessions:
+            raise ServerError("El servidor ha alcanzado el máximo de sesiones")
+        difficulty = request.get('difficulty', "normal")
+        if difficulty not in ("easy", "normal", "expert"):
+            raise ServerError(f"Dificultad desconocida: {difficulty}")
+        seed = request.get('seed')
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+
+        try:
+            scenario = load_scenario(request.get('scenario'))
+        except ScenarioError as e:
+            raise ServerError(str(e)) from None
+
+        hosted = HostedSession(self._next_id, GameSession(difficulty, seed=int(seed), scenario=scenario))
+        self.sessions[hosted.id] = hosted
+        self._next_id += 1
+        return session_state(hosted)
+
+    async def op_advance(self, request, client):
+        hosted = self._get(request)
+        days = int(request.get('days', 1))
+        if not 1 <= days <= MAX_ADVANCE_DAYS:
+            raise ServerError(f"Días fuera de rango: {days}")
+
+        async with hosted.lock:
+            session = hosted.session
+            start = len(session.history)
+            events_start = len(session.event_manager.events_history)
+
+            if days > self.fast_forward_days and session.game_state == "playing" and not session.paused:
+                data = savegame.encode(savegame.snapshot(session))
+                loop = asyncio.get_running_loop()
+                data = await loop.run_in_executor(self._get_pool(), _fast_forward, data, days,
+                                                  session.scenario.source)
+                savegame.restore(session, savegame.decode(data))
+                advanced = len(session.history) - start
+            else:
+                advanced = session.advance_days(days)
+
+            new_events = session.event_manager.events_history[events_start:]
+            return {
+                'session': hosted.id,
+                'advanced': advanced,
+                'day': session.day,
+                'state': session.game_state,
+                'defeat_reason': session.defeat_reason,
+                'diffs': day_diffs(session.history, start, new_events),
+                'available_decisions': [decision_state(d) for d in session.available_decisions],
+                'decisions_remaining': session.decision_manager.get_decisions_remaining(),
+            }
+
+    async def op_decide(self, request, client):
+        hosted = self._get(request)
+        async with hosted.lock:
+            session = hosted.session
+            continent = request.get('continent')
+            if continent is not None and not 0 <= continent < len(session.continents):
+                raise ServerError(f"Región fuera de rango: {continent}")
+            if 'decision' not in request:
+                raise ServerError("Falta la decisión")
+            applied = session.apply_decision(request['decision'], continent)
+            # Las decisiones cambian controles y modificadores: se devuelven las regiones
+            return {
+                'session': hosted.id,
+                'applied': applied,
+                'regions': [region_state(c) for c in session.continents],
+                'available_decisions': [decision_state(d) for d in session.available_decisions],
+                'decisions_remaining': session.decision_manager.get_decisions_remaining(),
+            }
+
+    async def op_state(self, request, client):
+        hosted = self._get(request)
+        async with hosted.lock:
+            return session_state(hosted)
+
+    async def op_sync(self, request, client):
+        hosted = self._get(request)
+        async with hosted.lock:
+            encoder = client.encoders.get(hosted.id)
+            if encoder is None:
+                encoder = client.encoders[hosted.id] = state_diff.StateEncoder(hosted.session)
+            frame = encoder.encode(keyframe=bool(request.get('keyframe')))
+        return {'session': hosted.id, 'frame': base64.b64encode(frame).decode("ascii"), 'bytes': len(frame)}
+
+    async def op_close(self, request, client):
+        hosted = self._get(request)
+        async with hosted.lock:
+            del self.sessions[hosted.id]
+        client.encoders.pop(hosted.id, None)
+        return {'session': hosted.id}
+
+    async def op_list(self, request, client):
+        return {'sessions': [
+            {'session': hosted.id, 'difficulty': hosted.session.difficulty,
+             'day': hosted.session.day, 'state': hosted.session.game_state}
+            for hosted in self.sessions.values()
+        ]}
+
+
+async def serve(server, host=HOST, port=PORT, unix_path=None):
+    """Arranca el servidor y atiende hasta que se cancela"""
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)
+        listener = await asyncio.start_unix_server(server.handle_client, path=unix_path)
+        address = unix_path
+    else:
+        listener = await asyncio.start_server(server.handle_client, host, port)
+        address = f"{host}:{port}"
+    print(f"Servidor de partidas escuchando en {address} (máximo {server.max_sessions} sesiones)")
+    async with listener:
+        await listener.serve_forever()
+
+
+class Client:
+    """Cliente síncrono sencillo para scripts y pruebas"""
+
+    def __init__(self, host=HOST, port=PORT, unix_path=None):
+        if unix_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port))
+        self.file = self.sock.makefile("rwb")
+        self._next_id = 1
+
+    def call(self, op, **params):
+        """Envía una petición y devuelve la respuesta; lanza ServerError si falla"""
+        request = dict(params, op=op, id=self._next_id)
+        self._next_id += 1
+        self.file.write(json.dumps(request).encode("utf-8") + b"\n")
+        self.file.flush()
+        response = json.loads(self.file.readline())
+        if not response.get('ok'):
+            raise ServerError(response.get('error'))
+        return response
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de partidas sin pantalla")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--unix", help="ruta de un socket Unix en lugar de TCP")
+    parser.add_argument("--workers", type=int, default=None, help="procesos para los avances largos")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    args = parser.parse_args()
+
+    server = SessionServer(args.max_sessions, args.workers)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("\nServidor detenido.")
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+import random
+import time
+from seir import Continent, SEIRSimulator
+from scenarios import load_scenario
+from events import EventManager
+from decisions import DecisionManager
+from profiler import timed
+
+# Columnas de los diccionarios de save_daily_stats, en orden. Son las de los
+# arrays de savegame, las filas de trajectory y las tablas de telemetry
+GLOBAL_FIELDS = ('total_population', 'susceptible', 'exposed', 'infected',
+                 'recovered', 'deaths', 'economy', 'morale')
+CONTINENT_FIELDS = ('susceptible', 'exposed', 'infected', 'recovered',
+                    'deaths', 'economy', 'morale')
+# Los demás campos se guardan como enteros
+FLOAT_FIELDS = ('economy', 'morale')
+
+class GameSession:
+    """Estado y reglas de una partida, sin pantalla ni interfaz
+    
+    GameLoop añade la interfaz gráfica encima; las repeticiones y las
+    simulaciones sin pantalla usan esta clase directamente. Con una semilla,
+    la sesión tiene su propio generador aleatorio y es reproducible.
+    """
+    
+    def __init__(self, difficulty="normal", rng=None, seed=None, history=None, scenario=None):
+        self.difficulty = difficulty
+        self.day = 1
+        
+        # Regiones, poblaciones y rutas de vuelo (nombre, ruta o Scenario; ver scenarios.py)
+        self.scenario = load_scenario(scenario)
+        
+        # Generador aleatorio de la partida: propio si hay semilla, si no el global
+        self.seed = seed
+        if rng is None:
+            rng = random.Random(seed) if seed is not None else random
+        self.rng = rng
+        
+        # Grabación de acciones para repeticiones (opcional)
+        self.recorder = None
+        
+        # Exportación de estadísticas diarias (opcional, ver telemetry.py)
+        self.telemetry = None
+        
+        # Inicializar componentes del juego
+        self.setup_continents()
+        self.simulator = SEIRSimulator(self.continents, difficulty, self.rng,
+                                       self.scenario.route_pairs())
+        self.event_manager = EventManager(difficulty, self.rng)
+        self.decision_manager = DecisionManager(difficulty, self.rng)
+        
+        # Estado del juego
+        self.game_state = "playing"  # "playing", "victory", "defeat"
+        self.defeat_reason = None
+        self.paused = False
+        self.available_decisions = []
+        
+        # Historial para estadísticas: una lista o un TrajectoryHistory (trajectory.py)
+        self.history = history if history is not None else []
+        
+        # Límites de tiempo para partida
+        self.max_days = 365  # Máximo un año
+        
+        # Guardar estado inicial
+        self.save_daily_stats()
+        
+        # Actualizar decisiones iniciales
+        self.update_available_decisions()
+    
+    def setup_continents(self):
+        """Configura las regiones iniciales a partir del escenario"""
+        self.continents = []
+        for data in self.scenario.region_configs(self.difficulty):
+            continent = Continent(
+                name=data["name"],
+                population=data["population"],
+                initial_infected=data["initial_infected"],
+                difficulty=self.difficulty
+            )
+            # Parámetros epidemiológicos propios de la región, si el escenario los fija
+            for field, value in data["parameters"].items():
+                setattr(continent, field, value)
+            self.continents.append(continent)
+    
+    def attach_telemetry(self, writer):
+        """Engancha un TelemetryWriter y le pasa los días ya guardados"""
+        self.telemetry = writer
+        for day_data in self.history:
+            writer.record_day(day_data)
+    
+    def recent_global(self, field, days):
+        """Últimos valores diarios de una estadística global
+        
+        Con un TrajectoryHistory es una vista sin copia sobre el fichero.
+        """
+        series = getattr(self.history, 'global_series', None)
+        if series is not None:
+            return series(field)[-days:]
+        return [day['global'][field] for day in self.history[-days:]]
+    
+    def update_available_decisions(self):
+        """Actualiza las decisiones disponibles"""
+        self.set_available_decisions(self.decision_manager.get_available_decisions(
+            self.day, self.continents, self.simulator.get_global_stats()
+        ))
+    
+    def set_available_decisions(self, decisions):
+        """Fija las decisiones que se ofrecen hoy"""
+        self.available_decisions = decisions
+    
+    def advance_day(self):
+        """Avanza un día en la simulación"""
+        return self.advance_days(1)
+    
+    @timed("GameSession.advance_days")
+    def advance_days(self, days, deadline=None):
+        """Avanza varios días seguidos y actualiza las decisiones una sola vez al final
+        
+        Si se indica deadline (time.perf_counter()), se detiene al agotarlo.
+        Devuelve el número de días simulados.
+        """
+        if self.game_state != "playing" or self.paused:
+            return 0
+        
+        advanced = 0
+        while advanced < days and self.game_state == "playing":
+            self.simulate_day()
+            advanced += 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        
+        # Actualizar decisiones disponibles
+        self.update_available_decisions()
+        
+        if self.recorder is not None:
+            self.recorder.record_advance(advanced)
+        
+        return advanced
+    
+    @timed("GameSession.simulate_day")
+    def simulate_day(self):
+        """Simula un día completo"""
+        # Ejecutar simulación
+        self.simulator.step()
+        
+        # Verificar y procesar eventos aleatorios
+        events = self.event_manager.check_events(self.day, self.continents, 
+                                                self.simulator.get_global_stats())
+        self.on_events(events)
+        
+        # Avanzar día y reiniciar contador de decisiones
+        self.day += 1
+        self.decision_manager.new_day(self.day)
+        
+        # Guardar estadísticas del día
+        self.save_daily_stats()
+        
+        # Verificar condiciones de fin de juego
+        self.check_game_over()
+        
+        if self.recorder is not None:
+            self.recorder.record_day(self)
+    
+    def on_events(self, events):
+        """Se llama con los eventos ocurridos cada día"""
+        pass
+    
+    def apply_decision(self, decision_id, continent_idx=None):
+        """Aplica una decisión política"""
+        success = self.decision_manager.apply_decision(
+            decision_id, self.continents, continent_idx
+        )
+        
+        if success:
+            if self.recorder is not None:
+                self.recorder.record_decision(decision_id, continent_idx)
+            
+            # Actualizar decisiones disponibles
+            self.update_available_decisions()
+        
+        return success
+    
+    def save_daily_stats(self):
+        """Guarda las estadísticas del día actual"""
+        global_stats = self.simulator.get_global_stats()
+        
+        day_data = {
+            'day': self.day,
+            'global': global_stats,
+            'continents': []
+        }
+        
+        for continent in self.continents:
+            continent_data = {
+                'name': continent.name,
+                'susceptible': int(continent.S),
+                'exposed': int(continent.E),
+                'infected': int(continent.I),
+                'recovered': int(continent.R),
+                'deaths': int(continent.deaths),
+                'economy': continent.economy,
+                'morale': continent.morale
+            }
+            day_data['continents'].append(continent_data)
+        
+        self.history.append(day_data)
+        
+        if self.telemetry is not None:
+            self.telemetry.record_day(day_data)
+    
+    def check_game_over(self):
+        """Verifica las condiciones de fin de juego"""
+        # Verificar victoria - epidemia controlada
+        if self.check_victory_conditions():
+            self.game_state = "victory"
+        else:
+            # Verificar derrota
+            defeat_reason = self.check_defeat_conditions()
+            if not defeat_reason:
+                return
+            self.game_state = "defeat"
+            self.defeat_reason = defeat_reason
+        
+        # Volcar la telemetría pendiente al terminar la partida
+        if self.telemetry is not None:
+            self.telemetry.flush()
+        self.on_game_over()
+    
+    def on_game_over(self):
+        """Se llama una vez cuando la partida termina"""
+        pass
+    
+    def check_victory_conditions(self):
+        """Verifica las condiciones de victoria"""
+        global_stats = self.simulator.get_global_stats()
+        
+        # Condición 1: Muy pocos infectados activos
+        if global_stats['infected'] < global_stats['total_population'] * 0.0001:  # 0.01%
+            # Condición 2: Economía y moral en niveles aceptables
+            if global_stats['economy'] >= 40 and global_stats['morale'] >= 35:
+                # Condición 3: La situación ha sido estable por varios días
+                if self.day > 30 and len(self.history) >= 7:
+                    recent_infections = self.recent_global('infected', 7)
+                    if all(infections < global_stats['total_population'] * 0.001 for infections in recent_infections):
+                        return True
+        
+        # Victoria alternativa: control prolongado con bajas cifras
+        if self.day > 100:
+            if (global_stats['infected'] < global_stats['total_population'] * 0.002 and
+                global_stats['economy'] >= 30 and global_stats['morale'] >= 25):
+                return True
+        
+        return False
+    
+    def check_defeat_conditions(self):
+        """Verifica las condiciones de derrota"""
+        global_stats = self.simulator.get_global_stats()
+        
+        # Derrota 1: Demasiadas muertes
+        death_rate = global_stats['deaths'] / global_stats['total_population']
+        if death_rate > 0.15:  # 15% de la población
+            return "too_many_deaths"
+        
+        # Derrota 2: Colapso económico total
+        if global_stats['economy'] <= 5:
+            return "economic_collapse"
+        
+        # Derrota 3: Colapso de moral total
+        if global_stats['morale'] <= 5:
+            return "morale_collapse"
+        
+        # Derrota 4: Propagación incontrolable
+        infection_rate = global_stats['infected'] / global_stats['total_population']
+        if infection_rate > 0.5:  # 50% de la población infectada simultáneamente
+            return "uncontrolled_spread"
+        
+        # Derrota 5: Límite de tiempo
+        if self.day > self.max_days:
+            return "time_limit"
+        
+        # Derrota 6: Situación crítica sostenida
+        if self.day > 50 and len(self.history) >= 30:
+            recent_stats = zip(self.recent_global('economy', 30), self.recent_global('morale', 30),
+                               self.recent_global('infected', 30), self.recent_global('total_population', 30))
+            critical_days = sum(1 for economy, morale, infected, population in recent_stats 
+                              if (economy < 20 or 
+                                  morale < 20 or
+                                  infected / population > 0.2))
+            if critical_days >= 25:  # 25 de los últimos 30 días en situación crítica
+                return "uncontrolled_spread"
+        
+        return None
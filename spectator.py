@@ -0,0 +1,383 @@
+"""Visores de solo lectura alimentados desde memoria compartida
+
+El juego publica el estado de la partida (compartimentos de cada región,
+estado global, eventos recientes y la serie diaria de estadísticas globales)
+en un bloque de multiprocessing.shared_memory. Los espectadores son procesos
+aparte que leen ese bloque y dibujan WorldMap y los paneles con
+state_diff.ViewerScreen, así que el dibujo del espectador no quita tiempo al
+bucle del juego.
+
+La coherencia se garantiza con un seqlock: el escritor pone la secuencia en
+impar antes de escribir y en par al terminar; el lector copia los datos y
+repite si la secuencia era impar o ha cambiado entre medias. El escritor
+nunca espera a los lectores.
+
+Estructura del bloque (little endian):
+
+    cabecera (HEADER): marca, versión, regiones máximas, capacidad del
+                       historial, secuencia, época, regiones, día, estado,
+                       motivo de derrota, cerrado, eventos, días del historial
+    nombres                  u32 + UTF-8 (hasta NAMES_BYTES)
+    población                int64             x regiones máximas
+    valores                  float64           x regiones máximas x len(REGION_FIELDS)
+    controles                u8                x regiones máximas
+    eventos recientes        EVENT_SLOT        x RECENT_EVENTS
+    historial global         float64           x capacidad x (1 + len(GLOBAL_FIELDS)), en anillo
+
+Uso:
+    python main.py --spectator                (el juego abre un espectador)
+    python spectator.py NOMBRE [ESCENARIO]    (espectador para un bloque ya publicado)
+"""
+import struct
+import subprocess
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from state_diff import REGION_FIELDS, ContinentView, ViewerState, region_matrix, control_vector
+from savegame import GAME_STATES, DEFEAT_REASONS, GLOBAL_FIELDS, FLOAT_FIELDS
+
+MAGIC = b"EPIDSHM1"
+LAYOUT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIQIIiBBBBI")
+SEQ_OFFSET = 16
+
+# Tamaños fijos del bloque
+MAX_REGIONS = 256
+NAMES_BYTES = 64 * 1024
+RECENT_EVENTS = 8
+EVENT_SLOT = struct.Struct("<i124s")
+HISTORY_CAPACITY = 4096
+
+# Ritmo de sondeo y de dibujo del espectador
+SPECTATOR_FPS = 30
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _sections(max_regions, history_capacity):
+    """Posición de cada sección y tamaño total del bloque"""
+    sections = {}
+    offset = _align(HEADER.size)
+    sections['names'] = offset
+    offset = _align(offset + 4 + NAMES_BYTES)
+    sections['population'] = offset
+    offset += max_regions * 8
+    sections['values'] = offset
+    offset += max_regions * len(REGION_FIELDS) * 8
+    sections['controls'] = offset
+    offset = _align(offset + max_regions)
+    sections['events'] = offset
+    offset = _align(offset + RECENT_EVENTS * EVENT_SLOT.size)
+    sections['history'] = offset
+    offset += history_capacity * (1 + len(GLOBAL_FIELDS)) * 8
+    return sections, offset
+
+
+class _Layout:
+    """Vistas de NumPy sobre las secciones del bloque"""
+
+    def __init__(self, buffer, max_regions, history_capacity):
+        self.max_regions = max_regions
+        self.history_capacity = history_capacity
+        sections, _ = _sections(max_regions, history_capacity)
+        self.names_offset = sections['names']
+        self.events_offset = sections['events']
+        self.population = np.ndarray(max_regions, '<i8', buffer, sections['population'])
+        self.values = np.ndarray((max_regions, len(REGION_FIELDS)), '<f8', buffer, sections['values'])
+        self.controls = np.ndarray(max_regions, 'u1', buffer, sections['controls'])
+        self.history = np.ndarray((history_capacity, 1 + len(GLOBAL_FIELDS)), '<f8', buffer,
+                                  sections['history'])
+
+
+class StatePublisher:
+    """Publica el estado de la partida en memoria compartida (lado del juego)"""
+
+    def __init__(self, name=None, max_regions=MAX_REGIONS, history_capacity=HISTORY_CAPACITY):
+        _, size = _sections(max_regions, history_capacity)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+        self.layout = _Layout(self.shm.buf, max_regions, history_capacity)
+        self.seq = 0
+        self.epoch = 0
+        self.game = None
+        self.publishes = 0
+        self._key = None
+        self._names = None
+        self._history = None
+        self._events = None
+        self._history_sent = 0
+        self._write_header(0, 0, 0, 0, 0, 0, 0)
+
+    def _write_header(self, regions, day, state, defeat, closed, events, history_days):
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, LAYOUT_VERSION, self.layout.max_regions,
+                         self.layout.history_capacity, self.seq, self.epoch, regions, day,
+                         state, defeat, closed, events, history_days)
+
+    def attach(self, game):
+        """Empieza a publicar otra partida (o ninguna, con None)"""
+        if game is not None and len(game.continents) > self.layout.max_regions:
+            raise ValueError(f"La partida tiene {len(game.continents)} regiones; "
+                             f"el bloque admite {self.layout.max_regions}")
+        self.game = game
+        self._key = None
+        self.publish()
+
+    def publish(self):
+        """Escribe el estado si ha cambiado desde la última vez; devuelve si escribió"""
+        game = self.game
+        if game is None:
+            key = None
+        else:
+            key = (game.day, game.game_state, len(game.history), id(game.history),
+                   len(game.event_manager.events_history), len(game.decision_manager.decisions_history),
+                   id(game.event_manager.events_history))
+        if key == self._key and self.publishes:
+            return False
+        self._key = key
+
+        # Secuencia impar: escritura en curso
+        self.seq += 1
+        struct.pack_into("<Q", self.shm.buf, SEQ_OFFSET, self.seq)
+        if game is None:
+            self._write_header(0, 0, 0, 0, 0, 0, 0)
+        else:
+            self._write_game(game)
+        self.seq += 1
+        struct.pack_into("<Q", self.shm.buf, SEQ_OFFSET, self.seq)
+        self.publishes += 1
+        return True
+
+    def _write_game(self, game):
+        layout = self.layout
+        continents = game.continents
+        n = len(continents)
+
+        names = [continent.name for continent in continents]
+        history = game.history
+        all_events = game.event_manager.events_history
+        if (names != self._names or history is not self._history or all_events is not self._events
+                or len(history) < self._history_sent):
+            # Otra partida o partida cargada: los lectores empiezan de cero
+            self.epoch += 1
+            data = "\n".join(names).encode("utf-8")
+            if len(data) > NAMES_BYTES:
+                raise ValueError("Los nombres de las regiones no caben en el bloque compartido")
+            struct.pack_into(f"<I{len(data)}s", self.shm.buf, layout.names_offset, len(data), data)
+            layout.population[:n] = [continent.population for continent in continents]
+            self._names = names
+            self._history = history
+            self._events = all_events
+            self._history_sent = 0
+
+        layout.values[:n] = region_matrix(continents)
+        layout.controls[:n] = control_vector(continents)
+
+        events = all_events[-RECENT_EVENTS:]
+        for slot, record in enumerate(events):
+            text = f"{record['event_id']}\t{record['name']}".encode("utf-8")[:EVENT_SLOT.size - 4]
+            EVENT_SLOT.pack_into(self.shm.buf, layout.events_offset + slot * EVENT_SLOT.size,
+                                 record['day'], text)
+
+        # Días nuevos del historial global, en anillo
+        capacity = layout.history_capacity
+        for index in range(max(self._history_sent, len(history) - capacity), len(history)):
+            day_data = history[index]
+            global_stats = day_data['global']
+            layout.history[index % capacity] = [day_data['day']] + [global_stats[field] for field in GLOBAL_FIELDS]
+        self._history_sent = len(history)
+
+        self._write_header(n, game.day, GAME_STATES.index(game.game_state),
+                           DEFEAT_REASONS.index(game.defeat_reason), 0, len(events), len(history))
+
+    def close(self):
+        """Avisa a los espectadores y libera el bloque"""
+        self.seq += 1
+        struct.pack_into("<Q", self.shm.buf, SEQ_OFFSET, self.seq)
+        self.seq += 1
+        self._write_header(0, 0, 0, 0, 1, 0, 0)
+        self.layout = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(name):
+    """Abre un bloque existente sin registrarlo en el resource_tracker
+
+    El bloque pertenece al juego. Hasta Python 3.13 abrirlo lo registra
+    también en este proceso, que lo borraría al salir (o desharía el registro
+    del propio juego si comparten tracker).
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class StateReader:
+    """Lee el bloque publicado y mantiene un ViewerState (lado del espectador)"""
+
+    def __init__(self, name, retries=1000):
+        self.shm = _attach(name)
+
+        magic, version, max_regions, history_capacity = HEADER.unpack_from(self.shm.buf, 0)[:4]
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            self.shm.close()
+            raise ValueError(f"El bloque {name} no contiene una partida publicada")
+        self.layout = _Layout(self.shm.buf, max_regions, history_capacity)
+        self.retries = retries
+        self.state = ViewerState()
+        self.closed = False
+        self.torn_reads = 0
+        self._seq = None
+        self._epoch = None
+        self._history_read = 0
+
+    def read(self):
+        """Actualiza el estado si el juego ha publicado algo nuevo; devuelve si cambió"""
+        buf = self.shm.buf
+        for _ in range(self.retries):
+            seq = struct.unpack_from("<Q", buf, SEQ_OFFSET)[0]
+            if seq == self._seq:
+                return False
+            if seq & 1:
+                # Escritura en curso: ceder el procesador y reintentar
+                time.sleep(0)
+                continue
+            snapshot = self._copy()
+            if struct.unpack_from("<Q", buf, SEQ_OFFSET)[0] == seq:
+                self._seq = seq
+                self._apply(snapshot)
+                return True
+            self.torn_reads += 1
+        return False
+
+    def _copy(self):
+        """Copia lo necesario del bloque (puede salir incoherente; read() lo comprueba)"""
+        layout = self.layout
+        buf = self.shm.buf
+        (_, _, _, _, _, epoch, regions, day, state, defeat, closed,
+         events, history_days) = HEADER.unpack_from(buf, 0)
+        snapshot = {
+            'epoch': epoch, 'regions': regions, 'day': day, 'state': state, 'defeat': defeat,
+            'closed': closed, 'history_days': history_days,
+            'values': layout.values[:regions].tolist(),
+            'controls': layout.controls[:regions].tolist(),
+            'events': [EVENT_SLOT.unpack_from(buf, layout.events_offset + i * EVENT_SLOT.size)
+                       for i in range(events)],
+        }
+        if epoch != self._epoch:
+            size, = struct.unpack_from("<I", buf, layout.names_offset)
+            names = bytes(buf[layout.names_offset + 4:layout.names_offset + 4 + size]).decode("utf-8", "replace")
+            snapshot['names'] = names.split("\n") if regions else []
+            snapshot['population'] = layout.population[:regions].tolist()
+            start = 0
+        else:
+            start = self._history_read
+        capacity = layout.history_capacity
+        start = max(start, history_days - capacity)
+        snapshot['history_start'] = start
+        snapshot['history'] = [layout.history[index % capacity].tolist() for index in range(start, history_days)]
+        return snapshot
+
+    def _apply(self, snapshot):
+        state = self.state
+        if snapshot['closed']:
+            # El juego ha terminado: se conserva lo último que se mostró
+            self.closed = True
+            return
+        if snapshot['epoch'] != self._epoch:
+            self._epoch = snapshot['epoch']
+            state.continents = [ContinentView(name, population) for name, population
+                                in zip(snapshot['names'], snapshot['population'])]
+            state.history = []
+        for continent, values, controls in zip(state.continents, snapshot['values'], snapshot['controls']):
+            continent.set_values(values)
+            continent.set_controls(controls)
+
+        state.day = snapshot['day']
+        state.game_state = GAME_STATES[snapshot['state']]
+        state.defeat_reason = DEFEAT_REASONS[snapshot['defeat']]
+        state.events_history = []
+        for day, text in snapshot['events']:
+            event_id, _, name = text.rstrip(b"\0").decode("utf-8", "replace").partition("\t")
+            state.events_history.append({'day': day, 'event_id': event_id, 'name': name})
+
+        # Solo el estado global de cada día: es lo que usa el panel de estadísticas
+        for row in snapshot['history']:
+            global_stats = {field: value if field in FLOAT_FIELDS else int(value)
+                            for field, value in zip(GLOBAL_FIELDS, row[1:])}
+            state.history.append({'day': int(row[0]), 'global': global_stats, 'continents': []})
+        self._history_read = snapshot['history_days']
+        state.version += 1
+
+    def close(self):
+        self.layout = None
+        self.shm.close()
+
+
+def launch(name, scenario=None):
+    """Abre un espectador en otro proceso para el bloque indicado"""
+    args = [sys.executable, __file__, name]
+    if scenario:
+        args.append(scenario)
+    return subprocess.Popen(args)
+
+
+def run_spectator(name, scenario=None):
+    """Bucle del espectador: sondea el bloque y dibuja cuando cambia"""
+    import pygame
+    from state_diff import ViewerScreen
+    from render_cache import get_font, render_text
+
+    reader = StateReader(name)
+    pygame.init()
+    screen = pygame.display.set_mode((1200, 800))
+    pygame.display.set_caption("Controla la Epidemia - Espectador")
+    viewer = ViewerScreen(screen, scenario)
+    clock = pygame.time.Clock()
+    waiting_drawn = False
+
+    try:
+        while not reader.closed:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return
+                viewer.handle_event(event)
+
+            reader.read()
+            if viewer.draw(reader.state):
+                pygame.display.flip()
+                waiting_drawn = False
+            elif not reader.state.continents and not waiting_drawn:
+                screen.fill((10, 10, 30))
+                text = render_text(get_font(36), "Esperando una partida...", (200, 200, 200))
+                screen.blit(text, text.get_rect(center=screen.get_rect().center))
+                pygame.display.flip()
+                waiting_drawn = True
+            clock.tick(SPECTATOR_FPS)
+    finally:
+        reader.close()
+        pygame.quit()
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        print("Uso: python spectator.py NOMBRE_DEL_BLOQUE [ESCENARIO]")
+        return 1
+    run_spectator(*sys.argv[1:])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,491 @@
+"""Protocolo de diferencias de estado para visores ligeros
+
+StateEncoder compara el estado actual de una partida con el último que envió
+y produce una trama binaria con solo lo que ha cambiado: compartimentos y
+modificadores de cada región, controles (aeropuertos, escuelas...), eventos y
+decisiones nuevos y, si cambian, las decisiones disponibles. Cada cierto
+número de tramas, o cuando el cliente lo pide, envía un fotograma clave con
+el estado completo. StateDecoder aplica las tramas sobre un ViewerState cuyas
+regiones (ContinentView) se pueden pasar tal cual a WorldMap y GameUI.
+
+Estructura de una trama (little endian):
+
+    cabecera (FRAME): marca, versión, tipo, flags, estado de la partida,
+                      motivo de derrota, decisiones restantes, regiones,
+                      secuencia, secuencia base, día
+    fotograma clave:  nombres (u32 + UTF-8), población int64 x n,
+                      valores float64 x n x len(REGION_FIELDS), controles u8 x n
+    diferencia:       u32 regiones cambiadas, índices u32, máscaras u16,
+                      valores float64 cambiados (por región y campo),
+                      u32 controles cambiados, índices u32, controles u8
+    ambos:            eventos y decisiones nuevos (LOG_RECORD + texto),
+                      decisiones disponibles (u32 + UTF-8, solo si FLAG_AVAILABLE)
+
+Uso (visor conectado al servidor de partidas):
+    python state_diff.py --session 1 [--port 8765]
+"""
+import argparse
+import base64
+import struct
+import sys
+import time
+
+import numpy as np
+
+from savegame import GAME_STATES, DEFEAT_REASONS
+
+MAGIC = b"EPDF"
+VERSION = 1
+
+FRAME = struct.Struct("<4sBBBBBBIIIi")
+LOG_RECORD = struct.Struct("<ihH")
+
+KIND_KEYFRAME = 1
+KIND_DELTA = 2
+
+# La trama incluye las decisiones disponibles
+FLAG_AVAILABLE = 1
+
+# Valores de cada región que se siguen (como máximo 16: máscara u16)
+REGION_FIELDS = ('S', 'E', 'I', 'R', 'deaths', 'economy', 'morale',
+                 'beta_modifier', 'gamma_modifier', 'mu_modifier',
+                 'economy_modifier', 'morale_modifier',
+                 'vaccination_rate', 'hospital_capacity')
+CONTROL_FIELDS = ('airports_open', 'schools_open', 'mask_mandate', 'quarantine')
+
+# Cada cuántas tramas se envía un fotograma clave
+KEYFRAME_INTERVAL = 60
+
+# Eventos y decisiones pasados que se incluyen en un fotograma clave
+KEYFRAME_LOG = 20
+
+_FIELD_BITS = 1 << np.arange(len(REGION_FIELDS), dtype=np.uint16)
+
+
+class DiffError(Exception):
+    """La trama no se puede aplicar: el visor necesita un fotograma clave"""
+    pass
+
+
+def region_matrix(continents):
+    """Valores de REGION_FIELDS de cada región como (región x campo)"""
+    return np.array([[getattr(continent, field) for field in REGION_FIELDS]
+                     for continent in continents], dtype='<f8').reshape(len(continents), len(REGION_FIELDS))
+
+
+def control_vector(continents):
+    """Controles de cada región empaquetados en un byte"""
+    return np.array([sum(1 << bit for bit, field in enumerate(CONTROL_FIELDS) if getattr(continent, field))
+                     for continent in continents], dtype='u1')
+
+
+def _pack_text(text):
+    data = text.encode("utf-8")
+    return struct.pack("<I", len(data)) + data
+
+
+def _pack_log(records):
+    """Registros (día, destino, texto) de eventos o decisiones"""
+    chunks = [struct.pack("<H", len(records))]
+    for day, target, text in records:
+        data = text.encode("utf-8")
+        chunks.append(LOG_RECORD.pack(day, target, len(data)))
+        chunks.append(data)
+    return b"".join(chunks)
+
+
+def _event_records(records):
+    return [(record['day'], -1, f"{record['event_id']}\t{record['name']}") for record in records]
+
+
+def _decision_records(records):
+    return [(record['day'], -1 if record['target'] is None else record['target'],
+             f"{record['decision_id']}\t{record['name']}") for record in records]
+
+
+class StateEncoder:
+    """Genera las tramas de una partida para un visor
+
+    Un codificador por visor: recuerda lo último que envió a ese visor.
+    """
+
+    def __init__(self, session, keyframe_interval=KEYFRAME_INTERVAL):
+        self.session = session
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self.frames_since_keyframe = 0
+        self.bytes_sent = 0
+        self._names = None
+        self._values = None
+        self._controls = None
+        self._events = None
+        self._decisions = None
+        self._events_sent = 0
+        self._decisions_sent = 0
+        self._available = None
+
+    def encode(self, keyframe=False):
+        """Devuelve la trama con los cambios desde la anterior"""
+        session = self.session
+        continents = session.continents
+        names = [continent.name for continent in continents]
+        events = session.event_manager.events_history
+        decisions = session.decision_manager.decisions_history
+
+        # Si algo no se puede expresar como diferencia (otra partida cargada), fotograma clave
+        if (keyframe or self._names != names or self.frames_since_keyframe >= self.keyframe_interval
+                or events is not self._events or decisions is not self._decisions):
+            kind = KIND_KEYFRAME
+        else:
+            kind = KIND_DELTA
+
+        values = region_matrix(continents)
+        controls = control_vector(continents)
+        available = [(decision.id, decision.name) for decision in session.available_decisions]
+        flags = FLAG_AVAILABLE if kind == KIND_KEYFRAME or available != self._available else 0
+
+        base_seq = self.seq
+        self.seq += 1
+        chunks = [FRAME.pack(MAGIC, VERSION, kind, flags,
+                             GAME_STATES.index(session.game_state),
+                             DEFEAT_REASONS.index(session.defeat_reason),
+                             session.decision_manager.get_decisions_remaining(),
+                             len(continents), self.seq, base_seq, session.day)]
+
+        if kind == KIND_KEYFRAME:
+            chunks.append(_pack_text("\n".join(names)))
+            chunks.append(np.array([continent.population for continent in continents], dtype='<i8').tobytes())
+            chunks.append(values.tobytes())
+            chunks.append(controls.tobytes())
+            new_events = events[-KEYFRAME_LOG:]
+            new_decisions = decisions[-KEYFRAME_LOG:]
+            self.frames_since_keyframe = 0
+        else:
+            changed = values != self._values
+            rows = np.flatnonzero(changed.any(axis=1))
+            masks = (changed[rows] * _FIELD_BITS).sum(axis=1).astype('<u2')
+            chunks.append(struct.pack("<I", len(rows)))
+            chunks.append(rows.astype('<u4').tobytes())
+            chunks.append(masks.tobytes())
+            chunks.append(values[rows][changed[rows]].tobytes())
+
+            control_rows = np.flatnonzero(controls != self._controls)
+            chunks.append(struct.pack("<I", len(control_rows)))
+            chunks.append(control_rows.astype('<u4').tobytes())
+            chunks.append(controls[control_rows].tobytes())
+            new_events = events[self._events_sent:]
+            new_decisions = decisions[self._decisions_sent:]
+            self.frames_since_keyframe += 1
+
+        chunks.append(_pack_log(_event_records(new_events)))
+        chunks.append(_pack_log(_decision_records(new_decisions)))
+        if flags & FLAG_AVAILABLE:
+            chunks.append(_pack_text("\n".join(f"{id}\t{name}" for id, name in available)))
+
+        self._names = names
+        self._values = values
+        self._controls = controls
+        self._events = events
+        self._decisions = decisions
+        self._events_sent = len(events)
+        self._decisions_sent = len(decisions)
+        self._available = available
+
+        frame = b"".join(chunks)
+        self.bytes_sent += len(frame)
+        return frame
+
+
+class ContinentView:
+    """Región reconstruida en el visor, con los atributos que usan WorldMap y GameUI"""
+
+    __slots__ = ('name', 'population') + REGION_FIELDS + CONTROL_FIELDS
+
+    def __init__(self, name, population):
+        self.name = name
+        self.population = population
+
+    def get_infection_rate(self):
+        return self.I / self.population if self.population > 0 else 0
+
+    def set_values(self, values):
+        for field, value in zip(REGION_FIELDS, values):
+            setattr(self, field, value)
+
+    def set_controls(self, byte):
+        for bit, field in enumerate(CONTROL_FIELDS):
+            setattr(self, field, bool(byte & (1 << bit)))
+
+
+class ViewerState:
+    """Estado de la partida en el lado del visor"""
+
+    def __init__(self):
+        self.seq = None
+        self.day = 0
+        self.game_state = "playing"
+        self.defeat_reason = None
+        self.decisions_remaining = 0
+        self.continents = []
+        self.events_history = []
+        self.decisions_history = []
+        self.available_decisions = []
+        # Un día por trama con día nuevo, para el panel de estadísticas
+        self.history = []
+        # Se incrementa con cada trama que cambia algo visible
+        self.version = 0
+
+    def get_global_stats(self):
+        """Estadísticas globales con las mismas cuentas que SEIRSimulator"""
+        continents = self.continents
+        total_pop = sum(c.population for c in continents)
+        if not total_pop:
+            return None
+        return {
+            'total_population': total_pop,
+            'susceptible': int(sum(c.S for c in continents)),
+            'exposed': int(sum(c.E for c in continents)),
+            'infected': int(sum(c.I for c in continents)),
+            'recovered': int(sum(c.R for c in continents)),
+            'deaths': int(sum(c.deaths for c in continents)),
+            'economy': sum(c.economy * c.population for c in continents) / total_pop,
+            'morale': sum(c.morale * c.population for c in continents) / total_pop,
+        }
+
+    def get_recent_events(self, days=7):
+        """Eventos de los últimos días, como EventManager.get_recent_events()"""
+        if not self.events_history:
+            return []
+        current_day = max(event['day'] for event in self.events_history)
+        recent_events = [event for event in self.events_history if current_day - event['day'] < days]
+        return sorted(recent_events, key=lambda x: x['day'], reverse=True)
+
+    def record_day(self):
+        """Añade el día actual al historial del visor (o lo sustituye si ya estaba)"""
+        if self.history and self.history[-1]['day'] > self.day:
+            self.history.clear()  # la partida volvió atrás (carga)
+        elif self.history and self.history[-1]['day'] == self.day:
+            self.history.pop()  # trama clave del mismo día: solo se actualiza
+        self.history.append({
+            'day': self.day,
+            'global': self.get_global_stats(),
+            'continents': [{'name': c.name, 'susceptible': int(c.S), 'exposed': int(c.E),
+                            'infected': int(c.I), 'recovered': int(c.R), 'deaths': int(c.deaths),
+                            'economy': c.economy, 'morale': c.morale} for c in self.continents],
+        })
+
+
+class _Reader:
+    """Lectura secuencial de una trama"""
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt):
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def array(self, dtype, count):
+        dtype = np.dtype(dtype)
+        values = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.offset)
+        self.offset += dtype.itemsize * count
+        return values
+
+    def text(self):
+        size, = struct.unpack_from("<I", self.data, self.offset)
+        self.offset += 4 + size
+        return bytes(self.data[self.offset - size:self.offset]).decode("utf-8")
+
+    def log(self):
+        count, = struct.unpack_from("<H", self.data, self.offset)
+        self.offset += 2
+        records = []
+        for _ in range(count):
+            day, target, size = self.unpack(LOG_RECORD)
+            text = bytes(self.data[self.offset:self.offset + size]).decode("utf-8")
+            self.offset += size
+            id, name = text.split("\t", 1)
+            records.append((day, None if target < 0 else target, id, name))
+        return records
+
+
+class StateDecoder:
+    """Aplica tramas sobre un ViewerState"""
+
+    def __init__(self):
+        self.state = ViewerState()
+
+    def apply(self, frame):
+        """Aplica una trama y devuelve el estado; lanza DiffError si falta la base"""
+        state = self.state
+        reader = _Reader(frame)
+        (magic, version, kind, flags, game_state, defeat_reason, decisions_remaining,
+         n_regions, seq, base_seq, day) = reader.unpack(FRAME)
+        if magic != MAGIC or version != VERSION:
+            raise DiffError("Trama no reconocida")
+        if kind == KIND_DELTA and (state.seq != base_seq or len(state.continents) != n_regions):
+            raise DiffError(f"Falta la trama {base_seq}: se necesita un fotograma clave")
+
+        if kind == KIND_KEYFRAME:
+            names = reader.text().split("\n") if n_regions else []
+            population = reader.array('<i8', n_regions).tolist()
+            values = reader.array('<f8', n_regions * len(REGION_FIELDS)).reshape(n_regions, -1).tolist()
+            controls = reader.array('u1', n_regions).tolist()
+            state.continents = [ContinentView(name, pop) for name, pop in zip(names, population)]
+            for continent, row, byte in zip(state.continents, values, controls):
+                continent.set_values(row)
+                continent.set_controls(byte)
+            state.events_history = []
+            state.decisions_history = []
+        else:
+            count, = struct.unpack_from("<I", reader.data, reader.offset)
+            reader.offset += 4
+            rows = reader.array('<u4', count).tolist()
+            masks = reader.array('<u2', count).tolist()
+            total = sum(bin(mask).count("1") for mask in masks)
+            values = iter(reader.array('<f8', total).tolist())
+            for row, mask in zip(rows, masks):
+                continent = state.continents[row]
+                for bit, field in enumerate(REGION_FIELDS):
+                    if mask & (1 << bit):
+                        setattr(continent, field, next(values))
+
+            count, = struct.unpack_from("<I", reader.data, reader.offset)
+            reader.offset += 4
+            rows = reader.array('<u4', count).tolist()
+            for row, byte in zip(rows, reader.array('u1', count).tolist()):
+                state.continents[row].set_controls(byte)
+
+        for event_day, _, id, name in reader.log():
+            state.events_history.append({'day': event_day, 'event_id': id, 'name': name})
+        for decision_day, target, id, name in reader.log():
+            state.decisions_history.append({'day': decision_day, 'decision_id': id,
+                                            'target': target, 'name': name})
+        if flags & FLAG_AVAILABLE:
+            text = reader.text()
+            state.available_decisions = [tuple(line.split("\t", 1)) for line in text.split("\n")] if text else []
+
+        new_day = day != state.day
+        state.seq = seq
+        state.day = day
+        state.game_state = GAME_STATES[game_state]
+        state.defeat_reason = DEFEAT_REASONS[defeat_reason]
+        state.decisions_remaining = decisions_remaining
+        if new_day or kind == KIND_KEYFRAME:
+            state.record_day()
+        state.version += 1
+        return state
+
+
+class ViewerScreen:
+    """Dibuja el mapa y los paneles de la partida a partir de un ViewerState
+
+    Solo lectura: el visor puede abrir las estadísticas, pero no avanzar días
+    ni volver al menú.
+    """
+
+    def __init__(self, screen, scenario=None):
+        # Importaciones locales: codificar y decodificar no necesita la interfaz
+        from map import WorldMap
+        from ui import GameUI
+        from events import EventUI
+
+        self.screen = screen
+        self.map = WorldMap(screen, scenario)
+        self.ui = GameUI(screen)
+        self.event_ui = EventUI(screen)
+        self.ui.next_day_button.set_enabled(False)
+        self.ui.menu_button.set_enabled(False)
+        self.needs_redraw = True
+        self._drawn_version = None
+        self._history_length = 0
+
+    def handle_event(self, event):
+        """Pasa el evento a la interfaz (botón de estadísticas) y repinta"""
+        self.ui.handle_event(event)
+        self.needs_redraw = True
+
+    def draw(self, state):
+        """Redibuja la pantalla si hay algo nuevo; devuelve si ha dibujado"""
+        if not state.continents:
+            return False
+        if not (self.needs_redraw or state.version != self._drawn_version or self.ui.is_animating()):
+            return False
+        if len(state.history) < self._history_length:
+            self.ui.reset_stats_chart()
+        elif len(state.history) != self._history_length:
+            self.ui.invalidate_stats_chart()
+        if state.version != self._drawn_version:
+            self.ui.invalidate_panels()
+        self._history_length = len(state.history)
+        self._drawn_version = state.version
+        self.needs_redraw = False
+
+        self.screen.fill((10, 10, 30))
+        self.map.draw(state.continents, None)
+        if not self.ui.stats_panel_visible:
+            recent_events = state.get_recent_events()
+            if recent_events:
+                self.event_ui.draw_events_history(recent_events, *self.ui.events_rect)
+        self.ui.draw(state.day, state.get_global_stats(), state.continents, state.history)
+        return True
+
+
+def run_viewer(client, session_id, interval=0.25):
+    """Visor en una ventana propia que pide tramas al servidor de partidas"""
+    import pygame
+
+    pygame.init()
+    screen = pygame.display.set_mode((1200, 800))
+    pygame.display.set_caption(f"Controla la Epidemia - Visor de la sesión {session_id}")
+    viewer = ViewerScreen(screen, client.call("state", session=session_id).get('scenario'))
+    decoder = StateDecoder()
+    keyframe = True
+    clock = pygame.time.Clock()
+    next_sync = 0.0
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+            viewer.handle_event(event)
+
+        now = time.perf_counter()
+        if now >= next_sync:
+            next_sync = now + interval
+            response = client.call("sync", session=session_id, keyframe=keyframe)
+            try:
+                decoder.apply(base64.b64decode(response['frame']))
+                keyframe = False
+            except DiffError:
+                keyframe = True
+
+        if viewer.draw(decoder.state):
+            pygame.display.flip()
+        clock.tick(30)
+
+
+def main():
+    # Importación local: el protocolo no depende del servidor
+    from server import Client, HOST, PORT
+
+    parser = argparse.ArgumentParser(description="Visor de una partida del servidor a partir de diferencias")
+    parser.add_argument("--session", type=int, required=True)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--unix", help="socket Unix del servidor")
+    args = parser.parse_args()
+
+    client = Client(args.host, args.port, args.unix)
+    try:
+        run_viewer(client, args.session)
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,14 @@
 import pygame
 import time
+from render_cache import get_font, render_text, get_gradient_background, STORY_PALETTE
 
 class StoryScreen:
     def __init__(self, screen, difficulty="normal"):
         self.screen = screen
         self.difficulty = difficulty
-        self.font_title = pygame.font.Font(None, 48)
-        self.font_text = pygame.font.Font(None, 28)
-        self.font_small = pygame.font.Font(None, 22)
+        self.font_title = get_font(48)
+        self.font_text = get_font(28)
+        self.font_small = get_font(22)
         
         self.story_text = self.get_story_text()
         self.current_page = 0
@@ -25,6 +26,10 @@ class StoryScreen:
         
         self.button_hovered = None
         self.finished = False
+        
+        # Maquetación precalculada de la página actual (se rehace al cambiar de página)
+        self.page_layout = None
+        self.layout_key = None
     
     def get_story_text(self):
         """Devuelve el texto de la historia según la dificultad"""
@@ -186,16 +191,69 @@ class StoryScreen:
         dt = current_time - self.last_animation_time
         self.last_animation_time = current_time
         
-        # Calcular texto total de la página actual
-        current_story = self.story_text[self.current_page]
-        total_text = current_story["title"] + "\n\n" + "\n".join(current_story["text"])
+        # Longitud total de la página, calculada una vez en la maquetación
+        target_progress = self.get_page_layout()['total_chars']
         
         # Animar texto
-        target_progress = len(total_text)
         if self.text_animation_progress < target_progress:
             self.text_animation_progress += self.animation_speed * dt
             self.text_animation_progress = min(self.text_animation_progress, target_progress)
     
+    def is_animating(self):
+        """Indica si el texto de la página todavía se está revelando"""
+        return self.text_animation_progress < self.get_page_layout()['total_chars']
+    
+    def get_page_layout(self, start_y=150):
+        """Devuelve la maquetación de la página actual, rehaciéndola si cambió"""
+        key = (self.current_page, self.screen.get_width(), start_y)
+        if self.layout_key != key:
+            self.page_layout = self.build_page_layout(self.story_text[self.current_page], start_y)
+            self.layout_key = key
+        return self.page_layout
+    
+    def build_page_layout(self, page, start_y):
+        """Pre-renderiza cada línea completa y calcula el avance de cada carácter"""
+        lines = []
+        y_offset = start_y
+        chars_count = 0
+        
+        for line in page["text"]:
+            if line.strip():
+                if line.startswith("•"):
+                    # Líneas de lista con color diferente
+                    text_color = (200, 255, 200)
+                elif line.startswith("Ventajas") or line.startswith("Características") or line.startswith("Desafíos"):
+                    text_color = (255, 255, 150)
+                else:
+                    text_color = (255, 255, 255)
+                
+                surface = render_text(self.font_text, line, text_color)
+                
+                # offsets[k] = ancho en píxeles de los k primeros caracteres
+                offsets = [0]
+                for char, metrics in zip(line, self.font_text.metrics(line)):
+                    advance = metrics[4] if metrics else self.font_text.size(char)[0]
+                    offsets.append(min(offsets[-1] + advance, surface.get_width()))
+                offsets[-1] = surface.get_width()
+                
+                rect = surface.get_rect(center=(self.screen.get_width() // 2, y_offset))
+                lines.append({
+                    'surface': surface,
+                    'pos': rect.topleft,
+                    'start': chars_count,
+                    'offsets': offsets
+                })
+            
+            chars_count += len(line) + 1  # +1 por el salto de línea
+            y_offset += 35
+            
+            # Añadir espacio extra después de líneas vacías
+            if not line.strip():
+                y_offset += 15
+        
+        total_text = page["title"] + "\n\n" + "\n".join(page["text"])
+        return {'lines': lines, 'total_chars': len(total_text)}
+    
     def draw(self):
         """Dibuja la pantalla de historia"""
         # Fondo gradiente
@@ -205,73 +263,43 @@ class StoryScreen:
         current_story = self.story_text[self.current_page]
         
         # Título
-        title_text = self.font_title.render(current_story["title"], True, (255, 255, 255))
+        title_text = render_text(self.font_title, current_story["title"], (255, 255, 255))
         title_rect = title_text.get_rect(center=(self.screen.get_width() // 2, 100))
         self.screen.blit(title_text, title_rect)
         
         # Texto principal con animación
-        self.draw_animated_text(current_story["text"], 150)
+        self.draw_animated_text(150)
         
         # Controles
         self.draw_controls()
         
         # Indicador de página
         page_info = f"{self.current_page + 1} / {self.max_pages}"
-        page_text = self.font_small.render(page_info, True, (150, 150, 150))
+        page_text = render_text(self.font_small, page_info, (150, 150, 150))
         page_rect = page_text.get_rect(center=(self.screen.get_width() // 2, 650))
         self.screen.blit(page_text, page_rect)
     
     def draw_gradient_background(self):
         """Dibuja un fondo con gradiente"""
-        screen_height = self.screen.get_height()
-        for y in range(0, screen_height, 2):
-            # Gradiente de azul oscuro a negro
-            progress = y / screen_height
-            color_value = int(30 * (1 - progress))
-            color = (color_value, color_value, color_value + 10)
-            pygame.draw.line(self.screen, color, (0, y), (self.screen.get_width(), y), 2)
+        # Gradiente de azul oscuro a negro, generado una vez por tamaño de pantalla
+        background = get_gradient_background(self.screen.get_size(), STORY_PALETTE, step=2)
+        self.screen.blit(background, (0, 0))
     
-    def draw_animated_text(self, text_lines, start_y):
+    def draw_animated_text(self, start_y):
         """Dibuja texto con efecto de animación"""
-        y_offset = start_y
+        # Las líneas ya están renderizadas: solo se recorta la parte visible
         chars_shown = int(self.text_animation_progress)
-        chars_count = 0
         
-        for line in text_lines:
-            if chars_count >= chars_shown:
+        for line in self.get_page_layout(start_y)['lines']:
+            visible = chars_shown - line['start']
+            if visible <= 0:
                 break
             
-            # Determinar cuántos caracteres mostrar de esta línea
-            line_length = len(line)
-            if chars_count + line_length <= chars_shown:
-                # Mostrar línea completa
-                display_text = line
-                chars_count += line_length + 1  # +1 por el salto de línea
-            else:
-                # Mostrar línea parcial
-                chars_to_show = chars_shown - chars_count
-                display_text = line[:chars_to_show]
-                chars_count = chars_shown
-            
-            # Renderizar línea
-            if display_text.strip():  # Solo si no está vacía
-                if line.startswith("•"):
-                    # Líneas de lista con color diferente
-                    text_color = (200, 255, 200)
-                elif line.startswith("Ventajas") or line.startswith("Características") or line.startswith("Desafíos"):
-                    text_color = (255, 255, 150)
-                else:
-                    text_color = (255, 255, 255)
-                
-                text_surface = self.font_text.render(display_text, True, text_color)
-                text_rect = text_surface.get_rect(center=(self.screen.get_width() // 2, y_offset))
-                self.screen.blit(text_surface, text_rect)
-            
-            y_offset += 35
-            
-            # Añadir espacio extra después de líneas vacías
-            if not line.strip():
-                y_offset += 15
+            offsets = line['offsets']
+            width = offsets[min(visible, len(offsets) - 1)]
+            if width > 0:
+                area = pygame.Rect(0, 0, width, line['surface'].get_height())
+                self.screen.blit(line['surface'], line['pos'], area)
     
     def draw_controls(self):
         """Dibuja los botones de control"""
@@ -281,7 +309,7 @@ class StoryScreen:
             pygame.draw.rect(self.screen, color, self.prev_button)
             pygame.draw.rect(self.screen, (200, 200, 200), self.prev_button, 2)
             
-            prev_text = self.font_text.render("Anterior", True, (255, 255, 255))
+            prev_text = render_text(self.font_text, "Anterior", (255, 255, 255))
             prev_rect = prev_text.get_rect(center=self.prev_button.center)
             self.screen.blit(prev_text, prev_rect)
         
@@ -295,7 +323,7 @@ class StoryScreen:
         pygame.draw.rect(self.screen, color, self.next_button)
         pygame.draw.rect(self.screen, (200, 200, 200), self.next_button, 2)
         
-        next_text = self.font_text.render(button_text, True, (255, 255, 255))
+        next_text = render_text(self.font_text, button_text, (255, 255, 255))
         next_rect = next_text.get_rect(center=self.next_button.center)
         self.screen.blit(next_text, next_rect)
         
@@ -304,7 +332,7 @@ class StoryScreen:
         pygame.draw.rect(self.screen, color, self.skip_button)
         pygame.draw.rect(self.screen, (200, 200, 200), self.skip_button, 2)
         
-        skip_text = self.font_text.render("Saltar", True, (255, 255, 255))
+        skip_text = render_text(self.font_text, "Saltar", (255, 255, 255))
         skip_rect = skip_text.get_rect(center=self.skip_button.center)
         self.screen.blit(skip_text, skip_rect)
         
@@ -316,7 +344,7 @@ class StoryScreen:
         
         y_offset = 760
         for instruction in instructions:
-            inst_text = self.font_small.render(instruction, True, (150, 150, 150))
+            inst_text = render_text(self.font_small, instruction, (150, 150, 150))
             inst_rect = inst_text.get_rect(center=(self.screen.get_width() // 2, y_offset))
             self.screen.blit(inst_text, inst_rect)
             y_offset += 20
\ No newline at end of file
@@ -0,0 +1,290 @@
+"""Exportación continua de las estadísticas diarias a CSV, Arrow o Parquet
+
+Cada día se añade una fila a la tabla global y una fila por región a la
+tabla regional. Las filas se acumulan en columnas hasta batch_rows y se
+vuelcan al destino como un bloque (un row group en Parquet, un record batch
+en Arrow), así que la memoria usada no depende de la duración de la partida.
+
+Arrow y Parquet necesitan pyarrow (opcional); CSV solo usa la biblioteca
+estándar.
+
+Uso (barrido de partidas sin pantalla):
+    python telemetry.py --runs 100 --format parquet --output telemetry/barrido
+"""
+import abc
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+
+from session import GLOBAL_FIELDS, CONTINENT_FIELDS, FLOAT_FIELDS
+
+# Columnas de las dos tablas
+GLOBAL_COLUMNS = ('run', 'day') + GLOBAL_FIELDS
+REGION_COLUMNS = ('run', 'day', 'region') + CONTINENT_FIELDS
+
+# Filas regionales por bloque antes de volcar al destino
+DEFAULT_BATCH_ROWS = 8192
+
+
+def _require_pyarrow():
+    """Importa pyarrow o explica cómo instalarlo"""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("La exportación a Arrow/Parquet necesita pyarrow: "
+                          "pip install pyarrow (o usa el formato csv)") from e
+    return pyarrow
+
+
+class TelemetrySink(abc.ABC):
+    """Destino de la telemetría: recibe bloques de columnas ya agrupados"""
+
+    @abc.abstractmethod
+    def write_batch(self, global_columns, region_columns):
+        """Escribe un bloque: un diccionario de columnas por tabla"""
+
+    def close(self):
+        pass
+
+
+class CSVSink(TelemetrySink):
+    """Dos ficheros CSV: <base>_global.csv y <base>_regions.csv"""
+
+    extension = "csv"
+
+    def __init__(self, base_path):
+        self.files = []
+        self.global_writer = self._open(f"{base_path}_global.csv", GLOBAL_COLUMNS)
+        self.region_writer = self._open(f"{base_path}_regions.csv", REGION_COLUMNS)
+
+    def _open(self, path, columns):
+        f = open(path, "w", newline="", encoding="utf-8")
+        self.files.append(f)
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        return writer
+
+    def write_batch(self, global_columns, region_columns):
+        self.global_writer.writerows(zip(*(global_columns[name] for name in GLOBAL_COLUMNS)))
+        self.region_writer.writerows(zip(*(region_columns[name] for name in REGION_COLUMNS)))
+        for f in self.files:
+            f.flush()
+
+    def close(self):
+        for f in self.files:
+            f.close()
+        self.files = []
+
+
+class _ArrowSinkBase(TelemetrySink):
+    """Parte común de Arrow y Parquet: esquemas y conversión de columnas"""
+
+    def __init__(self, base_path):
+        pa = self.pa = _require_pyarrow()
+        self.global_schema = pa.schema(
+            [('run', pa.int64()), ('day', pa.int32())] +
+            [(name, self._field_type(name)) for name in GLOBAL_FIELDS])
+        self.region_schema = pa.schema(
+            [('run', pa.int64()), ('day', pa.int32()), ('region', pa.dictionary(pa.int16(), pa.string()))] +
+            [(name, self._field_type(name)) for name in CONTINENT_FIELDS])
+        self.global_writer = self._open(f"{base_path}_global.{self.extension}", self.global_schema)
+        self.region_writer = self._open(f"{base_path}_regions.{self.extension}", self.region_schema)
+
+    def _field_type(self, name):
+        return self.pa.float64() if name in FLOAT_FIELDS else self.pa.int64()
+
+    def _batch(self, columns, schema):
+        pa = self.pa
+        arrays = []
+        for field in schema:
+            values = columns[field.name]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, type=pa.string()).dictionary_encode()
+                              .cast(field.type))
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        return pa.record_batch(arrays, schema=schema)
+
+    def write_batch(self, global_columns, region_columns):
+        self._write(self.global_writer, self._batch(global_columns, self.global_schema))
+        self._write(self.region_writer, self._batch(region_columns, self.region_schema))
+
+    def close(self):
+        self.global_writer.close()
+        self.region_writer.close()
+
+
+class ArrowSink(_ArrowSinkBase):
+    """Ficheros Arrow IPC (Feather v2), un record batch por bloque"""
+
+    extension = "arrow"
+
+    def _open(self, path, schema):
+        return self.pa.ipc.new_file(path, schema)
+
+    def _write(self, writer, batch):
+        writer.write_batch(batch)
+
+
+class ParquetSink(_ArrowSinkBase):
+    """Ficheros Parquet, un row group por bloque"""
+
+    extension = "parquet"
+
+    def _open(self, path, schema):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(path, schema, compression="zstd")
+
+    def _write(self, writer, batch):
+        writer.write_table(self.pa.Table.from_batches([batch]))
+
+
+SINKS = {
+    "csv": CSVSink,
+    "arrow": ArrowSink,
+    "parquet": ParquetSink,
+}
+
+
+def check_format(format):
+    """Comprueba que el formato existe y que sus dependencias están instaladas"""
+    if format not in SINKS:
+        raise ValueError(f"Formato de telemetría desconocido: {format} "
+                         f"(opciones: {', '.join(sorted(SINKS))})")
+    if format != "csv":
+        _require_pyarrow()
+
+
+def open_sink(format, base_path):
+    """Crea el destino para un formato ("csv", "arrow" o "parquet")"""
+    check_format(format)
+    directory = os.path.dirname(base_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return SINKS[format](base_path)
+
+
+class TelemetryWriter:
+    """Acumula las filas de cada día y las vuelca al destino por bloques
+
+    Se engancha a una sesión con GameSession.attach_telemetry(). Varias
+    partidas pueden compartir el mismo escritor cambiando de run con
+    start_run(); la columna run las distingue en los ficheros. Al cargar una
+    partida, restart_from_save() sigue en un run nuevo para que los días
+    deshechos no aparezcan dos veces con el mismo (run, día).
+    """
+
+    def __init__(self, sink, run=0, batch_rows=DEFAULT_BATCH_ROWS):
+        self.sink = sink
+        self.run = run
+        self._last_run = run
+        self.batch_rows = batch_rows
+        self.rows_written = 0
+        self._global = {name: [] for name in GLOBAL_COLUMNS}
+        self._regions = {name: [] for name in REGION_COLUMNS}
+
+    def start_run(self, run):
+        """Vuelca lo pendiente y etiqueta las filas siguientes con otro run"""
+        self.flush()
+        self.run = run
+        self._last_run = max(self._last_run, run)
+
+    def restart_from_save(self, session):
+        """Empieza un run nuevo con el historial de la partida recién cargada"""
+        self.start_run(self._last_run + 1)
+        for day_data in session.history:
+            self.record_day(day_data)
+
+    def record_day(self, day_data):
+        """Añade las filas de un día (el diccionario de save_daily_stats)"""
+        day = day_data['day']
+        columns = self._global
+        columns['run'].append(self.run)
+        columns['day'].append(day)
+        global_stats = day_data['global']
+        for name in GLOBAL_FIELDS:
+            columns[name].append(global_stats[name])
+
+        columns = self._regions
+        for region in day_data['continents']:
+            columns['run'].append(self.run)
+            columns['day'].append(day)
+            columns['region'].append(region['name'])
+            for name in CONTINENT_FIELDS:
+                columns[name].append(region[name])
+
+        if len(columns['day']) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        """Escribe las filas acumuladas como un bloque"""
+        if not self._global['day']:
+            return
+        self.sink.write_batch(self._global, self._regions)
+        self.rows_written += len(self._global['day']) + len(self._regions['day'])
+        for columns in (self._global, self._regions):
+            for values in columns.values():
+                values.clear()
+
+    def close(self):
+        self.flush()
+        self.sink.close()
+
+
+def run_sweep(runs, difficulty, writer, seed=0, policy="none", max_days=365, scenario=None):
+    """Juega partidas sin pantalla exportando su telemetría; devuelve los días simulados"""
+    from session import GameSession
+    from decisions import REGIONAL_DECISIONS
+
+    days = 0
+    for run in range(runs):
+        run_seed = seed + run
+        writer.start_run(run_seed)
+        session = GameSession(difficulty, seed=run_seed, scenario=scenario)
+        session.max_days = max_days
+        session.attach_telemetry(writer)
+        choices = random.Random(run_seed ^ 0x5EED)
+
+        while session.game_state == "playing":
+            if policy == "random" and session.available_decisions:
+                decision = choices.choice(session.available_decisions)
+                # Solo las decisiones regionales llevan región; las demás afectan a todas
+                target = (choices.randrange(len(session.continents))
+                          if decision.id in REGIONAL_DECISIONS else None)
+                session.apply_decision(decision.id, target)
+            session.advance_day()
+        days += session.day - 1
+    writer.flush()
+    return days
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de partidas sin pantalla con exportación de telemetría")
+    parser.add_argument("--runs", type=int, default=10, help="número de partidas")
+    parser.add_argument("--difficulty", default="normal", choices=["easy", "normal", "expert"])
+    parser.add_argument("--format", default="csv", choices=sorted(SINKS))
+    parser.add_argument("--output", default="telemetry/barrido", help="prefijo de los ficheros")
+    parser.add_argument("--seed", type=int, default=0, help="semilla de la primera partida")
+    parser.add_argument("--policy", default="none", choices=["none", "random"],
+                        help="decisiones: ninguna o una al azar cada día")
+    parser.add_argument("--max-days", type=int, default=365)
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument("--scenario", default=None, help="escenario (nombre de scenarios/ o fichero .json)")
+    args = parser.parse_args()
+
+    writer = TelemetryWriter(open_sink(args.format, args.output), batch_rows=args.batch_rows)
+    started = time.perf_counter()
+    days = run_sweep(args.runs, args.difficulty, writer, args.seed, args.policy, args.max_days,
+                     args.scenario)
+    writer.close()
+    elapsed = time.perf_counter() - started
+    print(f"{args.runs} partidas, {days} días, {writer.rows_written} filas en {elapsed:.2f} s "
+          f"({days / elapsed:.0f} días/s) -> {args.output}_*.{args.format}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
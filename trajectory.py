@@ -0,0 +1,306 @@
+"""Historial de la partida en un fichero mapeado en memoria
+
+Sustituye a la lista session.history en partidas muy largas o con muchas
+regiones. Cada día ocupa una fila float32 de ancho fijo:
+
+    día | estadísticas globales (GLOBAL_FIELDS) | región x CONTINENT_FIELDS
+
+Estructura del fichero (little endian):
+
+    cabecera fija (HEADER): marca, versión, inicio de los datos, ancho de fila, días
+    metadatos JSON (nombres de regiones y campos), rellenados hasta DATA_ALIGN
+    filas                    float32           x capacidad x ancho de fila
+
+El fichero crece por bloques sin mover lo ya escrito, y el número de días se
+actualiza en la cabecera con cada append(), así que puede volver a abrirse
+con open_trajectory() aunque el proceso haya terminado. Las series
+(global_series, region_series) son vistas sin copia sobre el fichero.
+
+Uso:
+    python trajectory.py partida.traj
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+from savegame import GLOBAL_FIELDS, CONTINENT_FIELDS, FLOAT_FIELDS
+
+MAGIC = b"EPIDTRAJ"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHIIQ")
+DATA_ALIGN = 64
+
+# Filas que se reservan la primera vez que crece el fichero
+INITIAL_CAPACITY = 64
+
+
+class TrajectoryHistory:
+    """Historial compatible con una lista de días, guardado en un fichero mapeado
+
+    Admite len(), indexado, cortes, iteración y append() con los mismos
+    diccionarios que session.history. El fichero se crea con el primer día,
+    cuando se conocen los nombres de las regiones.
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self.readonly = False
+        self.names = None
+        self._file = None
+        self._mmap = None
+        self._rows = None
+        self._length = 0
+        self._data_offset = 0
+
+    # --- Formato ---
+
+    @property
+    def row_width(self):
+        return 1 + len(GLOBAL_FIELDS) + len(self.names) * len(CONTINENT_FIELDS)
+
+    @property
+    def capacity(self):
+        return 0 if self._rows is None else len(self._rows)
+
+    def _create(self, names):
+        """Crea el fichero con la cabecera para estas regiones"""
+        self.names = list(names)
+        meta = dict(self.metadata, regions=self.names, global_fields=list(GLOBAL_FIELDS),
+                    region_fields=list(CONTINENT_FIELDS))
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        self._data_offset = -(-(HEADER.size + len(meta_bytes)) // DATA_ALIGN) * DATA_ALIGN
+
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "w+b")
+        # Tras clear() se reutiliza el fichero: se sobrescribe sin encogerlo
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, self._data_offset, self.row_width, 0))
+        self._file.write(meta_bytes.ljust(self._data_offset - HEADER.size, b"\0"))
+        # Sin vaciar el búfer, al cerrar taparía el número de días escrito en el mapa
+        self._file.flush()
+        self._length = 0
+        self._map(INITIAL_CAPACITY)
+
+    def _map(self, capacity):
+        """Amplía el fichero hasta capacity filas y vuelve a mapearlo
+
+        El fichero nunca se encoge y el mapa anterior no se cierra: las vistas
+        que aún lo usen siguen siendo válidas y se libera cuando dejan de existir.
+        """
+        size = self._data_offset + capacity * self.row_width * 4
+        if not self.readonly and os.fstat(self._file.fileno()).st_size < size:
+            self._file.truncate(size)
+        access = mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=access)
+        self._rows = np.frombuffer(self._mmap, dtype='<f4', count=capacity * self.row_width,
+                                   offset=self._data_offset).reshape(capacity, self.row_width)
+
+    def _write_length(self):
+        struct.pack_into("<Q", self._mmap, HEADER.size - 8, self._length)
+
+    # --- Interfaz de lista ---
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self._day(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._day(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("índice de historial fuera de rango")
+        return self._day(index)
+
+    def _day(self, i):
+        """Reconstruye el diccionario de save_daily_stats de la fila i"""
+        row = self._rows[i].tolist()
+        global_stats = {field: _value(field, value)
+                        for field, value in zip(GLOBAL_FIELDS, row[1:])}
+        start = 1 + len(GLOBAL_FIELDS)
+        width = len(CONTINENT_FIELDS)
+        continents = []
+        for r, name in enumerate(self.names):
+            values = row[start + r * width:start + (r + 1) * width]
+            region = {'name': name}
+            region.update((field, _value(field, value))
+                          for field, value in zip(CONTINENT_FIELDS, values))
+            continents.append(region)
+        return {'day': int(row[0]), 'global': global_stats, 'continents': continents}
+
+    def append(self, day_data):
+        """Añade un día al final del fichero"""
+        if self.readonly:
+            raise ValueError("El historial está abierto en modo de solo lectura")
+        names = [region['name'] for region in day_data['continents']]
+        if self.names is None:
+            self._create(names)
+        elif names != self.names:
+            raise ValueError("Las regiones del día no coinciden con las del historial")
+
+        if self._length == self.capacity:
+            self._map(self.capacity * 2)
+
+        global_stats = day_data['global']
+        row = [day_data['day']]
+        row.extend(global_stats[field] for field in GLOBAL_FIELDS)
+        for region in day_data['continents']:
+            row.extend(region[field] for field in CONTINENT_FIELDS)
+        self._rows[self._length] = row
+        self._length += 1
+        self._write_length()
+
+    def clear(self):
+        """Vacía el historial (al cargar una partida); las regiones pueden cambiar"""
+        if self.readonly:
+            raise ValueError("El historial está abierto en modo de solo lectura")
+        self.names = None
+        self._length = 0
+        if self._mmap is not None:
+            self._write_length()
+
+    def assign(self, names, days, global_stats, region_stats):
+        """Sustituye el historial por estos arrays de una vez (al cargar una partida)"""
+        self.clear()
+        count = len(days)
+        if not count:
+            return
+        self._create(names)
+        capacity = INITIAL_CAPACITY
+        while capacity < count:
+            capacity *= 2
+        if capacity > self.capacity:
+            self._map(capacity)
+        start = 1 + len(GLOBAL_FIELDS)
+        self._rows[:count, 0] = days
+        self._rows[:count, 1:start] = global_stats
+        self._rows[:count, start:] = np.reshape(region_stats, (count, -1))
+        self._length = count
+        self._write_length()
+
+    # --- Vistas sin copia ---
+
+    def days(self):
+        """Número de día de cada fila"""
+        return self._rows[:self._length, 0] if self._length else np.zeros(0, '<f4')
+
+    def global_series(self, field):
+        """Serie global de un campo, un valor por día"""
+        if not self._length:
+            return np.zeros(0, '<f4')
+        return self._rows[:self._length, 1 + GLOBAL_FIELDS.index(field)]
+
+    def region_tensor(self):
+        """Estadísticas regionales como (día x región x campo)"""
+        if not self._length:
+            return np.zeros((0, 0, len(CONTINENT_FIELDS)), '<f4')
+        start = 1 + len(GLOBAL_FIELDS)
+        return self._rows[:self._length, start:].reshape(
+            self._length, len(self.names), len(CONTINENT_FIELDS))
+
+    def region_series(self, field):
+        """Serie regional de un campo como (día x región)"""
+        return self.region_tensor()[:, :, CONTINENT_FIELDS.index(field)]
+
+    def global_stats(self):
+        """Estadísticas globales como (día x campo)"""
+        if not self._length:
+            return np.zeros((0, len(GLOBAL_FIELDS)), '<f4')
+        return self._rows[:self._length, 1:1 + len(GLOBAL_FIELDS)]
+
+    def views(self):
+        """Vistas float32 de (días, globales, regionales) para savegame.snapshot()
+
+        Las filas ya escritas no cambian al añadir días, así que el hilo de
+        guardado puede convertirlas después. clear() y assign() sí las
+        reescriben: antes hay que esperar a que termine el guardado pendiente.
+        """
+        return self.days(), self.global_stats(), self.region_tensor()
+
+    def arrays(self):
+        """Copias en float64 de (días, globales, regionales), como HistoryBuffer.arrays()"""
+        days, global_stats, regions = self.views()
+        return days.astype('<i4'), global_stats.astype('<f8'), regions.astype('<f8')
+
+    # --- Fichero ---
+
+    def flush(self):
+        """Fuerza la escritura a disco de lo mapeado"""
+        if self._mmap is not None and not self.readonly:
+            self._mmap.flush()
+
+    def close(self):
+        """Escribe lo pendiente y suelta el fichero (las vistas existentes siguen válidas)"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _value(field, value):
+    return value if field in FLOAT_FIELDS else int(value)
+
+
+def open_trajectory(path, writable=False):
+    """Abre un historial ya escrito; con writable se puede seguir añadiendo días"""
+    f = open(path, "r+b" if writable else "rb")
+    magic, version, _reserved, data_offset, row_width, length = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        f.close()
+        raise ValueError(f"{path} no es un historial de partida")
+    if version != VERSION:
+        f.close()
+        raise ValueError(f"Versión de historial no compatible: {version}")
+    meta = json.loads(f.read(data_offset - HEADER.size).rstrip(b"\0").decode("utf-8"))
+
+    history = TrajectoryHistory(path, {key: value for key, value in meta.items()
+                                       if key not in ('regions', 'global_fields', 'region_fields')})
+    history.readonly = not writable
+    history.names = meta['regions']
+    history._file = f
+    history._data_offset = data_offset
+    history._length = length
+    if history.row_width != row_width:
+        f.close()
+        raise ValueError(f"{path}: el ancho de fila no coincide con las regiones")
+    capacity = (os.fstat(f.fileno()).st_size - data_offset) // (row_width * 4)
+    history._map(capacity)
+    return history
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python trajectory.py partida.traj [...]")
+        return 1
+    for path in sys.argv[1:]:
+        history = open_trajectory(path)
+        if not history:
+            print(f"{path}: vacío")
+            continue
+        infected = history.global_series('infected')
+        deaths = history.global_series('deaths')
+        peak = int(infected.argmax())
+        print(f"{path}: {len(history)} días, {len(history.names)} regiones, "
+              f"pico de infectados {infected[peak]:.0f} el día {history.days()[peak]:.0f}, "
+              f"muertes finales {deaths[-1]:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,12 @@
 import pygame
-import matplotlib.pyplot as plt
-import matplotlib.backends.backend_agg as agg
-import numpy as np
+import math
+import time
+from lazy_imports import lazy_import
+from render_cache import get_font, render_text
+from profiler import timed
+
+# El módulo de gráficos (y NumPy) solo se carga al abrir las estadísticas
+charts = lazy_import("charts")
 
 class Button:
     def __init__(self, x, y, width, height, text, color=(100, 100, 100), text_color=(255, 255, 255)):
@@ -10,7 +15,7 @@ class Button:
         self.color = color
         self.hover_color = (min(255, color[0] + 30), min(255, color[1] + 30), min(255, color[2] + 30))
         self.text_color = text_color
-        self.font = pygame.font.Font(None, 24)
+        self.font = get_font(24)
         self.hovered = False
         self.clicked = False
         self.enabled = True
@@ -45,7 +50,7 @@ class Button:
         pygame.draw.rect(screen, color, self.rect)
         pygame.draw.rect(screen, (150, 150, 150) if self.enabled else (80, 80, 80), self.rect, 2)
         
-        text_surface = self.font.render(self.text, True, text_color)
+        text_surface = render_text(self.font, self.text, text_color)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
@@ -54,8 +59,8 @@ class ConfirmDialog:
         self.screen = screen
         self.message = message
         self.title = title
-        self.font_title = pygame.font.Font(None, 32)
-        self.font_text = pygame.font.Font(None, 24)
+        self.font_title = get_font(32)
+        self.font_text = get_font(24)
         
         # Calcular tamaño del diálogo
         self.dialog_width = 400
@@ -116,7 +121,7 @@ class ConfirmDialog:
         pygame.draw.rect(self.screen, (150, 150, 150), self.dialog_rect, 3)
         
         # Título
-        title_text = self.font_title.render(self.title, True, (255, 255, 255))
+        title_text = render_text(self.font_title, self.title, (255, 255, 255))
         title_rect = title_text.get_rect(center=(self.dialog_rect.centerx, self.dialog_rect.y + 40))
         self.screen.blit(title_text, title_rect)
         
@@ -124,7 +129,7 @@ class ConfirmDialog:
         message_lines = self.message.split('\n')
         y_offset = self.dialog_rect.y + 80
         for line in message_lines:
-            message_text = self.font_text.render(line, True, (200, 200, 200))
+            message_text = render_text(self.font_text, line, (200, 200, 200))
             message_rect = message_text.get_rect(center=(self.dialog_rect.centerx, y_offset))
             self.screen.blit(message_text, message_rect)
             y_offset += 30
@@ -136,9 +141,9 @@ class ConfirmDialog:
 class MainMenu:
     def __init__(self, screen):
         self.screen = screen
-        self.font_title = pygame.font.Font(None, 72)
-        self.font_subtitle = pygame.font.Font(None, 36)
-        self.font_desc = pygame.font.Font(None, 20)
+        self.font_title = get_font(72)
+        self.font_subtitle = get_font(36)
+        self.font_desc = get_font(20)
         
         # Botones
         screen_width, screen_height = screen.get_size()
@@ -173,20 +178,20 @@ class MainMenu:
         self.draw_animated_background()
         
         # Título con efecto de pulsación
-        title_alpha = int(255 * (0.8 + 0.2 * abs(np.sin(self.title_pulse))))
+        title_alpha = int(255 * (0.8 + 0.2 * abs(math.sin(self.title_pulse))))
         title_color = (min(255, 200 + title_alpha//5), min(255, 200 + title_alpha//5), 255)
         
-        title_text = self.font_title.render("Controla la Epidemia Global", True, title_color)
+        title_text = render_text(self.font_title, "Controla la Epidemia Global", title_color)
         title_rect = title_text.get_rect(center=(self.screen.get_width() // 2, 120))
         
         # Sombra del título
-        shadow_text = self.font_title.render("Controla la Epidemia Global", True, (50, 50, 50))
+        shadow_text = render_text(self.font_title, "Controla la Epidemia Global", (50, 50, 50))
         shadow_rect = shadow_text.get_rect(center=(self.screen.get_width() // 2 + 3, 123))
         self.screen.blit(shadow_text, shadow_rect)
         self.screen.blit(title_text, title_rect)
         
         # Subtítulo
-        subtitle_text = self.font_subtitle.render("Selecciona la dificultad:", True, (200, 200, 200))
+        subtitle_text = render_text(self.font_subtitle, "Selecciona la dificultad:", (200, 200, 200))
         subtitle_rect = subtitle_text.get_rect(center=(self.screen.get_width() // 2, 220))
         self.screen.blit(subtitle_text, subtitle_rect)
         
@@ -201,7 +206,7 @@ class MainMenu:
         
         # Información del juego
         info_text = "Un simulador de gestión de crisis epidemiológica"
-        info_surface = self.font_desc.render(info_text, True, (150, 150, 150))
+        info_surface = render_text(self.font_desc, info_text, (150, 150, 150))
         info_rect = info_surface.get_rect(center=(self.screen.get_width() // 2, 180))
         self.screen.blit(info_surface, info_rect)
     
@@ -265,7 +270,7 @@ class MainMenu:
             
             y_offset = panel_rect.y + 20
             for desc_line in descriptions[selected_difficulty]:
-                desc_text = self.font_desc.render(desc_line, True, (200, 200, 200))
+                desc_text = render_text(self.font_desc, desc_line, (200, 200, 200))
                 desc_rect = desc_text.get_rect(center=(panel_rect.centerx, y_offset))
                 self.screen.blit(desc_text, desc_rect)
                 y_offset += 25
@@ -274,9 +279,9 @@ class GameUI:
     def __init__(self, screen):
         self.screen = screen
         self.screen_width, self.screen_height = screen.get_size()
-        self.font = pygame.font.Font(None, 24)
-        self.font_small = pygame.font.Font(None, 20)
-        self.font_large = pygame.font.Font(None, 32)
+        self.font = get_font(24)
+        self.font_small = get_font(20)
+        self.font_large = get_font(32)
         
         # Layout mejorado - sin superposiciones
         self.status_panel_rect = pygame.Rect(10, 10, 300, 180)
@@ -294,6 +299,13 @@ class GameUI:
         # Panel de estadísticas
         self.stats_panel_visible = False
         self.stats_surface = None
+        self._chart_service = None
+        self.stats_chart_dirty = True
+        
+        # Paneles retenidos: solo se vuelven a renderizar tras invalidate_panels()
+        self.status_panel_surface = None
+        self.continent_panels_surface = None
+        self.panels_version = 0
         
         # Diálogo de confirmación
         self.confirm_dialog = None
@@ -312,13 +324,13 @@ class GameUI:
         if self.stats_panel_visible:
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 self.stats_panel_visible = False
-                self.stats_surface = None
+                self.invalidate_stats_chart()
             elif event.type == pygame.MOUSEBUTTONUP:
                 # Click fuera del panel de estadísticas para cerrar
                 stats_rect = pygame.Rect(100, 50, self.screen_width - 200, self.screen_height - 100)
                 if not stats_rect.collidepoint(event.pos):
                     self.stats_panel_visible = False
-                    self.stats_surface = None
+                    self.invalidate_stats_chart()
             return None
         
         # Eventos normales del juego
@@ -344,58 +356,86 @@ class GameUI:
         self.stats_button.set_enabled(enabled)
         self.menu_button.set_enabled(enabled)
     
+    def invalidate_panels(self):
+        """Descarta los paneles retenidos; se llama al avanzar el día o tras una decisión"""
+        self.status_panel_surface = None
+        self.continent_panels_surface = None
+        self.panels_version += 1
+    
+    def has_overlay(self):
+        """Indica si hay algo abierto encima del juego (estadísticas o diálogo)"""
+        return self.stats_panel_visible or self.confirm_dialog is not None
+    
+    def is_animating(self):
+        """Indica si el panel de estadísticas está esperando gráficos nuevos"""
+        if not self.stats_panel_visible:
+            return False
+        return self.stats_chart_dirty or (self._chart_service is not None and self._chart_service.busy)
+    
     def draw_status_panel(self, day, global_stats):
         """Dibuja el panel de estado global mejorado"""
-        pygame.draw.rect(self.screen, (30, 30, 50), self.status_panel_rect)
-        pygame.draw.rect(self.screen, (100, 100, 150), self.status_panel_rect, 2)
+        if self.status_panel_surface is None:
+            self.status_panel_surface = self.render_status_panel(day, global_stats)
+        self.screen.blit(self.status_panel_surface, self.status_panel_rect)
+    
+    def _level_color(self, value):
+        """Color para valores porcentuales de economía y moral"""
+        if value > 70:
+            return (150, 255, 150)
+        elif value > 40:
+            return (255, 255, 150)
+        return (255, 150, 150)
+    
+    def render_status_panel(self, day, global_stats):
+        """Renderiza el panel de estado global en su propia superficie"""
+        surface = pygame.Surface(self.status_panel_rect.size)
+        panel_rect = surface.get_rect()
+        pygame.draw.rect(surface, (30, 30, 50), panel_rect)
+        pygame.draw.rect(surface, (100, 100, 150), panel_rect, 2)
         
         # Título del panel
-        title_text = self.font.render("Estado Global", True, (255, 255, 0))
-        self.screen.blit(title_text, (self.status_panel_rect.x + 10, self.status_panel_rect.y + 10))
+        title_text = render_text(self.font, "Estado Global", (255, 255, 0))
+        surface.blit(title_text, (10, 10))
         
-        # Estadísticas
-        y_offset = self.status_panel_rect.y + 35
+        # Estadísticas con su color según el tipo
+        y_offset = 35
         stats = [
-            f"Día: {day}",
-            f"Población: {global_stats['total_population']:,}",
-            f"Infectados: {global_stats['infected']:,}",
-            f"Recuperados: {global_stats['recovered']:,}",
-            f"Muertes: {global_stats['deaths']:,}",
-            f"Economía: {global_stats['economy']:.1f}%",
-            f"Moral: {global_stats['morale']:.1f}%"
+            (f"Día: {day}", (255, 255, 255)),
+            (f"Población: {global_stats['total_population']:,}", (255, 255, 255)),
+            (f"Infectados: {global_stats['infected']:,}", (255, 200, 150)),
+            (f"Recuperados: {global_stats['recovered']:,}", (150, 255, 150)),
+            (f"Muertes: {global_stats['deaths']:,}", (255, 150, 150)),
+            (f"Economía: {global_stats['economy']:.1f}%", self._level_color(global_stats['economy'])),
+            (f"Moral: {global_stats['morale']:.1f}%", self._level_color(global_stats['morale']))
         ]
         
-        for stat in stats:
-            # Color según el tipo de estadística
-            if "Muertes" in stat:
-                color = (255, 150, 150)
-            elif "Infectados" in stat:
-                color = (255, 200, 150)
-            elif "Recuperados" in stat:
-                color = (150, 255, 150)
-            elif "Economía" in stat or "Moral" in stat:
-                value = float(stat.split(":")[1].replace("%", "").strip())
-                if value > 70:
-                    color = (150, 255, 150)
-                elif value > 40:
-                    color = (255, 255, 150)
-                else:
-                    color = (255, 150, 150)
-            else:
-                color = (255, 255, 255)
-            
-            text_surface = self.font_small.render(stat, True, color)
-            self.screen.blit(text_surface, (self.status_panel_rect.x + 10, y_offset))
+        for stat, color in stats:
+            text_surface = render_text(self.font_small, stat, color)
+            surface.blit(text_surface, (10, y_offset))
             y_offset += 20
+        
+        return surface
     
     def draw_continent_panels(self, continents):
         """Dibuja los paneles de continentes mejorados"""
+        if self.continent_panels_surface is None:
+            self.continent_panels_surface = self.render_continent_panels(continents)
+        self.screen.blit(self.continent_panels_surface, self.continent_panels_rect)
+    
+    def render_continent_panels(self, continents):
+        """Renderiza los paneles de continentes en una superficie transparente"""
+        surface = pygame.Surface(self.continent_panels_rect.size, pygame.SRCALPHA)
         panel_width = 280
         panel_height = 130
         
+        # Si el escenario tiene más regiones de las que caben, se muestran las más afectadas
+        slots = (self.continent_panels_rect.width + 10) // (panel_width + 10)
+        if len(continents) > slots:
+            continents = sorted(continents, key=lambda c: c.get_infection_rate(), reverse=True)[:slots]
+        
         for i, continent in enumerate(continents):
-            x = self.continent_panels_rect.x + i * (panel_width + 10)
-            y = self.continent_panels_rect.y
+            x = i * (panel_width + 10)
+            y = 0
             panel_rect = pygame.Rect(x, y, panel_width, panel_height)
             
             # Color de fondo según nivel de infección
@@ -410,12 +450,12 @@ class GameUI:
                 bg_color = (60, 30, 30)
                 border_color = (200, 100, 100)
             
-            pygame.draw.rect(self.screen, bg_color, panel_rect)
-            pygame.draw.rect(self.screen, border_color, panel_rect, 2)
+            pygame.draw.rect(surface, bg_color, panel_rect)
+            pygame.draw.rect(surface, border_color, panel_rect, 2)
             
             # Nombre del continente
-            name_text = self.font.render(continent.name, True, (255, 255, 255))
-            self.screen.blit(name_text, (x + 10, y + 8))
+            name_text = render_text(self.font, continent.name, (255, 255, 255))
+            surface.blit(name_text, (x + 10, y + 8))
             
             # Estadísticas del continente
             y_offset = y + 30
@@ -428,96 +468,35 @@ class GameUI:
             ]
             
             for stat in continent_stats:
-                text_surface = self.font_small.render(stat, True, (255, 255, 255))
-                self.screen.blit(text_surface, (x + 10, y_offset))
+                text_surface = render_text(self.font_small, stat, (255, 255, 255))
+                surface.blit(text_surface, (x + 10, y_offset))
                 y_offset += 16
-    
-    def generate_improved_stats_chart(self, history):
-        """Genera gráficos más comprensibles"""
-        if not history or len(history) < 2:
-            return None
         
-        # Configurar matplotlib para fondo oscuro
-        plt.style.use('dark_background')
-        fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-        fig.patch.set_facecolor('#1a1a2e')
-        
-        days = list(range(len(history)))
-        
-        # Gráfico 1: Casos activos vs Recuperados
-        infected_data = [day_data['global']['infected'] for day_data in history]
-        recovered_data = [day_data['global']['recovered'] for day_data in history]
-        
-        axes[0,0].fill_between(days, infected_data, color='#ff6b6b', alpha=0.7, label='Casos Activos')
-        axes[0,0].fill_between(days, recovered_data, color='#4ecdc4', alpha=0.7, label='Recuperados')
-        axes[0,0].set_title('Evolución de Casos', fontsize=14, color='white', pad=20)
-        axes[0,0].legend()
-        axes[0,0].grid(True, alpha=0.3)
-        axes[0,0].set_ylabel('Número de Personas', color='white')
-        
-        # Gráfico 2: Muertes diarias (no acumuladas)
-        deaths_data = [day_data['global']['deaths'] for day_data in history]
-        daily_deaths = [deaths_data[i] - deaths_data[i-1] if i > 0 else deaths_data[i] 
-                       for i in range(len(deaths_data))]
-        
-        axes[0,1].bar(days, daily_deaths, color='#ff4757', alpha=0.8)
-        axes[0,1].set_title('Muertes por Día', fontsize=14, color='white', pad=20)
-        axes[0,1].grid(True, alpha=0.3)
-        axes[0,1].set_ylabel('Muertes Diarias', color='white')
-        
-        # Gráfico 3: Economía Global
-        economy_data = [day_data['global']['economy'] for day_data in history]
-        color_economy = ['#2ed573' if x > 60 else '#ffa502' if x > 30 else '#ff4757' for x in economy_data]
-        
-        axes[1,0].plot(days, economy_data, color='#3742fa', linewidth=3, marker='o', markersize=4)
-        axes[1,0].fill_between(days, economy_data, alpha=0.3, color='#3742fa')
-        axes[1,0].set_title('Estado de la Economía Global', fontsize=14, color='white', pad=20)
-        axes[1,0].set_ylabel('Economía (%)', color='white')
-        axes[1,0].grid(True, alpha=0.3)
-        axes[1,0].set_ylim(0, 100)
-        
-        # Líneas de referencia
-        axes[1,0].axhline(y=70, color='#2ed573', linestyle='--', alpha=0.7, label='Buena')
-        axes[1,0].axhline(y=30, color='#ff4757', linestyle='--', alpha=0.7, label='Crisis')
-        axes[1,0].legend()
-        
-        # Gráfico 4: Moral Global
-        morale_data = [day_data['global']['morale'] for day_data in history]
-        
-        axes[1,1].plot(days, morale_data, color='#26d0ce', linewidth=3, marker='s', markersize=4)
-        axes[1,1].fill_between(days, morale_data, alpha=0.3, color='#26d0ce')
-        axes[1,1].set_title('Moral de la Población', fontsize=14, color='white', pad=20)
-        axes[1,1].set_ylabel('Moral (%)', color='white')
-        axes[1,1].grid(True, alpha=0.3)
-        axes[1,1].set_ylim(0, 100)
-        
-        # Líneas de referencia
-        axes[1,1].axhline(y=70, color='#2ed573', linestyle='--', alpha=0.7, label='Alta')
-        axes[1,1].axhline(y=30, color='#ff4757', linestyle='--', alpha=0.7, label='Baja')
-        axes[1,1].legend()
-        
-        # Personalizar todos los ejes
-        for ax in axes.flat:
-            ax.set_facecolor('#16213e')
-            ax.tick_params(colors='white', labelsize=10)
-            ax.set_xlabel('Días', color='white')
-            for spine in ax.spines.values():
-                spine.set_color('white')
-                spine.set_alpha(0.5)
-        
-        plt.tight_layout(pad=3.0)
-        
-        # Convertir a superficie de Pygame
-        canvas = agg.FigureCanvasAgg(fig)
-        canvas.draw()
-        renderer = canvas.get_renderer()
-        raw_data = renderer.buffer_rgba()
-        size = fig.canvas.get_width_height()
-        surf = pygame.image.frombuffer(raw_data.tobytes(), size, "RGBA")
-        
-        plt.close(fig)
-        plt.style.use('default')  # Restaurar estilo por defecto
-        return surf
+        return surface
+    
+    @property
+    def chart_service(self):
+        """Servicio de gráficos, creado la primera vez que se necesita"""
+        if self._chart_service is None:
+            self._chart_service = charts.ChartService(charts.StatsChart())
+        return self._chart_service
+    
+    def invalidate_stats_chart(self):
+        """Marca los gráficos para volver a dibujarse con el historial actual"""
+        self.stats_chart_dirty = True
+    
+    def reset_stats_chart(self):
+        """Descarta las series acumuladas (el historial se ha sustituido, p. ej. al cargar)"""
+        if self._chart_service is not None:
+            self._chart_service.chart.clear()
+        self.invalidate_stats_chart()
+    
+    def get_chart_area(self):
+        """Área disponible para los gráficos dentro del panel de estadísticas"""
+        stats_rect = pygame.Rect(100, 50, self.screen_width - 200, self.screen_height - 100)
+        chart_rect = pygame.Rect(0, 0, stats_rect.width - 40, stats_rect.height - 120)
+        chart_rect.center = (stats_rect.centerx, stats_rect.centery + 20)
+        return chart_rect
     
     def draw_stats_panel(self, history):
         """Dibuja el panel de estadísticas mejorado"""
@@ -536,35 +515,26 @@ class GameUI:
         pygame.draw.rect(self.screen, (100, 150, 200), stats_rect, 3)
         
         # Título
-        title_text = self.font_large.render("Análisis Estadístico de la Pandemia", True, (255, 255, 255))
+        title_text = render_text(self.font_large, "Análisis Estadístico de la Pandemia", (255, 255, 255))
         title_rect = title_text.get_rect(center=(stats_rect.centerx, stats_rect.y + 30))
         self.screen.blit(title_text, title_rect)
         
-        # Generar gráficos si es necesario
-        if self.stats_surface is None and history:
-            self.stats_surface = self.generate_improved_stats_chart(history)
-        
-        if self.stats_surface:
-            # Escalar y centrar la superficie de estadísticas
-            chart_rect = self.stats_surface.get_rect()
-            max_width = stats_rect.width - 40
-            max_height = stats_rect.height - 120
-            
-            scale_x = max_width / chart_rect.width
-            scale_y = max_height / chart_rect.height
-            scale = min(scale_x, scale_y, 1.0)  # No ampliar, solo reducir si es necesario
+        # Solicitar gráficos nuevos en segundo plano si es necesario
+        chart_area = self.get_chart_area()
+        if self.stats_chart_dirty:
+            # Con menos de dos días no hay gráficos; el siguiente día vuelve a marcarlos
+            if history and len(history) >= 2:
+                self.chart_service.request(history, chart_area.size)
+            self.stats_chart_dirty = False
+        
+        # Mientras tanto se muestra la última superficie completa
+        if self._chart_service is not None:
+            self.stats_surface = self._chart_service.poll()
+            if self.stats_surface:
+                self.screen.blit(self.stats_surface, chart_area)
             
-            if scale < 1.0:
-                new_width = int(chart_rect.width * scale)
-                new_height = int(chart_rect.height * scale)
-                scaled_surface = pygame.transform.scale(self.stats_surface, (new_width, new_height))
-            else:
-                scaled_surface = self.stats_surface
-            
-            # Centrar la imagen escalada
-            chart_rect = scaled_surface.get_rect()
-            chart_rect.center = (stats_rect.centerx, stats_rect.centery + 20)
-            self.screen.blit(scaled_surface, chart_rect)
+            if self._chart_service.busy:
+                self.draw_chart_progress(chart_area)
         
         # Instrucciones para cerrar
         instructions = [
@@ -574,11 +544,24 @@ class GameUI:
         
         y_offset = stats_rect.bottom - 50
         for instruction in instructions:
-            inst_text = self.font_small.render(instruction, True, (200, 200, 200))
+            inst_text = render_text(self.font_small, instruction, (200, 200, 200))
             inst_rect = inst_text.get_rect(center=(stats_rect.centerx, y_offset))
             self.screen.blit(inst_text, inst_rect)
             y_offset += 20
     
+    def draw_chart_progress(self, chart_area):
+        """Dibuja un indicador de progreso mientras se actualizan los gráficos"""
+        center = (chart_area.right - 30, chart_area.y + 20)
+        angle = (time.time() * 6) % (2 * math.pi)
+        arc_rect = pygame.Rect(0, 0, 24, 24)
+        arc_rect.center = center
+        pygame.draw.arc(self.screen, (100, 150, 200), arc_rect, angle, angle + 4.5, 3)
+        
+        text_surface = render_text(self.font_small, "Actualizando gráficos...", (200, 200, 200))
+        text_rect = text_surface.get_rect(midright=(center[0] - 20, center[1]))
+        self.screen.blit(text_surface, text_rect)
+    
+    @timed("GameUI.draw")
     def draw(self, day, global_stats, continents, history):
         """Dibuja la interfaz principal mejorada"""
         # Paneles principales (solo si las estadísticas no están visibles)